@@ -11,7 +11,6 @@ from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS #Chroma
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,6 +18,7 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from global_util.gopi_util import get_llm, get_embedding
+from global_util.context_selection import ContextSelector
 
 '''
 This RAG demo is to show how to use LangChain to create a RAG system
@@ -34,6 +34,7 @@ Steps:
 '''
 
 llm = get_llm()
+context_selector = ContextSelector(top_n=3) # Retrieved chunks are de-duplicated and trimmed before the prompt
 
 # Create OpenAI embeddings - Embeddings are used to convert text to vectors for semantic search
 def create_openai_embeddings_model():
@@ -87,20 +88,24 @@ def rag_chain(retriever, llm, user_query):
     prompt = ChatPromptTemplate.from_template(prompt_template)
 
     # Implicit function to retrieve only the "page_content" part from each document 
-    # Retriever returns 5 relevant Document objects (search_kwargs={"k": 5}) and sends it to this function  
+    # Retriever returns 5 candidate Document objects (search_kwargs={"k": 5}); the context selector
+    # drops near-duplicates, re-ranks them and keeps at most 3 within the token budget
     # This function extracts only the page_content from each Document (ignoring metadata)
     # Joins the "page_content" parts into a single string with 2 new lines between them
     def extract_only_page_content_part_from_docs(docs):
         return "\n\n".join(doc.page_content for doc in docs) 
 
     rag_chain = ( 
-        {"context": retriever | extract_only_page_content_part_from_docs, "question": RunnablePassthrough()} 
-        | prompt
+        prompt
         | llm
         | StrOutputParser()
     )
 
-    result = rag_chain.invoke(user_query)
+    context = context_selector.select(user_query, retriever.invoke(user_query))
+    print(f"Context: {len(context.docs)}/{context.chunks_total} chunks, "
+          f"{context.tokens_after}/{context.tokens_before} tokens ({context.tokens_saved} saved)")
+
+    result = rag_chain.invoke({"context": extract_only_page_content_part_from_docs(context.docs), "question": user_query})
     print(result)
 
 
@@ -7,13 +7,13 @@ Steps:
 3. Create vector store
 4. Create retrieval QA chain
 5. Create Gradio interface
+
+The web UI starts immediately (create_app); the PDF is parsed and indexed in the
+background, and skipped entirely when the persisted index already matches the file.
 '''
-import os, sys
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import os, sys, time, itertools, threading
 from langchain_openai import ChatOpenAI
 from langchain_community.vectorstores import Chroma
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
@@ -23,7 +23,10 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from global_util.gopi_util import get_llm, create_or_load_chroma_db
+from global_util.gopi_util import get_llm, create_or_load_chroma_db_from_pdf, warm_up_query_cache
+from global_util.metrics import LatencyRecorder
+from global_util.context_selection import ContextSelector, CONTEXT_FETCH_K
+from global_util.response_cache import ResponseCache, SQLiteCacheBackend, context_fingerprint
 
 
 # ================Upload PDF file and Split into chunks===============
@@ -32,19 +35,8 @@ from global_util.gopi_util import get_llm, create_or_load_chroma_db
 '''
 
 pdf_path = "./global_test_files/HR-Manual.pdf" # Relative path to HR Policy Manual PDF file
-
-loader = PyPDFLoader(pdf_path)
-documents = loader.load()
-
-# ================Split into chunks===============
-splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-docs = splitter.split_documents(documents)
-
-# ================Create Vector Store===============
-vector_store = create_or_load_chroma_db(docs, db_name="hr_policy_chroma_db", collection_name="hr_policy_pdf")
-
-# ================Create Retrieval QA Chain===============
-retriever = vector_store.as_retriever()
+db_name = "hr_policy_chroma_db"
+collection_name = "hr_policy_pdf"
 
 # ================Create Prompt Template===============
 # This template guides the LLM on how to use the retrieved context from the vector store to answer questions
@@ -53,7 +45,7 @@ retriever = vector_store.as_retriever()
 # The template is used to format the prompt before sending it to the LLM
 #  ================End of Prompt Template===============
 
-template = """You are an HR assistant. Use the following pieces of retrieved context to answer the question. 
+template = """You are an HR assistant. Use the following pieces of retrieved context to answer the question.
 If you don't know the answer from the context, just say that you don't know. Keep the answer concise.
 
 Context: {context}
@@ -65,37 +57,170 @@ Answer:
 
 prompt = ChatPromptTemplate.from_template(template)
 
-# ================Create QA Chain===============
-# This chain retrieves relevant documents from the vector store and uses them to answer the user's question
-# The chain is composed of the retriever, prompt, and LLM
-#  ================End of QA Chain===============
-qa_chain = (
-    {"context": retriever, "question": RunnablePassthrough()}
-    | prompt
-    | get_llm()
-    | StrOutputParser()
-)
+# Per-stage latency (retrieval, context_selection, first_token, generation, total) of recent requests
+latency = LatencyRecorder()
+STATS_EVERY = 100 # Print a latency snapshot every N requests
+request_counter = itertools.count(1)
+
+# count/mean/p50/p95/p99/max in seconds for each stage
+def get_latency_stats():
+    return latency.snapshot()
+
+# Retrieved chunks are de-duplicated, re-ranked and trimmed to GOPI_CONTEXT_TOKEN_BUDGET before the prompt
+context_selector = ContextSelector()
+
+# Chunks and tokens retrieved vs sent to the LLM, and tokens saved per query
+def get_context_stats():
+    return context_selector.stats()
+
+# Answers keyed by question and the exact context they were generated from; re-indexing changes
+# the retrieved chunk IDs, so answers from stale context are never served (GOPI_HR_ANSWER_CACHE_TTL=0 disables)
+ANSWER_CACHE_TTL = int(os.getenv("GOPI_HR_ANSWER_CACHE_TTL", "86400"))
+answer_cache = ResponseCache(ttl=ANSWER_CACHE_TTL, max_entries=1000,
+                             backend=SQLiteCacheBackend(table="hr_answers")) if ANSWER_CACHE_TTL else None
+
+# Hit rate and LLM time saved by the answer cache
+def get_answer_cache_stats():
+    return answer_cache.stats() if answer_cache else {}
+
+# Only the text of the selected chunks goes into the prompt, 2 new lines between them (metadata is left out)
+def format_context(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+# Cache key of an answer: model, fingerprint of the context chunks and the question (normalized by the cache)
+def answer_cache_key(question, docs, model):
+    return f"{model}\n{context_fingerprint(docs)}\n{question}"
+
+
+class HRAssistant:
+    """
+    Vector store, retriever and answer chain of the HR assistant.
+
+    start() loads (or builds) the index in a background thread; until it is
+    done, state tells what is happening and chatbot() answers with a
+    "starting up" message instead of blocking.
+    """
+
+    def __init__(self, pdf_path=pdf_path, db_name=db_name, collection_name=collection_name):
+        self.pdf_path = pdf_path
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.state = "starting"
+        self.error = None
+        self.ready = threading.Event()
+        self.load_seconds = None
+        self.vector_store = None
+        self.retriever = None
+        # chatbot() retrieves, selects context and then streams answer_chain, timing each stage separately
+        llm = get_llm()
+        self.model = llm.model_name
+        self.answer_chain = prompt | llm | StrOutputParser()
+
+    def start(self):
+        threading.Thread(target=self._load, daemon=True).start()
+        return self
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            # ================Split into chunks and Create Vector Store===============
+            # Skipped when the index already matches the PDF; otherwise pages are extracted in
+            # parallel and streamed through the splitter into batched embedding and upsert
+            self.state = "loading index"
+            self.vector_store = create_or_load_chroma_db_from_pdf(
+                self.pdf_path, db_name=self.db_name, collection_name=self.collection_name,
+                chunk_size=1000, chunk_overlap=200
+            )
+
+            # ================Create Retrieval QA Chain===============
+            # The store's embedding caches query vectors, so repeated questions skip the embedding call;
+            # the most frequent past questions are pre-embedded in the background.
+            # CONTEXT_FETCH_K candidates are fetched; context_selector picks the ones sent to the LLM
+            self.retriever = self.vector_store.as_retriever(search_kwargs={"k": CONTEXT_FETCH_K})
+            warm_up_query_cache(self.vector_store.embeddings)
+            self.load_seconds = time.perf_counter() - started
+            self.state = "ready"
+            self.ready.set()
+            print(f"HR assistant ready in {self.load_seconds:.1f}s")
+        except Exception as e:
+            self.error = e
+            self.state = "failed"
+            print(f"HR assistant failed to load the index: {e}")
+
+    # Readiness for health checks
+    def status(self):
+        return {"state": self.state, "error": str(self.error) if self.error else None,
+                "load_seconds": self.load_seconds}
+
+    # The answer is streamed: each yield updates the Response box with the text generated so far
+    # Async so the event loop serves other requests while this one waits on retrieval or the LLM
+    async def chatbot(self, user_input):
+        if not self.ready.is_set():
+            if self.state == "failed":
+                yield f"The HR assistant could not load the HR policy index: {self.error}"
+            else:
+                yield f"The HR assistant is still starting up ({self.state}). Please try again in a moment."
+            return
+        try:
+            started = time.perf_counter()
+            with latency.time("retrieval"):
+                docs = await self.retriever.ainvoke(user_input)
+            with latency.time("context_selection"):
+                context = context_selector.select(user_input, docs)
+
+            # Same question and same context as an earlier request: reuse its answer
+            cache_key = answer_cache_key(user_input, context.docs, self.model)
+            cached = answer_cache.get(cache_key) if answer_cache else None
+            if cached is not None:
+                latency.record("total", time.perf_counter() - started)
+                yield cached
+                return
+
+            response = ""
+            generation_started = time.perf_counter()
+            async for chunk in self.answer_chain.astream({"context": format_context(context.docs),
+                                                             "question": user_input}):
+                if not response:
+                    latency.record("first_token", time.perf_counter() - generation_started)
+                response += chunk
+                yield response
+            latency.record("generation", time.perf_counter() - generation_started)
+            latency.record("total", time.perf_counter() - started)
+            if answer_cache and response:
+                answer_cache.set(cache_key, response, time.perf_counter() - generation_started)
+
+            if next(request_counter) % STATS_EVERY == 0:
+                print(f"Stage latency: {get_latency_stats()}")
+                print(f"Context selection: {get_context_stats()}")
+                print(f"Answer cache: {get_answer_cache_stats()}")
+        except Exception as e:
+            yield str(e)
+
 
 # ================Create Gradio Interface===============
 # This interface allows users to interact with the HR assistant
 # Users can ask questions about HR policies and get answers based on the retrieved context
 # This will run as a web application and open in a browser
 #  ================End of Gradio Interface===============
-def chatbot(user_input):
-    try:
-        return qa_chain.invoke(user_input)
-    except Exception as e:
-        return str(e)
-
-demo = gr.Interface(
-    fn=chatbot, 
-    inputs=gr.Textbox(lines=3, label="Ask HR Assistant:", placeholder="Enter your HR question here..."), 
-    outputs=gr.Textbox(label="Response:", lines=12), 
-    title="AI powered HR Assistant",
-    description="Ask HR Assistant any question about HR policy"
-)
-
-demo.launch(share=True) # Share the interface with the world
-
-
-
+# Builds the web app; the index loads in the background while the UI is already serving
+def create_app(pdf_path=pdf_path, db_name=db_name, collection_name=collection_name):
+    assistant = HRAssistant(pdf_path, db_name, collection_name).start()
+
+    demo = gr.Interface(
+        fn=assistant.chatbot,
+        inputs=gr.Textbox(lines=3, label="Ask HR Assistant:", placeholder="Enter your HR question here..."),
+        outputs=gr.Textbox(label="Response:", lines=12),
+        title="AI powered HR Assistant",
+        description="Ask HR Assistant any question about HR policy"
+    )
+
+    # Requests are queued; up to GOPI_HR_CONCURRENCY of them run at once on the event loop
+    concurrency = int(os.getenv("GOPI_HR_CONCURRENCY", "16"))
+    queue_size = int(os.getenv("GOPI_HR_QUEUE_SIZE", "0")) or None # 0 = unbounded queue
+    demo.queue(default_concurrency_limit=concurrency, max_size=queue_size)
+    demo.assistant = assistant # Exposed for health checks and tests
+    return demo
+
+
+if __name__ == "__main__":
+    create_app().launch(share=True) # Share the interface with the world
@@ -0,0 +1,68 @@
+# ===============Persistent cache of resume analysis reports=================
+# Reports are keyed by (resume content hash, job description hash, model name)
+
+import os, sys, re, time, hashlib
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from global_util.response_cache import SQLiteCacheBackend, DEFAULT_CACHE_DIR
+
+# Reports older than this are re-generated (override with GOPI_ANALYSIS_CACHE_TTL_DAYS)
+DEFAULT_TTL = float(os.getenv("GOPI_ANALYSIS_CACHE_TTL_DAYS", "30")) * 24 * 3600
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+# Hash of a job description; whitespace-only edits map to the same hash
+def job_description_hash(job_desc):
+    normalized = _WHITESPACE.sub(" ", job_desc).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Analysis reports stored in SQLite with a TTL"""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self.backend = SQLiteCacheBackend(
+            path or os.path.join(DEFAULT_CACHE_DIR, "resume_analysis.sqlite"), table="resume_analysis"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(resume_hash, job_desc, model):
+        return f"{resume_hash}:{job_description_hash(job_desc)}:{model}"
+
+    # Returns the cached report for the pair, or None if missing or expired
+    def get(self, resume_hash, job_desc, model):
+        key = self.make_key(resume_hash, job_desc, model)
+        row = self.backend.get(key)
+        if row is not None and time.time() - row[1] <= self.ttl:
+            self.hits += 1
+            return row[0]
+        if row is not None:
+            self.backend.delete(key)
+        self.misses += 1
+        return None
+
+    def set(self, resume_hash, job_desc, model, report):
+        self.backend.set(self.make_key(resume_hash, job_desc, model), report)
+
+    # Drops one cached report, or every report of a resume when job_desc is None
+    def invalidate(self, resume_hash, job_desc=None, model=None):
+        if job_desc is None:
+            return self.backend.delete_prefix(f"{resume_hash}:")
+        if model is None:
+            return self.backend.delete_prefix(f"{resume_hash}:{job_description_hash(job_desc)}:")
+        self.backend.delete(self.make_key(resume_hash, job_desc, model))
+        return 1
+
+    # Removes expired reports from disk
+    def purge_expired(self):
+        return self.backend.purge_expired(self.ttl)
+
+    def clear(self):
+        self.backend.clear()
@@ -7,7 +7,7 @@ if not os.path.exists(RESUMES_DIR):
     os.makedirs(RESUMES_DIR)
 
 # Import functions from resume_processor file
-from gopi_resume_processor import load_resumes, analyze_resume, store_in_chromadb, run_self_query, extract_candidate_details
+from gopi_resume_processor import load_resumes, analyze_resume_stream, store_in_chromadb, run_self_query, extract_candidate_details
 
 # ===============Streamlit UI Setup=================
 st.set_page_config(page_title="AI Resume Screener", page_icon="📄", layout="wide")
@@ -25,30 +25,33 @@ if st.button("Analyze & Store Resume") and uploaded_file and job_description:
     with open(file_path, "wb") as f:
         f.write(uploaded_file.getbuffer())
     
-    with st.spinner("Aanalyzing & Storing Resume..."):
+    with st.spinner("Loading Resume..."):
         docs = load_resumes([file_path]) # Parse resume using loader for RAG usage
-        report = analyze_resume(docs, job_description) # Analyze resume
+        candidate_details = extract_candidate_details(docs) # Local regex extraction, no LLM call
+
+    # Display candidate details
+    st.subheader("Candidate Details")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Name", candidate_details['name'])
+    with col2:
+        st.metric("Email", candidate_details['email'])
+    with col3:
+        st.metric("Location", candidate_details['location'])
+
+    # Stream the analysis report so the first tokens show up as soon as the LLM produces them
+    st.subheader("Analysis Report")
+    report = st.write_stream(analyze_resume_stream(docs, job_description))
+
+    with st.spinner("Storing Resume..."):
         chromadb, candidate_details = store_in_chromadb(docs) # Store in vector database
-        st.success("Resume analyzed and stored successfully!")
-
-        # Display candidate details
-        st.subheader("Candidate Details")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Name", candidate_details['name'])
-        with col2:
-            st.metric("Email", candidate_details['email'])
-        with col3:
-            st.metric("Location", candidate_details['location'])
-
-        st.subheader("Analysis Report")
-        st.write(report)
-        st.download_button("Download Report", report, file_name="analysis_report.txt")
+    st.success("Resume analyzed and stored successfully!")
+    st.download_button("Download Report", report, file_name="analysis_report.txt")
 
 st.divider()
 
 st.subheader("Ask Questions about Resumes")
-query = st.text_input("Type your smart query here (e.g., 'Python developer with AWS experience')")
+query = st.text_input("Type your smart query here (e.g., 'Python developer with AWS experience in Austin')")
 
 if st.button("Search Resume Query") and query:
     with st.spinner("Running smart query..."):
@@ -63,6 +66,7 @@ if st.button("Search Resume Query") and query:
                 st.markdown(f"**Email:** {metadata.get('email', 'Unknown')}")
                 st.markdown(f"**Location:** {metadata.get('location', 'Unknown')}")
                 st.markdown(f"**Chunk:** {metadata.get('chunk_index', 0) + 1}/{metadata.get('total_chunks', 1)}")
+                st.markdown(f"**Matching chunks for this candidate:** {metadata.get('matched_chunks', 1)}")
                 st.markdown("---")
                 st.write(res.page_content.strip())
         else:
@@ -0,0 +1,230 @@
+'''
+Bulk resume screening against one job description
+
+Pipeline (each stage runs concurrently, connected by bounded queues):
+1. Load    - resumes are parsed in worker processes (stream_resumes)
+2. Analyze - a pool of threads runs analyze_resume (LLM calls)
+3. Store   - a pool of threads runs store_in_chromadb (embedding calls)
+4. Write   - results are appended to a JSONL file as they complete
+
+The JSONL output doubles as the checkpoint: re-running the same command after a crash
+skips every (resume, job description) pair that already has a successful result.
+Pairs scored by earlier runs with a different output file (or by the Streamlit app)
+are served from the persistent analysis cache without an LLM call.
+
+Usage:
+    python batch_screening.py --resumes ../../Resumes --jd job_description.txt --output results.jsonl
+    python batch_screening.py --resumes ../../Resumes --jd "Python developer with AWS" --parquet results.parquet
+'''
+import os, sys, re, json, time, hashlib, argparse, threading, queue
+
+from gopi_resume_processor import analyze_resume, store_in_chromadb, extract_candidate_details, get_prompt_token_stats
+from resume_loader import find_resume_files, stream_resumes, ResumeLoadReport
+
+# Marks the end of a queue for the workers reading it
+_DONE = object()
+
+_MATCH_PERCENTAGE = re.compile(r'match percentage[^0-9]{0,40}(\d{1,3})\s*%', re.IGNORECASE)
+
+
+# sha256 of a text, used to key results by job description
+def _text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# sha256 of a file's bytes, used to key results by resume content
+def _file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Pulls the match percentage out of an analysis report, if the LLM stated one
+def parse_match_percentage(report):
+    match = _MATCH_PERCENTAGE.search(report or "")
+    return int(match.group(1)) if match else None
+
+
+# Reads the (resume hash, JD hash) pairs that already have successful results
+def load_checkpoint(output_path):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partially written last line from a crashed run
+            if record.get("status") == "ok":
+                done.add((record["resume_hash"], record["jd_hash"]))
+    return done
+
+
+def _worker(stage, in_queue, out_queue, handle):
+    while True:
+        item = in_queue.get()
+        if item is _DONE:
+            return
+        try:
+            handle(item)
+        except Exception as e:
+            item["status"] = "error"
+            item["error"] = f"{stage}: {e}"
+        out_queue.put(item)
+
+
+# Starts worker threads for one stage; once they all finish, closes the next queue
+def _start_stage(stage, count, in_queue, out_queue, next_count, handle):
+    threads = [
+        threading.Thread(target=_worker, args=(stage, in_queue, out_queue, handle), daemon=True)
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+
+    def close():
+        for thread in threads:
+            thread.join()
+        for _ in range(next_count):
+            out_queue.put(_DONE)
+
+    threading.Thread(target=close, daemon=True).start()
+
+
+def run_batch_screening(resumes_dir, job_description, output_path="results.jsonl", analysis_workers=8,
+                        store_workers=2, load_workers=None, queue_size=16, persist_directory="chroma_db"):
+    """
+    Screens every resume in resumes_dir against job_description.
+
+    Returns a summary dict with counts, errors, resumes/second and prompt token totals.
+    """
+    started = time.perf_counter()
+    jd_hash = _text_hash(job_description)
+    done = load_checkpoint(output_path)
+
+    # Skip resumes already scored against this job description
+    pending_files, hashes = [], {}
+    all_files = find_resume_files(resumes_dir)
+    for file_path in all_files:
+        hashes[file_path] = _file_hash(file_path)
+        if (hashes[file_path], jd_hash) not in done:
+            pending_files.append(file_path)
+    print(f"{len(all_files)} resumes found, {len(all_files) - len(pending_files)} already screened, "
+          f"{len(pending_files)} to process")
+
+    load_queue = queue.Queue(maxsize=queue_size)
+    store_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue(maxsize=queue_size)
+    load_report = ResumeLoadReport()
+    load_errors = [] # Set by the loader thread, re-raised once the results already loaded are written
+
+    def load():
+        try:
+            for file_path, docs in stream_resumes(pending_files, max_workers=load_workers, report=load_report):
+                load_queue.put({
+                    "file": file_path,
+                    "resume_hash": hashes[file_path],
+                    "jd_hash": jd_hash,
+                    "status": "ok",
+                    "docs": docs,
+                })
+        except BaseException as e:
+            load_errors.append(e)
+        finally:
+            for _ in range(analysis_workers):
+                load_queue.put(_DONE)
+
+    def analyze(item):
+        details = extract_candidate_details(item["docs"])
+        item["candidate"] = {key: details[key] for key in ("name", "email", "phone", "location")}
+        item["report"] = analyze_resume(item["docs"], job_description)
+        item["match_percentage"] = parse_match_percentage(item["report"])
+
+    def store(item):
+        if item["status"] == "ok":
+            store_in_chromadb(item["docs"], persist_directory=persist_directory)
+
+    threading.Thread(target=load, daemon=True).start()
+    _start_stage("analyze", analysis_workers, load_queue, store_queue, store_workers, analyze)
+    _start_stage("store", store_workers, store_queue, result_queue, 1, store)
+
+    summary = {"processed": 0, "ok": 0, "errors": 0}
+    with open(output_path, "a", encoding="utf-8") as out:
+        while True:
+            item = result_queue.get()
+            if item is _DONE:
+                break
+            item.pop("docs", None)
+            out.write(json.dumps(item) + "\n")
+            out.flush()
+            summary["processed"] += 1
+            summary["ok" if item["status"] == "ok" else "errors"] += 1
+
+        # Files that could not be loaded at all
+        for file_path, error in load_report.errors.items():
+            out.write(json.dumps({
+                "file": file_path,
+                "resume_hash": hashes[file_path],
+                "jd_hash": jd_hash,
+                "status": "error",
+                "error": f"load: {error}",
+            }) + "\n")
+            summary["errors"] += 1
+
+    # The loader itself failed (e.g. the worker pool broke): the run is incomplete
+    if load_errors:
+        raise load_errors[0]
+
+    seconds = time.perf_counter() - started
+    summary["skipped"] = len(all_files) - len(pending_files)
+    summary["seconds"] = seconds
+    summary["resumes_per_second"] = summary["processed"] / seconds if seconds else 0.0
+    summary["prompt_tokens"] = get_prompt_token_stats() # Resume tokens before/after condensation
+    return summary
+
+
+# Converts the JSONL results into a Parquet file (needs pandas and pyarrow)
+def export_parquet(jsonl_path, parquet_path):
+    import pandas as pd
+    frame = pd.read_json(jsonl_path, lines=True)
+    frame.to_parquet(parquet_path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen a folder of resumes against one job description")
+    parser.add_argument("--resumes", required=True, help="Directory with PDF/DOCX/TXT resumes")
+    parser.add_argument("--jd", required=True, help="Job description text, or path to a file containing it")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL results / checkpoint file")
+    parser.add_argument("--parquet", help="Also write the results to this Parquet file")
+    parser.add_argument("--analysis-workers", type=int, default=8, help="Concurrent LLM analysis calls")
+    parser.add_argument("--store-workers", type=int, default=2, help="Concurrent embedding/storage workers")
+    parser.add_argument("--load-workers", type=int, default=None, help="Resume parsing processes")
+    parser.add_argument("--queue-size", type=int, default=16, help="Capacity of each stage queue")
+    parser.add_argument("--persist-directory", default="chroma_db", help="ChromaDB directory")
+    args = parser.parse_args()
+
+    job_description = args.jd
+    if os.path.isfile(job_description):
+        with open(job_description, "r", encoding="utf-8") as f:
+            job_description = f.read()
+
+    summary = run_batch_screening(
+        args.resumes, job_description, args.output,
+        analysis_workers=args.analysis_workers,
+        store_workers=args.store_workers,
+        load_workers=args.load_workers,
+        queue_size=args.queue_size,
+        persist_directory=args.persist_directory,
+    )
+    print(json.dumps(summary, indent=2))
+
+    if args.parquet:
+        export_parquet(args.output, args.parquet)
+        print(f"Results written to {args.parquet}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# ===============Candidate detail extraction (name, email, phone, location)=================
+# Kept free of LLM/embedding setup so it can be imported and benchmarked on its own
+
+import re
+
+# Single scan for the rare "trigger" characters every detail starts from: a run of
+# phone-like characters, an '@' or a location keyword. Each alternative starts with
+# a small character set, so the regex engine skips ordinary text quickly; the exact
+# patterns below then only run on the few places the scan stops at.
+_TRIGGER_PATTERN = re.compile(
+    r'(?P<phone_run>[+(\d][\d\s().+-]{8,}\d)'
+    r'|(?P<at>@)'
+    r'|(?P<location_keyword>[Ll](?i:ocated in|ives in|ocation:)|[Bb](?i:ased in)|[Aa](?i:ddress:))'
+)
+
+# Email pattern, applied around an '@'
+_EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+_EMAIL_LOCAL_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._%+-")
+
+# Phone pattern (basic), applied inside a run of phone-like characters
+_PHONE_PATTERN = re.compile(r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+
+# Location value following a keyword (up to the end of the sentence or line)
+_LOCATION_VALUE_PATTERN = re.compile(r'[^.\n]+')
+
+# Location keywords in priority order: the first keyword found decides the location
+LOCATION_KEYWORDS = ('located in', 'based in', 'lives in', 'address:', 'location:')
+
+# Name: two capitalized words at the start of a line
+_NAME_PATTERN = re.compile(r'([A-Z][a-z]+\s+[A-Z][a-z]+)')
+
+# Number of lines at the top of the resume searched for the candidate name
+NAME_HEADER_LINES = 10
+
+
+class CandidateDetails:
+    """Extracted candidate details; supports dict-style access (details['name'])"""
+
+    __slots__ = ('name', 'email', 'phone', 'location', 'emails', 'phones', 'locations')
+
+    def __init__(self, name, emails, phones, locations):
+        self.name = name
+        self.emails = emails
+        self.phones = phones
+        self.locations = locations
+        self.email = emails[0] if emails else 'Unknown'
+        self.phone = phones[0] if phones else 'Unknown'
+        self.location = locations[0] if locations else 'Unknown'
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return f"CandidateDetails(name={self.name!r}, email={self.email!r}, phone={self.phone!r}, location={self.location!r})"
+
+
+# Extract candidate details from resume
+def extract_candidate_details(docs):
+    """Extract name, email, phone and location from resume text"""
+    full_text = "\n\n".join(doc.page_content for doc in docs)
+
+    emails, phones, locations = [], [], []
+    # A keyword inside the value of the same keyword is not a new match
+    location_end = dict.fromkeys(LOCATION_KEYWORDS, 0)
+    email_end = 0
+    pos = 0
+    while True:
+        match = _TRIGGER_PATTERN.search(full_text, pos)
+        if match is None:
+            break
+        kind = match.lastgroup
+        pos = match.end()
+
+        if kind == 'phone_run':
+            phones.extend(_PHONE_PATTERN.findall(full_text, match.start(), match.end()))
+        elif kind == 'at':
+            # Walk back over the local part, then match the whole address from there
+            start = match.start()
+            while start > email_end and full_text[start - 1] in _EMAIL_LOCAL_CHARS:
+                start -= 1
+            email = _EMAIL_PATTERN.search(full_text, start)
+            if email is not None and email.start() <= match.start() < email.end():
+                emails.append(email.group())
+                pos = email_end = email.end()
+        else:
+            # Keep scanning right after the keyword so details inside the value are still found
+            keyword = match.group().lower()
+            if match.start() < location_end[keyword]:
+                continue
+            value = _LOCATION_VALUE_PATTERN.match(full_text, match.end())
+            if value is not None:
+                locations.append((LOCATION_KEYWORDS.index(keyword), match.start(), value.group()))
+                location_end[keyword] = value.end()
+
+    locations = [value for _, _, value in sorted(locations)]
+
+    # Name extraction - only the header region of the resume is scanned
+    # This is a simplified approach - you might want to use NLP libraries for better accuracy
+    name = 'Unknown'
+    for line in full_text.split('\n', NAME_HEADER_LINES)[:NAME_HEADER_LINES]:
+        match = _NAME_PATTERN.match(line.strip())
+        if match:
+            name = match.group(1)
+            break
+
+    return CandidateDetails(name, emails, phones, locations)
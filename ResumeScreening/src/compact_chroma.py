@@ -0,0 +1,59 @@
+'''
+Removes duplicate resume chunks from the resume ChromaDB.
+
+Resumes uploaded before chunk IDs became deterministic were stored once per upload.
+Chunks with the same text and candidate details are duplicates; one copy is kept
+(preferring the one stored with a resume_hash ID) and the rest are deleted, from the
+vector store and from the BM25 keyword index kept next to it.
+
+Usage: python compact_chroma.py [persist_directory] [chroma|quantized]
+'''
+import os, sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from global_util.vector_store_registry import open_vector_store
+from global_util.keyword_index import get_keyword_index, keyword_index_dir
+
+
+def compact_chromadb(persist_directory="chroma_db", backend=None):
+    """Delete duplicate chunks from the resume store and return how many were removed"""
+    if not os.path.exists(persist_directory):
+        print(f"ChromaDB directory '{persist_directory}' does not exist.")
+        return 0
+
+    # No embedding needed: chunks are only read and deleted
+    vectorstore = open_vector_store(persist_directory, None, backend=backend)
+    stored = vectorstore.get(include=["documents", "metadatas"])
+
+    keep = {}
+    duplicates = []
+    for doc_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+        metadata = metadata or {}
+        key = (text, metadata.get("name"), metadata.get("email"), metadata.get("chunk_index"))
+        if key not in keep:
+            keep[key] = (doc_id, metadata)
+        elif "resume_hash" in metadata and "resume_hash" not in keep[key][1]:
+            # Prefer the copy with a deterministic ID so future uploads overwrite it
+            duplicates.append(keep[key][0])
+            keep[key] = (doc_id, metadata)
+        else:
+            duplicates.append(doc_id)
+
+    for start in range(0, len(duplicates), 500):
+        vectorstore.delete(ids=duplicates[start:start + 500])
+
+    # Deleted chunks must not come back as keyword hits
+    keyword_index = get_keyword_index(keyword_index_dir(persist_directory))
+    if duplicates and len(keyword_index):
+        keyword_index.remove(duplicates)
+        keyword_index.save()
+
+    print(f"Removed {len(duplicates)} duplicate chunks, {len(keep)} chunks remain in '{persist_directory}'.")
+    return len(duplicates)
+
+
+if __name__ == "__main__":
+    compact_chromadb(sys.argv[1] if len(sys.argv) > 1 else "chroma_db", sys.argv[2] if len(sys.argv) > 2 else None)
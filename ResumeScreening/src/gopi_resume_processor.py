@@ -1,110 +1,82 @@
 # ===============Create functions required to process resumes=================
 
-import os, sys
+import os, sys, time, hashlib, threading
 import dotenv
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 # Loaders & Splitters
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-# Vector store
-from langchain_chroma import Chroma
-
 # Add project root to Python path to find global_util
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from global_util.gopi_util import get_llm, get_embedding
+from global_util.gopi_util import get_llm, get_embedding, warm_up_query_cache, invoke_llm_with_retry
+from global_util.vector_store_registry import get_vector_store
+from global_util.keyword_index import get_keyword_index, keyword_index_dir
+from resume_loader import load_resume_file, stream_resumes
+from candidate_extractor import extract_candidate_details
+from analysis_cache import AnalysisCache
+from resume_condenser import condense_resume, DEFAULT_RESUME_TOKEN_BUDGET
+from resume_query import HybridResumeSearch, normalize_location, candidate_key, load_location_cities
 
 
 # Models
 # Embeddings: OpenAI Text Embedding
 #openai_embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key=api_key)
-openai_embedding = get_embedding()
+openai_embedding = get_embedding(cached=True) # Also caches query vectors for run_self_query
+warm_up_query_cache(openai_embedding) # Pre-embeds frequent past queries in the background
 
 # LLM
 #llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", api_key=api_key, temperature=0.3)
 #llm = ChatOpenAI(temperature=0.3, model="gpt-4o-mini", openai_api_key=api_key)
 llm = get_llm()
 
+# Cache of analysis reports keyed by (resume hash, job description hash, model)
+analysis_cache = AnalysisCache()
+
+# Running totals of resume prompt tokens before/after condensation
+# (updated from the batch screening analysis threads, hence the lock)
+prompt_token_stats = {"prompts": 0, "tokens_before": 0, "tokens_after": 0}
+_prompt_token_stats_lock = threading.Lock()
+
+# Cities stored per resume collection, so a bare "in Austin" in a query is read as a location.
+# Reloaded after KNOWN_CITIES_TTL seconds to pick up resumes stored by other processes
+KNOWN_CITIES_TTL = 300
+_known_cities = {}
+_known_cities_lock = threading.Lock()
+
 
 # Functions
 # Load resumes in different formats
-def load_resumes(file_paths):
+# parallel=True parses files in worker processes; failed files are recorded in report.errors
+# (a ResumeLoadReport) instead of raising, and report also tracks files/second
+def load_resumes(file_paths, parallel=False, max_workers=None, report=None):
     documents = []
+    if parallel:
+        for file_path, file_docs in stream_resumes(file_paths, max_workers=max_workers, report=report):
+            documents.extend(file_docs)
+        return documents
+
     for file_path in file_paths:
-        if file_path.endswith('.pdf'):
-            loader = PyPDFLoader(file_path)
-        elif file_path.endswith('.docx'):
-            loader = Docx2txtLoader(file_path)
-        elif file_path.endswith('.txt'):
-            loader = TextLoader(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {file_path}")
-        
         # Loader.load() function parses PDF/DOCX/Text files by extracting text content and metadata on a page-by-page basis. 
         # It then converts each page into a distinct Document object containing the text content and metadata (like page numbers and file names), 
         # Making it ideal for RAG systems requiring precise citations. 
-        documents.extend(loader.load())
+        documents.extend(load_resume_file(file_path))
 
     return documents
 
 
-# Extract candidate details from resume
-def extract_candidate_details(docs):
-    """Extract name, email, location from resume text"""
-    full_text = ""
-    for doc in docs:
-        full_text += doc.page_content + "\n\n"
-    
-    # Simple regex patterns for extraction
-    import re
-    
-    # Email pattern
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, full_text)
-    
-    # Phone pattern (basic)
-    phone_pattern = r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-    phones = re.findall(phone_pattern, full_text)
-    
-    # Location pattern (basic - look for city, state, country)
-    location_keywords = ['located in', 'based in', 'lives in', 'address:', 'location:']
-    locations = []
-    for keyword in location_keywords:
-        pattern = f'{keyword}([^.\n]+)'
-        matches = re.findall(pattern, full_text, re.IGNORECASE)
-        locations.extend(matches)
-    
-    # Name extraction - look for common patterns
-    # This is a simplified approach - you might want to use NLP libraries for better accuracy
-    name_pattern = r'^([A-Z][a-z]+\s+[A-Z][a-z]+)'
-    names = []
-    lines = full_text.split('\n')
-    for line in lines[:10]:  # Check first 10 lines for name
-        match = re.match(name_pattern, line.strip())
-        if match:
-            names.append(match.group(1))
-    
-    return {
-        'name': names[0] if names else 'Unknown',
-        'email': emails[0] if emails else 'Unknown',
-        'phone': phones[0] if phones else 'Unknown',
-        'location': locations[0] if locations else 'Unknown',
-        'emails': emails,
-        'phones': phones,
-        'locations': locations
-    }
-
-
-# Analyze the resume using Gemini
-def analyze_resume(docs, job_desc):
-    # Combine all resume content for single analysis
-    full_resume_text = ""
-    for doc in docs:
-        full_resume_text += doc.page_content + "\n\n"
+# Build the resume vs job description comparison prompt
+# The resume is condensed to token_budget tokens (boilerplate removed, most JD-relevant chunks kept)
+def build_analysis_prompt(docs, job_desc, token_budget=DEFAULT_RESUME_TOKEN_BUDGET):
+    condensed = condense_resume(docs, job_desc, openai_embedding, token_budget=token_budget, model=llm.model_name)
+    with _prompt_token_stats_lock:
+        prompt_token_stats["prompts"] += 1
+        prompt_token_stats["tokens_before"] += condensed.tokens_before
+        prompt_token_stats["tokens_after"] += condensed.tokens_after
+    full_resume_text = condensed.text
     
     prompt = f"""
     Compare the resume with the job description and provide the following information:
@@ -121,7 +93,29 @@ def analyze_resume(docs, job_desc):
     Resume:
     {full_resume_text}
     """
-    response = llm.invoke(prompt)
+    return prompt
+
+
+# Returns resume prompt token totals before/after condensation and the tokens saved
+def get_prompt_token_stats():
+    with _prompt_token_stats_lock:
+        stats = dict(prompt_token_stats)
+    stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+    return stats
+
+
+# Analyze the resume using Gemini
+# Reports are cached per (resume content, job description, model); use_cache=False forces a new analysis
+# The LLM call goes through the shared retry policy (backoff, deadline, circuit breaker)
+def analyze_resume(docs, job_desc, use_cache=True):
+    resume_hash = get_resume_hash(docs)
+    if use_cache:
+        cached_report = analysis_cache.get(resume_hash, job_desc, llm.model_name)
+        if cached_report is not None:
+            return cached_report
+
+    prompt = build_analysis_prompt(docs, job_desc)
+    response = invoke_llm_with_retry(prompt, temperature=llm.temperature, model=llm.model_name)
 
     # Check if the response has a content attribute (common in LangChain)
     if hasattr(response, 'content'):
@@ -129,44 +123,114 @@ def analyze_resume(docs, job_desc):
     else:
         content = str(response)
 
+    analysis_cache.set(resume_hash, job_desc, llm.model_name, content)
     return content
 
 
-# Store text chunks into ChromaDB (embeddings now use OpenAI)
-def store_in_chromadb(docs, persist_directory="chroma_db"):
+# Analyze the resume and yield the report text chunk by chunk as the LLM produces it
+# A cached report is yielded at once
+def analyze_resume_stream(docs, job_desc, use_cache=True):
+    resume_hash = get_resume_hash(docs)
+    if use_cache:
+        cached_report = analysis_cache.get(resume_hash, job_desc, llm.model_name)
+        if cached_report is not None:
+            yield cached_report
+            return
+
+    prompt = build_analysis_prompt(docs, job_desc)
+    chunks = []
+    for chunk in llm.stream(prompt):
+        content = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+        if content:
+            chunks.append(content)
+            yield content
+
+    analysis_cache.set(resume_hash, job_desc, llm.model_name, "".join(chunks))
+
+
+# Content hash of a resume, used to derive stable chunk IDs
+def get_resume_hash(docs):
+    full_text = "\n\n".join(doc.page_content for doc in docs)
+    return hashlib.sha256(full_text.encode("utf-8")).hexdigest()
+
+
+# Store text chunks into ChromaDB (embeddings now use OpenAI); backend="quantized" uses the int8 store
+# Chunk IDs are derived from (resume hash, chunk index), so re-uploading the same resume
+# overwrites its existing vectors instead of adding duplicates
+def store_in_chromadb(docs, persist_directory="chroma_db", backend=None):
     # Extract candidate details
     candidate_details = extract_candidate_details(docs)
+    resume_hash = get_resume_hash(docs)
     
     # Split documents into chunks for storage
     splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
     chunks = splitter.split_documents(docs)
     
     texts = [chunk.page_content for chunk in chunks]
+    ids = [f"{resume_hash}-{i}" for i in range(len(chunks))]
     
     # Create metadata with candidate details for each chunk
     metadatas = []
     for i, chunk in enumerate(chunks):
         metadata = {
             "source": f"resume_chunk_{i}",
+            "resume_hash": resume_hash,
             "name": candidate_details['name'],
             "email": candidate_details['email'],
             "phone": candidate_details['phone'],
             "location": candidate_details['location'],
+            "location_city": normalize_location(candidate_details['location']), # Exact-match filter key
             "chunk_index": i,
             "total_chunks": len(chunks)
         }
+        metadata["candidate_key"] = candidate_key(metadata)
         metadatas.append(metadata)
 
-    chromadb = Chroma.from_texts(texts=texts, embedding=openai_embedding, metadatas=metadatas, persist_directory=persist_directory)
+    # Shared handle: searches see the new chunks, and concurrent callers (batch screening)
+    # never race to open the same persist directory
+    chromadb = get_vector_store(persist_directory, openai_embedding, backend=backend)
+    chromadb.add_texts(texts=texts, metadatas=metadatas, ids=ids) # add_texts upserts by id
+
+    # Keep the BM25 keyword index in step with the collection
+    keyword_index = get_resume_keyword_index(persist_directory)
+    if not len(keyword_index):
+        keyword_index.sync_with(chromadb) # First use: index resumes stored before it existed
+    else:
+        keyword_index.add_many(ids, texts)
+        keyword_index.save()
     # Note: persist() is deprecated in Chroma 0.4+, docs are automatically persisted
+    with _known_cities_lock:
+        entry = _known_cities.get((os.path.abspath(persist_directory), backend))
+        if entry is not None and metadatas and metadatas[0]["location_city"] != "unknown":
+            entry[1].add(metadatas[0]["location_city"])
     return chromadb, candidate_details
 
 
-# Use basic similarity search to fetch relevant chunks
-def run_self_query(query, persist_directory="chroma_db"):
-    vectorstore = Chroma(persist_directory=persist_directory, embedding_function=openai_embedding)
-    
-    # Use similarity search instead of SelfQueryRetriever
-    results = vectorstore.similarity_search(query, k=5)
+# Normalized cities of the stored resumes (loaded once, then refreshed every KNOWN_CITIES_TTL seconds)
+def get_known_cities(persist_directory="chroma_db", backend=None):
+    key = (os.path.abspath(persist_directory), backend)
+    with _known_cities_lock:
+        entry = _known_cities.get(key)
+        if entry is None or time.time() - entry[0] > KNOWN_CITIES_TTL:
+            vectorstore = get_vector_store(persist_directory, openai_embedding, backend=backend)
+            entry = (time.time(), load_location_cities(vectorstore))
+            _known_cities[key] = entry
+        return entry[1]
+
+
+# Persisted BM25 index of the stored resume chunks (memory-mapped, loaded once per process)
+def get_resume_keyword_index(persist_directory="chroma_db"):
+    return get_keyword_index(keyword_index_dir(persist_directory))
+
+
+# Hybrid search: location/email/name constraints in the query are pushed down as metadata
+# filters, vector and keyword (BM25) rankings are fused, and the k results are k distinct candidates.
+# A query whose constraints match no stored resume returns no results
+# The vector store handle is opened once per process and shared with store_in_chromadb
+def run_self_query(query, persist_directory="chroma_db", k=5, backend=None):
+    vectorstore = get_vector_store(persist_directory, openai_embedding, backend=backend)
+    keyword_index = get_resume_keyword_index(persist_directory)
+    known_cities = get_known_cities(persist_directory, backend)
+    results = HybridResumeSearch(vectorstore, keyword_index=keyword_index, known_cities=known_cities).search(query, k=k)
     
-    return results
\ No newline at end of file
+    return results
@@ -0,0 +1,129 @@
+# ===============Token-aware resume condensation before analysis=================
+# Removes boilerplate and, when the resume is over the token budget, keeps only the
+# chunks most relevant to the job description
+
+import os, sys, re
+from collections import Counter
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from global_util.tokens import count_tokens
+
+# Maximum resume tokens sent to the LLM (override with GOPI_RESUME_TOKEN_BUDGET)
+DEFAULT_RESUME_TOKEN_BUDGET = int(os.getenv("GOPI_RESUME_TOKEN_BUDGET", "3000"))
+
+# Page numbers such as "3", "Page 3", "Page 3 of 5", "3/5" (only checked on a page's first/last line)
+_PAGE_NUMBER = re.compile(r'^\s*(page\s*)?\d+(\s*(of|/)\s*\d+)?\s*$', re.IGNORECASE)
+# Years ("2019") on their own line are resume content, never page numbers
+_YEAR = re.compile(r'^\s*(19|20)\d{2}\s*$')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+_SPACES = re.compile(r'[ \t]+')
+
+# Lines longer than this are content, never a running header/footer
+_MAX_HEADER_LINE_LENGTH = 100
+# Running headers/footers are looked for in this many lines at the top and bottom of a page
+_HEADER_FOOTER_LINES = 2
+# Fewer pages than this are too few to tell a running header from repeated content
+_MIN_PAGES_FOR_HEADERS = 3
+
+
+class CondensedResume:
+    """Resume text prepared for the prompt, with token counts before and after"""
+
+    __slots__ = ('text', 'tokens_before', 'tokens_after', 'chunks_kept', 'chunks_total')
+
+    def __init__(self, text, tokens_before, tokens_after, chunks_kept=0, chunks_total=0):
+        self.text = text
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        self.chunks_kept = chunks_kept
+        self.chunks_total = chunks_total
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_before - self.tokens_after
+
+    def __repr__(self):
+        return (f"CondensedResume(tokens_before={self.tokens_before}, tokens_after={self.tokens_after}, "
+                f"chunks_kept={self.chunks_kept}/{self.chunks_total})")
+
+
+# Positions of the first and last _HEADER_FOOTER_LINES non-empty lines of a page
+def _edge_positions(lines, count=_HEADER_FOOTER_LINES):
+    filled = [i for i, line in enumerate(lines) if line]
+    return set(filled[:count] + filled[-count:])
+
+
+def _is_page_number(line):
+    return bool(_PAGE_NUMBER.match(line)) and not _YEAR.match(line)
+
+
+# Strips page numbers, headers/footers repeated across pages and extra whitespace.
+# Only the top and bottom lines of a page are candidates, so content lines in the body
+# ("2019", "Skills", "Python") are never removed
+def remove_boilerplate(pages):
+    page_lines = [[line.strip() for line in page.splitlines()] for page in pages]
+    edges = [_edge_positions(lines) for lines in page_lines]
+
+    # A short edge line that appears on at least half of the pages (3 or more) is a running header/footer
+    repeated = set()
+    if len(pages) >= _MIN_PAGES_FOR_HEADERS:
+        counts = Counter(line for lines, positions in zip(page_lines, edges)
+                         for line in {lines[i] for i in positions}
+                         if len(line) <= _MAX_HEADER_LINE_LENGTH)
+        repeated = {line for line, count in counts.items() if count >= max(2, len(pages) / 2)}
+
+    # Page numbers are only stripped from a page's first or last non-empty line
+    first_last = [{min(positions), max(positions)} if positions else set() for positions in edges]
+
+    # Repeats are dropped from later pages only, so the first page keeps e.g. the candidate name
+    cleaned = []
+    for page_index, lines in enumerate(page_lines):
+        kept = [line for i, line in enumerate(lines)
+                if not (i in edges[page_index] and page_index > 0 and line in repeated)
+                and not (i in first_last[page_index] and _is_page_number(line))]
+        text = _SPACES.sub(" ", "\n".join(kept))
+        cleaned.append(_BLANK_LINES.sub("\n\n", text).strip())
+    return [page for page in cleaned if page]
+
+
+# Prepares resume text for the analysis prompt within token_budget
+def condense_resume(docs, job_desc, embedding, token_budget=DEFAULT_RESUME_TOKEN_BUDGET, model="gpt-3.5-turbo"):
+    original = "\n\n".join(doc.page_content for doc in docs)
+    tokens_before = count_tokens(original, model)
+
+    text = "\n\n".join(remove_boilerplate([doc.page_content for doc in docs]))
+    tokens = count_tokens(text, model)
+    if tokens <= token_budget:
+        return CondensedResume(text, tokens_before, tokens)
+
+    # Over budget: rank chunks by similarity to the job description
+    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=0)
+    chunks = splitter.split_text(text)
+    # The job description is embedded as a document, not a query: it stays out of the query log
+    # (and its warm-up), and the document cache reuses its vector for every resume screened against it
+    vectors = np.asarray(embedding.embed_documents(chunks + [job_desc]), dtype=np.float32)
+    chunk_vectors, jd_vector = vectors[:-1], vectors[-1]
+    norms = np.linalg.norm(chunk_vectors, axis=1) * (np.linalg.norm(jd_vector) or 1.0)
+    scores = chunk_vectors @ jd_vector / np.where(norms == 0, 1.0, norms)
+
+    # The first chunk holds the contact header, so it is always kept
+    chunk_tokens = [count_tokens(chunk, model) for chunk in chunks]
+    selected = {0}
+    used = chunk_tokens[0]
+    for index in np.argsort(-scores):
+        index = int(index)
+        if index in selected:
+            continue
+        if used + chunk_tokens[index] <= token_budget:
+            selected.add(index)
+            used += chunk_tokens[index]
+
+    # Keep the original order so the resume still reads top to bottom
+    condensed = "\n\n".join(chunks[index] for index in sorted(selected))
+    return CondensedResume(condensed, tokens_before, count_tokens(condensed, model), len(selected), len(chunks))
@@ -0,0 +1,88 @@
+# ===============Parallel loading of resume files=================
+# Kept free of LLM/embedding setup so worker processes import it cheaply
+
+import os, time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
+
+# Loader class per supported file extension
+RESUME_LOADERS = {
+    '.pdf': PyPDFLoader,
+    '.docx': Docx2txtLoader,
+    '.txt': TextLoader,
+}
+
+
+# Load one resume file into page-level Documents
+def load_resume_file(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    loader_class = RESUME_LOADERS.get(extension)
+    if loader_class is None:
+        raise ValueError(f"Unsupported file format: {file_path}")
+    return loader_class(file_path).load()
+
+
+# List supported resume files in a directory (sorted, non-recursive)
+def find_resume_files(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in RESUME_LOADERS
+    )
+
+
+class ResumeLoadReport:
+    """Per-run loading statistics: files loaded, per-file errors and throughput"""
+
+    def __init__(self):
+        self.files_loaded = 0
+        self.errors = {}
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    @property
+    def files_per_second(self):
+        return self.files_loaded / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return (f"ResumeLoadReport(files_loaded={self.files_loaded}, errors={len(self.errors)}, "
+                f"files_per_second={self.files_per_second:.1f})")
+
+
+# Load resumes in worker processes and yield (file_path, documents) as each file finishes
+# Failures are collected in report.errors instead of stopping the whole run
+def stream_resumes(file_paths, max_workers=None, report=None):
+    report = report if report is not None else ResumeLoadReport()
+    max_workers = max_workers or os.cpu_count() or 1
+    paths = iter(file_paths)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        # Keep a bounded number of files in flight so memory stays flat on large folders
+        def submit_next():
+            file_path = next(paths, None)
+            if file_path is None:
+                return False
+            pending[executor.submit(load_resume_file, file_path)] = file_path
+            return True
+
+        for _ in range(max_workers * 2):
+            if not submit_next():
+                break
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                file_path = pending.pop(future)
+                submit_next()
+                try:
+                    documents = future.result()
+                except Exception as e:
+                    report.errors[file_path] = str(e)
+                    continue
+                report.files_loaded += 1
+                report.seconds = time.perf_counter() - report.started
+                yield file_path, documents
+
+    report.seconds = time.perf_counter() - report.started
@@ -0,0 +1,205 @@
+# ===============Metadata-filtered hybrid search over stored resumes=================
+# Structured constraints in the query (location, email, name) become Chroma `where`
+# filters; vector and BM25 keyword rankings are fused and results are grouped so
+# top-k means k distinct candidates
+
+import os, sys, re
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from global_util.bm25 import BM25Index, reciprocal_rank_fusion
+from global_util.keyword_index import documents_by_id
+
+_EMAIL = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}')
+# Explicit location phrases always become a filter
+_LOCATION = re.compile(r'\b(?:located in|based in|lives in|living in)\s+([A-Z][A-Za-z]+(?:[ -][A-Z][A-Za-z]+)*)')
+# A bare "in"/"from" is only a location when the city is known ("in Kubernetes" is a skill)
+_BARE_LOCATION = re.compile(r'\b(?:from|in)\s+([A-Z][A-Za-z]+(?:[ -][A-Z][A-Za-z]+)*)')
+_NAME = re.compile(r'\b(?:named|called|name:?)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+_SPACES = re.compile(r'\s+')
+
+
+# Normalized city used for exact-match location filters ("Austin, TX" -> "austin")
+def normalize_location(location):
+    if not location or location == 'Unknown':
+        return 'unknown'
+    return location.split(',')[0].strip().lower()
+
+
+# Key that identifies one candidate across chunks (and re-uploads of their resume)
+def candidate_key(metadata):
+    email = metadata.get('email')
+    if email and email != 'Unknown':
+        return email.lower()
+    return metadata.get('resume_hash') or metadata.get('name', 'Unknown')
+
+
+class ParsedQuery:
+    """
+    Metadata constraints found in a query. text is the query without the
+    constraint phrases, used for ranking once the filters matched; query is
+    the original text, used when they did not.
+    """
+
+    __slots__ = ('text', 'filters', 'query')
+
+    def __init__(self, text, filters, query=None):
+        self.text = text
+        self.filters = filters
+        self.query = query if query is not None else text
+
+    def __repr__(self):
+        return f"ParsedQuery(text={self.text!r}, filters={self.filters!r})"
+
+
+# Finds a location phrase: explicit ones always, bare "in"/"from" only for a city in known_cities
+def _find_location(text, known_cities):
+    location = _LOCATION.search(text)
+    if location:
+        return location
+    for match in _BARE_LOCATION.finditer(text):
+        if normalize_location(match.group(1)) in known_cities:
+            return match
+    return None
+
+
+# Extracts location/email/name constraints; the remaining text is used for ranking
+# known_cities (normalized location_city values in the collection) enables bare "in Austin"
+def parse_resume_query(query, known_cities=()):
+    filters = {}
+    text = query
+
+    email = _EMAIL.search(text)
+    if email:
+        filters['email'] = email.group()
+        text = text.replace(email.group(), ' ')
+
+    name = _NAME.search(text)
+    if name:
+        filters['name'] = name.group(1)
+        text = text.replace(name.group(), ' ')
+
+    location = _find_location(text, known_cities)
+    if location:
+        filters['location_city'] = normalize_location(location.group(1))
+        text = text.replace(location.group(), ' ')
+
+    text = _SPACES.sub(' ', text).strip()
+    return ParsedQuery(text or query, filters, query)
+
+
+# Distinct normalized cities of the stored chunks, read page by page
+def load_location_cities(vectorstore, page_size=5000):
+    cities, offset = set(), 0
+    while True:
+        page = vectorstore.get(include=['metadatas'], limit=page_size, offset=offset)
+        for metadata in page['metadatas']:
+            city = (metadata or {}).get('location_city')
+            if city and city != 'unknown':
+                cities.add(city)
+        if len(page['ids']) < page_size:
+            return cities
+        offset += page_size
+
+
+# Chroma `where` clause for the given equality filters (None when there are none)
+def build_where(filters):
+    conditions = [{key: {'$eq': value}} for key, value in filters.items()]
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {'$and': conditions}
+
+
+class HybridResumeSearch:
+    """
+    Hybrid search over a resume vector store.
+
+    Filters are pushed down into the vector query, so only matching chunks
+    are fetched. The fetched chunks are ranked by vector distance and by
+    BM25, fused with reciprocal rank fusion, then grouped per candidate.
+    k * fetch_multiplier chunks are fetched first, doubled while they cover
+    fewer than k candidates.
+
+    With a persisted keyword_index, BM25 uses collection-wide statistics and
+    exact-term hits the vector search missed (skill acronyms, emails) are
+    fetched from the store and take part in the fusion.
+
+    When no chunk matches the filters, search returns no results; with
+    relax_filters=True it ranks the whole collection on the original query
+    instead and marks the results with metadata['filters_relaxed'].
+    """
+
+    def __init__(self, vectorstore, fetch_multiplier=4, keyword_index=None, known_cities=(), relax_filters=False):
+        self.vectorstore = vectorstore
+        self.fetch_multiplier = fetch_multiplier
+        self.keyword_index = keyword_index
+        self.known_cities = known_cities
+        self.relax_filters = relax_filters
+
+    # Returns ([(Document, vector distance)], where clause used, ranking text) for the query
+    def _vector_search(self, parsed, fetch_k):
+        where = build_where(parsed.filters)
+        results = self.vectorstore.similarity_search_with_score(parsed.text, k=fetch_k, filter=where)
+        if not results and where is not None and self.relax_filters:
+            # No chunk carries the constraint: rank everything on the query as typed
+            return self.vectorstore.similarity_search_with_score(parsed.query, k=fetch_k), None, parsed.query
+        return results, where, parsed.text
+
+    # Adds lexical hits from the persisted index that the vector search did not return
+    def _add_keyword_hits(self, text, docs_by_id, fetch_k, where):
+        hits = self.keyword_index.search(text, k=fetch_k)
+        missing = [doc_id for doc_id, _ in hits if doc_id not in docs_by_id]
+        for doc in documents_by_id(self.vectorstore, missing, where=where):
+            docs_by_id[doc.id] = doc
+
+    # Keyword ranking of the fetched chunks (best first)
+    def _keyword_ranking(self, text, docs_by_id):
+        if self.keyword_index is not None and len(self.keyword_index):
+            ranking = self.keyword_index.search(text, k=len(docs_by_id), candidate_ids=set(docs_by_id))
+            return [doc_id for doc_id, _ in ranking]
+        index = BM25Index()
+        for doc_id, doc in docs_by_id.items():
+            index.add(doc_id, doc.page_content)
+        return [doc_id for doc_id, _ in index.search(text, k=len(docs_by_id))]
+
+    def search(self, query, k=5):
+        parsed = parse_resume_query(query, self.known_cities)
+        fetch_k = k * self.fetch_multiplier
+        while True:
+            results, where, text = self._vector_search(parsed, fetch_k)
+            # Chunks can cluster on a few resumes: fetch more until k candidates are found
+            # or the (filtered) collection has no more chunks
+            if len(results) < fetch_k or len({candidate_key(doc.metadata) for doc, _ in results}) >= k:
+                break
+            fetch_k *= 2
+        if not results:
+            return []
+        relaxed = bool(parsed.filters) and where is None
+
+        docs_by_id = {}
+        for position, (doc, _) in enumerate(results):
+            docs_by_id[doc.id or str(position)] = doc
+        vector_ranking = list(docs_by_id)
+        if self.keyword_index is not None and len(self.keyword_index):
+            self._add_keyword_hits(text, docs_by_id, fetch_k, where)
+        keyword_ranking = self._keyword_ranking(text, docs_by_id)
+
+        # Best chunk per candidate, candidates ordered by their best fused score
+        grouped = {}
+        for doc_id, score in reciprocal_rank_fusion([vector_ranking, keyword_ranking]):
+            doc = docs_by_id[doc_id]
+            key = candidate_key(doc.metadata)
+            if key in grouped:
+                grouped[key].metadata['matched_chunks'] += 1
+                continue
+            doc.metadata['hybrid_score'] = score
+            doc.metadata['matched_chunks'] = 1
+            if relaxed:
+                doc.metadata['filters_relaxed'] = True
+            grouped[key] = doc
+
+        return list(grouped.values())[:k]
@@ -0,0 +1,78 @@
+"""
+Unit Tests for the resume analysis cache
+Tests report keys, expiry and per-resume invalidation
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analysis_cache import AnalysisCache, job_description_hash
+
+JD = "Senior Python developer\nDjango, PostgreSQL"
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Test caching of analysis reports by resume, job description and model"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="analysis_cache_test_")
+        self.path = os.path.join(self.directory, "analysis.sqlite")
+        self.cache = AnalysisCache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_round_trip_and_persistence(self):
+        """Test that a report is found again, also by a new cache on the same file"""
+        self.assertIsNone(self.cache.get("resume1", JD, "gpt-4o-mini"))
+        self.cache.set("resume1", JD, "gpt-4o-mini", "Score: 8/10")
+        self.assertEqual(self.cache.get("resume1", JD, "gpt-4o-mini"), "Score: 8/10")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(AnalysisCache(self.path).get("resume1", JD, "gpt-4o-mini"), "Score: 8/10")
+
+    def test_job_description_whitespace(self):
+        """Test that whitespace-only edits of the job description reuse the report, other edits do not"""
+        self.assertEqual(job_description_hash(JD), job_description_hash("  Senior Python   developer Django,\tPostgreSQL "))
+        self.cache.set("resume1", JD, "gpt-4o-mini", "report")
+        self.assertEqual(self.cache.get("resume1", JD.replace("\n", "  "), "gpt-4o-mini"), "report")
+        self.assertIsNone(self.cache.get("resume1", JD + ", AWS", "gpt-4o-mini"))
+        self.assertIsNone(self.cache.get("resume1", JD, "gpt-4o"))
+
+    def test_expired_reports_are_regenerated(self):
+        """Test that reports older than the TTL are missed and removed"""
+        cache = AnalysisCache(self.path, ttl=0.01)
+        cache.set("resume1", JD, "gpt-4o-mini", "report")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("resume1", JD, "gpt-4o-mini"))
+        self.assertIsNone(cache.backend.get(cache.make_key("resume1", JD, "gpt-4o-mini")))
+
+    def test_invalidate(self):
+        """Test invalidating one report, one job description or every report of a resume"""
+        for model in ("gpt-4o-mini", "gpt-4o"):
+            self.cache.set("resume1", JD, model, "report")
+            self.cache.set("resume1", "Java engineer", model, "report")
+        self.cache.set("resume10", JD, "gpt-4o", "report") # Shares a prefix with resume1 but not the key
+
+        self.assertEqual(self.cache.invalidate("resume1", JD, "gpt-4o"), 1)
+        self.assertIsNone(self.cache.get("resume1", JD, "gpt-4o"))
+        self.assertEqual(self.cache.invalidate("resume1", "Java engineer"), 2)
+        self.assertEqual(self.cache.invalidate("resume1"), 1)
+        self.assertEqual(self.cache.get("resume10", JD, "gpt-4o"), "report")
+
+    def test_keys_with_like_wildcards(self):
+        """Test that % and _ in a resume hash are matched literally by invalidate"""
+        self.cache.set("a_b", JD, "gpt-4o", "report")
+        self.cache.set("axb", JD, "gpt-4o", "report")
+        self.assertEqual(self.cache.invalidate("a_b"), 1)
+        self.assertEqual(self.cache.get("axb", JD, "gpt-4o"), "report")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
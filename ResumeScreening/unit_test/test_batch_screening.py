@@ -0,0 +1,174 @@
+"""
+Unit Tests for bulk resume screening
+Tests the pipeline output, checkpoint resume, per-stage errors, loader failures and retried analysis calls
+"""
+
+import sys
+import os
+import json
+import types
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add src (and the project root for global_util) to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from candidate_extractor import extract_candidate_details
+
+# gopi_resume_processor sets up the LLM and embeddings at import; batch screening is tested
+# against stand-ins for its analysis and storage functions
+processor = types.ModuleType("gopi_resume_processor")
+processor.extract_candidate_details = extract_candidate_details
+processor.get_prompt_token_stats = lambda: {"tokens_before": 0, "tokens_after": 0, "tokens_saved": 0}
+processor.analyze_resume = None
+processor.store_in_chromadb = None
+sys.modules["gopi_resume_processor"] = processor
+try:
+    import batch_screening
+finally:
+    del sys.modules["gopi_resume_processor"]
+
+from global_util import gopi_util
+from global_util.retry import RetryPolicy
+
+
+class APIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class TestBatchScreening(unittest.TestCase):
+    """Test run_batch_screening end to end with stand-in LLM and storage calls"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="batch_screening_test_")
+        self.resumes = os.path.join(self.directory, "resumes")
+        os.makedirs(self.resumes)
+        for i in range(5):
+            with open(os.path.join(self.resumes, f"candidate{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(f"Jane Doe{i}\njane{i}@example.com\nPython developer number {i}")
+        self.output = os.path.join(self.directory, "results.jsonl")
+        self.analyzed = []
+        self.stored = []
+        self._lock = threading.Lock()
+        patcher = patch.multiple(batch_screening, analyze_resume=self.analyze, store_in_chromadb=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def analyze(self, docs, job_desc):
+        with self._lock:
+            self.analyzed.append(docs[0].page_content)
+        if "number 3" in docs[0].page_content:
+            raise RuntimeError("LLM unavailable")
+        return "Match Percentage: 85%"
+
+    def store(self, docs, persist_directory=None):
+        with self._lock:
+            self.stored.append(docs[0].page_content)
+
+    def run_screening(self):
+        return batch_screening.run_batch_screening(self.resumes, "Python developer", self.output,
+                                                   analysis_workers=2, store_workers=1, load_workers=2)
+
+    def read_results(self):
+        with open(self.output, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_results_and_stage_errors(self):
+        """Test that every resume gets a result line and analysis errors are recorded, not raised"""
+        summary = self.run_screening()
+        self.assertEqual((summary["processed"], summary["ok"], summary["errors"]), (5, 4, 1))
+        results = {os.path.basename(record["file"]): record for record in self.read_results()}
+        self.assertEqual(results["candidate0.txt"]["match_percentage"], 85)
+        self.assertEqual(results["candidate0.txt"]["candidate"]["email"], "jane0@example.com")
+        self.assertEqual(results["candidate3.txt"]["status"], "error")
+        self.assertIn("analyze: LLM unavailable", results["candidate3.txt"]["error"])
+        self.assertEqual(len(self.stored), 4) # Failed analyses are not stored
+
+    def test_rerun_skips_screened_resumes(self):
+        """Test that a second run only retries the pairs without a successful result"""
+        self.run_screening()
+        self.analyzed.clear()
+        summary = self.run_screening()
+        self.assertEqual(summary["skipped"], 4)
+        self.assertEqual(len(self.analyzed), 1)
+        self.assertIn("number 3", self.analyzed[0])
+
+    def test_loader_failure_is_raised(self):
+        """Test that an error in the loader thread fails the run instead of ending it early as a success"""
+        stream_resumes = batch_screening.stream_resumes
+
+        def broken_stream(file_paths, max_workers=None, report=None):
+            yield from stream_resumes(file_paths[:2], max_workers=1, report=report)
+            raise OSError("worker pool broke")
+
+        with patch.object(batch_screening, "stream_resumes", broken_stream):
+            with self.assertRaises(OSError):
+                self.run_screening()
+        self.assertEqual(len(self.read_results()), 2) # Results finished before the failure are kept
+
+    def test_parse_match_percentage(self):
+        """Test reading the match percentage from analysis reports"""
+        self.assertEqual(batch_screening.parse_match_percentage("**Match percentage:** 72 %"), 72)
+        self.assertIsNone(batch_screening.parse_match_percentage("No score given"))
+        self.assertIsNone(batch_screening.parse_match_percentage(None))
+
+
+class FakeLLM:
+    """Chat model stand-in that fails with the given errors before answering"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    def invoke(self, prompt, timeout=None):
+        self.calls.append(timeout)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "report"
+
+
+class FakePool:
+    def __init__(self, llm):
+        self.llm = llm
+        self.requests = []
+
+    def get(self, model, temperature, api_key, base_url=None, **kwargs):
+        self.requests.append((model, temperature, kwargs))
+        return self.llm
+
+
+class TestAnalysisRetries(unittest.TestCase):
+    """Test that analysis LLM calls go through the shared retry policy"""
+
+    def test_transient_errors_are_retried(self):
+        """Test that a rate-limited analysis call is retried with a timeout and without SDK retries"""
+        llm = FakeLLM(APIError(429), APIError(503))
+        pool = FakePool(llm)
+        policy = RetryPolicy(max_retries=3, base_delay=0.0, deadline=30.0)
+        with patch.object(gopi_util, "get_llm_pool", return_value=pool), \
+                patch.object(gopi_util, "llm_retry_policy", policy):
+            self.assertEqual(gopi_util.invoke_llm_with_retry("prompt", temperature=0.3, model="gpt-4o-mini"), "report")
+        self.assertEqual(len(llm.calls), 3)
+        self.assertTrue(all(0 < timeout <= 30.0 for timeout in llm.calls))
+        self.assertEqual(pool.requests[0], ("gpt-4o-mini", 0.3, {"max_retries": 0}))
+
+    def test_fatal_error_is_raised(self):
+        """Test that a failure is raised, so the batch records it for the resume"""
+        pool = FakePool(FakeLLM(APIError(400)))
+        with patch.object(gopi_util, "get_llm_pool", return_value=pool), \
+                patch.object(gopi_util, "llm_retry_policy", RetryPolicy(base_delay=0.0)):
+            with self.assertRaises(APIError):
+                gopi_util.invoke_llm_with_retry("prompt")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,105 @@
+"""
+Unit Tests for candidate detail extraction
+Tests that the single-scan extractor returns the same details as the previous regex implementation
+"""
+
+import sys
+import os
+import re
+import unittest
+
+from langchain_core.documents import Document
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from candidate_extractor import extract_candidate_details, CandidateDetails
+
+
+# Previous implementation (before candidate_extractor.py), used as the reference.
+# Its phone pattern had a capturing country-code group, so findall returned only that
+# group; the reference uses the same pattern with the group made non-capturing, which is
+# the full number the extractor now returns
+def legacy_extract_candidate_details(docs):
+    full_text = ""
+    for doc in docs:
+        full_text += doc.page_content + "\n\n"
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    emails = re.findall(email_pattern, full_text)
+    phone_pattern = r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+    phones = re.findall(phone_pattern, full_text)
+    location_keywords = ['located in', 'based in', 'lives in', 'address:', 'location:']
+    locations = []
+    for keyword in location_keywords:
+        pattern = f'{keyword}([^.\n]+)'
+        locations.extend(re.findall(pattern, full_text, re.IGNORECASE))
+    name_pattern = r'^([A-Z][a-z]+\s+[A-Z][a-z]+)'
+    names = []
+    for line in full_text.split('\n')[:10]:
+        match = re.match(name_pattern, line.strip())
+        if match:
+            names.append(match.group(1))
+    return {
+        'name': names[0] if names else 'Unknown',
+        'email': emails[0] if emails else 'Unknown',
+        'phone': phones[0] if phones else 'Unknown',
+        'location': locations[0] if locations else 'Unknown',
+        'emails': emails,
+        'phones': phones,
+        'locations': locations
+    }
+
+
+RESUMES = [
+    ["Jane Doe\njane.doe@example.com | +1 512-555-0199\nLocated in Austin, TX\n\nSenior engineer."],
+    ["John Smith\nEmail: john.smith@mail.co.uk\nPhone: (415) 555-0123\nAddress: 12 Main St, Springfield. "
+     "Previously based in Denver, CO. Lives in Boulder"],
+    ["Curriculum vitae\n\n\nPriya Raman\nLOCATION: Chennai, India\nMobile 9876543210, alt 044.2345.6789\n",
+     "Contact priya_r+jobs@example.org or priya@work.example.io\nBased in Bangalore. located in Pune"],
+    ["no name here\nsome text without contact details, 2019 - 2023, team of 12"],
+    ["Ana Lima\nBased in Lisbon; lives in Porto. Located in Faro. address: Rua 1\n"
+     "Located in Faro again. ana@x.pt, ana.lima@y.com.br +55 11 91234 5678"],
+    [""],
+]
+
+
+class TestCandidateExtractor(unittest.TestCase):
+    """Test parity of extract_candidate_details with the previous implementation"""
+
+    def test_parity_with_legacy(self):
+        """Test that every field matches the reference implementation"""
+        for pages in RESUMES:
+            docs = [Document(page_content=text) for text in pages]
+            expected = legacy_extract_candidate_details(docs)
+            details = extract_candidate_details(docs)
+            for key, value in expected.items():
+                self.assertEqual(details[key], value, f"{key} of {pages!r}")
+
+    def test_large_resume(self):
+        """Test parity on a long resume where the details only appear in the header"""
+        body = ("Senior engineer responsible for Python services and data pipelines. "
+                "Led a team of 6 and reduced latency by 40 percent. ") * 200
+        docs = [Document(page_content="Jane Doe\njane@example.com\nLocated in Austin\n\n" + body)] + \
+               [Document(page_content=body) for _ in range(5)]
+        self.assertEqual(extract_candidate_details(docs).to_dict(), legacy_extract_candidate_details(docs))
+
+    def test_details_object(self):
+        """Test dict-style access on CandidateDetails"""
+        details = extract_candidate_details([Document(page_content=RESUMES[0][0])])
+        self.assertIsInstance(details, CandidateDetails)
+        self.assertEqual(details.name, "Jane Doe")
+        self.assertEqual(details["email"], "jane.doe@example.com")
+        self.assertEqual(details.get("location"), " Austin, TX")
+        self.assertIsNone(details.get("missing"))
+        with self.assertRaises(KeyError):
+            details["missing"]
+        self.assertEqual(set(details.keys()), set(details.to_dict()))
+
+    def test_unknown_defaults(self):
+        """Test that missing details are reported as Unknown"""
+        details = extract_candidate_details([Document(page_content="nothing useful")])
+        self.assertEqual((details.name, details.email, details.phone, details.location), ("Unknown",) * 4)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,79 @@
+"""
+Unit Tests for resume store compaction
+Tests that duplicate chunks are removed from the vector store and the keyword index, on both backends
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+from langchain_core.embeddings import Embeddings
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from compact_chroma import compact_chromadb
+from global_util.vector_store_registry import open_vector_store
+from global_util.keyword_index import KeywordIndex, keyword_index_dir
+
+
+class FakeEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class TestCompactChroma(unittest.TestCase):
+    """Test duplicate removal from a resume store uploaded twice"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="compact_chroma_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def fill(self, backend):
+        """Stores two chunks twice: under random-style IDs, then under resume_hash IDs"""
+        store = open_vector_store(self.directory, FakeEmbeddings(), backend=backend)
+        texts = ["Jane Doe, Python developer", "Django and PostgreSQL projects"]
+        old = [{"name": "Jane Doe", "email": "jane@example.com", "chunk_index": i} for i in range(2)]
+        new = [dict(metadata, resume_hash="h") for metadata in old]
+        store.add_texts(texts, metadatas=old, ids=["old-0", "old-1"])
+        store.add_texts(texts, metadatas=new, ids=["h-0", "h-1"])
+        store.add_texts(["Java engineer"], metadatas=[{"name": "Raj", "chunk_index": 0}], ids=["raj-0"])
+        keyword_index = KeywordIndex(keyword_index_dir(self.directory))
+        keyword_index.sync_with(store)
+
+    def assert_compacted(self, backend):
+        self.assertEqual(compact_chromadb(self.directory, backend=backend), 2)
+        store = open_vector_store(self.directory, FakeEmbeddings(), backend=backend)
+        self.assertEqual(sorted(store.get(include=[])["ids"]), ["h-0", "h-1", "raj-0"])
+        keyword_index = KeywordIndex(keyword_index_dir(self.directory))
+        self.assertEqual(len(keyword_index), 3)
+        self.assertNotIn("old-0", keyword_index)
+        self.assertEqual({doc_id for doc_id, _ in keyword_index.search("python django")}, {"h-0", "h-1"})
+        self.assertEqual(compact_chromadb(self.directory, backend=backend), 0)
+
+    def test_chroma(self):
+        """Test compaction of a Chroma store"""
+        self.fill("chroma")
+        self.assert_compacted("chroma")
+
+    def test_quantized(self):
+        """Test compaction of a quantized store"""
+        self.fill("quantized")
+        self.assert_compacted("quantized")
+
+    def test_missing_directory(self):
+        """Test that a missing store is reported, not created"""
+        missing = os.path.join(self.directory, "missing")
+        self.assertEqual(compact_chromadb(missing), 0)
+        self.assertFalse(os.path.exists(missing))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
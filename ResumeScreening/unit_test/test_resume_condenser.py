@@ -0,0 +1,135 @@
+"""
+Unit Tests for resume boilerplate removal
+Tests that page numbers and running headers/footers are stripped without touching resume content,
+and that over-budget resumes keep the chunks closest to the job description
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+from langchain_core.documents import Document
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from resume_condenser import remove_boilerplate, condense_resume
+from global_util.embedding_cache import CachedEmbeddings, SQLiteEmbeddingStore, QueryLog
+
+
+def page(*lines):
+    return "\n".join(lines)
+
+
+class TestRemoveBoilerplate(unittest.TestCase):
+    """Test remove_boilerplate on multi-page resumes"""
+
+    def test_page_numbers(self):
+        """Test that page numbers on a page's first or last line are removed"""
+        pages = [page("Jane Doe", "Python developer", "Page 1 of 2"),
+                 page("2", "Experience", "Acme Corp")]
+        self.assertEqual(remove_boilerplate(pages), ["Jane Doe\nPython developer", "Experience\nAcme Corp"])
+
+    def test_years_are_kept(self):
+        """Test that a year on its own line is content, even at the edge of a page"""
+        pages = [page("Education", "BSc Computer Science", "2019")]
+        self.assertEqual(remove_boilerplate(pages), ["Education\nBSc Computer Science\n2019"])
+
+    def test_numbers_inside_the_page_are_kept(self):
+        """Test that number-only lines in the body are not treated as page numbers"""
+        pages = [page("Achievements", "Team size", "12", "Services migrated", "3", "Jane Doe")]
+        self.assertEqual(remove_boilerplate(pages)[0].splitlines(),
+                         ["Achievements", "Team size", "12", "Services migrated", "3", "Jane Doe"])
+
+    def test_running_header_and_footer(self):
+        """Test that headers/footers repeated on most pages are dropped from later pages"""
+        pages = [page("Jane Doe - Resume", f"Section {i}", f"Details {i}", "Confidential") for i in range(4)]
+        cleaned = remove_boilerplate(pages)
+        self.assertEqual(cleaned[0], "Jane Doe - Resume\nSection 0\nDetails 0\nConfidential")
+        for i in range(1, 4):
+            self.assertEqual(cleaned[i], f"Section {i}\nDetails {i}")
+
+    def test_repeated_content_in_the_body_is_kept(self):
+        """Test that lines repeated in the middle of pages (e.g. skills) are not removed"""
+        pages = [page(f"Role {i}", f"Company {i}", "Skills", "Python", f"Result {i}", f"Team {i}")
+                 for i in range(4)]
+        for i, cleaned in enumerate(remove_boilerplate(pages)):
+            self.assertIn("Skills\nPython", cleaned, i)
+
+    def test_few_pages_keep_repeats(self):
+        """Test that with fewer than three pages a repeated line is not taken for a header"""
+        pages = [page("Jane Doe", "Summary"), page("Jane Doe", "Experience")]
+        self.assertEqual(remove_boilerplate(pages), ["Jane Doe\nSummary", "Jane Doe\nExperience"])
+
+    def test_whitespace_and_empty_pages(self):
+        """Test that extra spaces and blank lines are collapsed and empty pages dropped"""
+        pages = [page("Jane   Doe", "", "", "", "Python\tdeveloper"), page("", "3", "")]
+        self.assertEqual(remove_boilerplate(pages), ["Jane Doe\n\nPython developer"])
+
+
+class KeywordEmbeddings:
+    """Embeds a text by whether it mentions each skill; records the texts embedded"""
+
+    SKILLS = ["python", "django", "java", "welding"]
+
+    def __init__(self):
+        self.documents = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return [[float(skill in text.lower()) for skill in self.SKILLS] for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return self.embed_documents([text])[0]
+
+
+class TestCondenseResume(unittest.TestCase):
+    """Test condensation of resumes over the token budget"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="resume_condenser_test_")
+        self.model = KeywordEmbeddings()
+        self.query_log = QueryLog(os.path.join(self.directory, "query_log.sqlite"))
+        self.embedding = CachedEmbeddings(self.model, "keywords",
+                                          store=SQLiteEmbeddingStore(os.path.join(self.directory, "e.sqlite")),
+                                          query_log=self.query_log)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def resume(self):
+        sections = ["Jane Doe jane@example.com"] + \
+                   [f"Welding certification course {i}. " * 30 for i in range(3)] + \
+                   ["Python and Django developer building web services. " * 15]
+        return [Document(page_content="\n\n".join(sections))]
+
+    def test_short_resume_is_unchanged(self):
+        """Test that a resume within the budget is only cleaned, without embedding calls"""
+        condensed = condense_resume([Document(page_content="Jane Doe\nPython developer")], "Python", self.embedding)
+        self.assertEqual(condensed.text, "Jane Doe\nPython developer")
+        self.assertEqual(self.model.documents, [])
+
+    def test_relevant_chunks_are_kept(self):
+        """Test that the header and the chunks matching the job description fit the budget"""
+        condensed = condense_resume(self.resume(), "Senior Python Django developer", self.embedding, token_budget=300)
+        self.assertTrue(condensed.text.startswith("Jane Doe"))
+        self.assertIn("Python and Django developer", condensed.text)
+        self.assertLessEqual(condensed.tokens_after, 300)
+        self.assertLess(condensed.tokens_after, condensed.tokens_before)
+
+    def test_job_description_stays_out_of_the_query_log(self):
+        """Test that the job description is embedded as a cached document, not logged as a search query"""
+        job_desc = "Senior Python Django developer"
+        condense_resume(self.resume(), job_desc, self.embedding, token_budget=300)
+        condense_resume(self.resume(), job_desc, self.embedding, token_budget=300)
+        self.assertEqual(self.model.queries, [])
+        self.assertEqual(self.model.documents.count(job_desc), 1) # Served from the cache the second time
+        self.assertEqual(self.query_log.most_frequent(10), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,64 @@
+"""
+Unit Tests for parallel resume loading
+Tests file discovery, per-format loading and the streaming loader's error collection
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from resume_loader import find_resume_files, load_resume_file, stream_resumes, ResumeLoadReport
+
+
+class TestResumeLoader(unittest.TestCase):
+    """Test loading resume files from a folder"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="resume_loader_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_find_resume_files(self):
+        """Test that only supported extensions are listed, sorted, regardless of case"""
+        self.write("b.txt", "B")
+        self.write("a.PDF", "not really a pdf")
+        self.write("notes.md", "skipped")
+        self.write("c.docx", "not really a docx")
+        names = [os.path.basename(path) for path in find_resume_files(self.directory)]
+        self.assertEqual(names, ["a.PDF", "b.txt", "c.docx"])
+
+    def test_load_text_and_unsupported(self):
+        """Test that a text resume loads as one Document and other formats are rejected"""
+        documents = load_resume_file(self.write("jane.txt", "Jane Doe\nPython developer"))
+        self.assertEqual(len(documents), 1)
+        self.assertEqual(documents[0].page_content, "Jane Doe\nPython developer")
+        with self.assertRaises(ValueError):
+            load_resume_file(self.write("jane.rtf", "Jane Doe"))
+
+    def test_stream_collects_errors(self):
+        """Test that every readable file is yielded and failures are reported instead of raised"""
+        paths = [self.write(f"candidate{i}.txt", f"Candidate {i}") for i in range(6)]
+        broken = self.write("broken.pdf", "not a pdf")
+        report = ResumeLoadReport()
+        loaded = dict(stream_resumes(paths + [broken], max_workers=2, report=report))
+        self.assertEqual(set(loaded), set(paths))
+        self.assertEqual(loaded[paths[3]][0].page_content, "Candidate 3")
+        self.assertEqual(report.files_loaded, 6)
+        self.assertEqual(list(report.errors), [broken])
+        self.assertGreater(report.files_per_second, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
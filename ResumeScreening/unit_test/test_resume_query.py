@@ -0,0 +1,135 @@
+"""
+Unit Tests for resume query parsing
+Tests which location, email and name constraints parse_resume_query turns into metadata filters,
+and that hybrid search returns k distinct candidates
+"""
+
+import sys
+import os
+import unittest
+
+from langchain_core.documents import Document
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from resume_query import parse_resume_query, normalize_location, candidate_key, build_where, HybridResumeSearch
+
+KNOWN_CITIES = {"austin", "new york", "chennai"}
+
+
+class TestParseResumeQuery(unittest.TestCase):
+    """Test constraint extraction from free-text resume queries"""
+
+    def test_explicit_location(self):
+        """Test that explicit location phrases always become a filter"""
+        parsed = parse_resume_query("Python developer based in Austin")
+        self.assertEqual(parsed.filters, {"location_city": "austin"})
+        self.assertEqual(parsed.text, "Python developer")
+        self.assertEqual(parsed.query, "Python developer based in Austin")
+
+        parsed = parse_resume_query("Data engineer located in New York with Spark")
+        self.assertEqual(parsed.filters, {"location_city": "new york"})
+
+    def test_bare_in_needs_known_city(self):
+        """Test that a bare "in"/"from" is only read as a location for a known city"""
+        parsed = parse_resume_query("Engineer experienced in Kubernetes", KNOWN_CITIES)
+        self.assertEqual(parsed.filters, {})
+        self.assertEqual(parsed.text, "Engineer experienced in Kubernetes")
+
+        parsed = parse_resume_query("Java developer in Chennai", KNOWN_CITIES)
+        self.assertEqual(parsed.filters, {"location_city": "chennai"})
+        self.assertEqual(parsed.text, "Java developer")
+
+        # Without the known cities nothing is guessed
+        self.assertEqual(parse_resume_query("Java developer in Chennai").filters, {})
+
+    def test_skill_before_location(self):
+        """Test that a skill after "in" is skipped when a known city follows"""
+        parsed = parse_resume_query("Frontend engineer skilled in React from Austin", KNOWN_CITIES)
+        self.assertEqual(parsed.filters, {"location_city": "austin"})
+        self.assertIn("React", parsed.text)
+
+    def test_company_is_not_a_location(self):
+        """Test that "from <Company>" is left in the query text"""
+        parsed = parse_resume_query("candidates from Google", KNOWN_CITIES)
+        self.assertEqual(parsed.filters, {})
+        self.assertEqual(parsed.text, "candidates from Google")
+
+    def test_email_and_name(self):
+        """Test email and name constraints"""
+        parsed = parse_resume_query("resume of jane.doe@example.com")
+        self.assertEqual(parsed.filters, {"email": "jane.doe@example.com"})
+
+        parsed = parse_resume_query("candidate named Jane Doe based in Austin")
+        self.assertEqual(parsed.filters, {"name": "Jane Doe", "location_city": "austin"})
+        self.assertEqual(parsed.text, "candidate")
+
+    def test_only_constraints(self):
+        """Test that a query made only of constraints keeps its original text for ranking"""
+        parsed = parse_resume_query("based in Austin")
+        self.assertEqual(parsed.filters, {"location_city": "austin"})
+        self.assertEqual(parsed.text, "based in Austin")
+
+
+class TestQueryHelpers(unittest.TestCase):
+    """Test location normalization, candidate keys and where clauses"""
+
+    def test_normalize_location(self):
+        self.assertEqual(normalize_location("Austin, TX"), "austin")
+        self.assertEqual(normalize_location(" New York "), "new york")
+        self.assertEqual(normalize_location("Unknown"), "unknown")
+        self.assertEqual(normalize_location(None), "unknown")
+
+    def test_candidate_key(self):
+        self.assertEqual(candidate_key({"email": "Jane@Example.com", "resume_hash": "h"}), "jane@example.com")
+        self.assertEqual(candidate_key({"email": "Unknown", "resume_hash": "h"}), "h")
+        self.assertEqual(candidate_key({"name": "Jane Doe"}), "Jane Doe")
+
+    def test_build_where(self):
+        self.assertIsNone(build_where({}))
+        self.assertEqual(build_where({"email": "a@b.com"}), {"email": {"$eq": "a@b.com"}})
+        self.assertEqual(build_where({"email": "a@b.com", "name": "Jane"}),
+                         {"$and": [{"email": {"$eq": "a@b.com"}}, {"name": {"$eq": "Jane"}}]})
+
+
+class FakeVectorStore:
+    """Returns its chunks in stored order as the vector ranking, recording each k asked for"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.fetches = []
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        self.fetches.append(k)
+        return [(doc, float(i)) for i, doc in enumerate(self.docs[:k])]
+
+
+def chunk(candidate, i):
+    return Document(page_content=f"Python developer, project {i}", id=f"{candidate}-{i}",
+                    metadata={"email": f"{candidate}@example.com"})
+
+
+class TestHybridResumeSearch(unittest.TestCase):
+    """Test that top-k means k distinct candidates"""
+
+    def test_top_chunks_from_one_candidate(self):
+        """Test that more chunks are fetched when the best ones all belong to one candidate"""
+        store = FakeVectorStore([chunk("jane", i) for i in range(30)] + [chunk(name, 0) for name in ("raj", "li", "ana")])
+        results = HybridResumeSearch(store, fetch_multiplier=4).search("Python developer", k=3)
+        self.assertEqual(results[0].metadata["email"], "jane@example.com")
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len({doc.metadata["email"] for doc in results}), 3)
+        self.assertEqual(store.fetches, [12, 24, 48])
+
+    def test_collection_runs_out(self):
+        """Test that the search stops once the collection has no more chunks"""
+        store = FakeVectorStore([chunk("jane", i) for i in range(10)] + [chunk("raj", 0)])
+        results = HybridResumeSearch(store, fetch_multiplier=2).search("Python developer", k=5)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0].metadata["matched_chunks"], 10)
+        self.assertEqual(store.fetches, [10, 20])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,230 @@
+'''
+Offline end-to-end benchmark of the global_util consumers
+
+Starts benchmarks/fake_openai_server.py, points get_llm()/get_embedding() at
+it through OPENAI_BASE_URL and drives:
+
+    store    - ResumeScreening store_in_chromadb (chunk, embed, upsert)
+    query    - ResumeScreening run_self_query (hybrid search)
+    index    - create_or_load_chroma_db: cold ingest and warm (unchanged) re-sync
+    finance  - the LangGraph finance bot (skipped when langgraph is not installed)
+
+at each concurrency level. Caches and vector stores live in a temporary
+directory, so every run starts cold. Results (p50/p95/p99 latency in seconds
+and throughput in requests/second per scenario and concurrency) are printed
+as JSON and optionally written to --output for comparison between runs.
+
+Usage:
+    python benchmarks/bench_global_util.py [--concurrency 1,4,16] [--requests 40]
+                                           [--scenarios store,query,index,finance]
+                                           [--latency-ms 50] [--tokens-per-second 200]
+                                           [--error-rate 0.0] [--output results.json]
+'''
+import os, sys, json, time, socket, tempfile, argparse, subprocess, urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_SCRIPT = os.path.join(project_root, "benchmarks", "fake_openai_server.py")
+
+SKILLS = ["Python", "Java", "AWS", "Kubernetes", "SQL", "React", "Go", "Terraform", "Spark", "C++"]
+CITIES = ["Austin, TX", "Dallas, TX", "Seattle, WA", "Denver, CO", "Boston, MA"]
+FIRST_NAMES = ["Ann", "Bob", "Cy", "Dee", "Eli", "Fay", "Gus", "Hal", "Ivy", "Jon"]
+LAST_NAMES = ["Lee", "Ray", "Kim", "Fox", "Day", "Poe", "Orr", "Hunt", "Wu", "Ng"]
+FINANCE_INPUTS = ["I spent 1200 on groceries", "What is my total expenses", "Give me 3 money saving tips",
+                  "add 300 for taxi", "How can I plan to save for a house"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Starts the fake server in its own process and waits until it answers
+def start_fake_server(port, latency_ms, tokens_per_second, error_rate):
+    process = subprocess.Popen([
+        sys.executable, SERVER_SCRIPT, "--port", str(port), "--latency-ms", str(latency_ms),
+        "--tokens-per-second", str(tokens_per_second), "--error-rate", str(error_rate),
+    ], stdout=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/v1/health", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Fake OpenAI server did not start")
+
+
+# Points global_util at the fake server and at a scratch directory (before it is imported)
+def configure_environment(port, work_dir):
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+    os.environ["GOPI_EMBEDDING_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    os.environ["GOPI_RESPONSE_CACHE_DIR"] = os.path.join(work_dir, "cache")
+    os.environ["GOPI_QUERY_WARMUP"] = "0"
+    for path in (project_root, os.path.join(project_root, "global_util"),
+                 os.path.join(project_root, "ResumeScreening", "src"),
+                 os.path.join(project_root, "My_AI_Projects", "src")):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def make_resume(i):
+    from langchain_core.documents import Document
+    name = f"{FIRST_NAMES[i % 10]} {LAST_NAMES[(i // 10) % 10]}"
+    skills = ", ".join(SKILLS[(i + k) % len(SKILLS)] for k in range(3))
+    body = (f"Senior engineer {i} with {skills} experience building services and data pipelines. "
+            f"Led migrations, mentored engineers and owned on-call for {skills}. ") * 25
+    header = f"{name}\n{name.split()[0].lower()}{i}@example.com | +1 512-555-{i % 10000:04d}\nLocated in {CITIES[i % 5]}\n\n"
+    return [Document(page_content=header + body)]
+
+
+def make_policy_docs(count):
+    from langchain_core.documents import Document
+    return [
+        Document(page_content=f"Clause {i // 10}.{i % 10}: employees are entitled to {i % 30} days of leave "
+                              f"type {i}, subject to manager approval and a notice period of {i % 4} weeks.",
+                 metadata={"source": f"policy_{i // 50}.pdf", "page": i % 50})
+        for i in range(count)
+    ]
+
+
+# Runs fn over inputs with the given concurrency and returns latency/throughput stats
+def run_load(fn, inputs, concurrency):
+    from global_util.metrics import LatencyRecorder
+    latency = LatencyRecorder(window=len(inputs) or 1)
+    errors = []
+
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            if fn(item) is None:
+                errors.append("no result")
+        except Exception as e:
+            errors.append(type(e).__name__)
+        latency.record("request", time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, inputs))
+    seconds = time.perf_counter() - started
+
+    stats = latency.snapshot().get("request", {})
+    return {
+        "concurrency": concurrency,
+        "requests": len(inputs),
+        "errors": len(errors),
+        "error_types": dict(Counter(errors)),
+        "seconds": round(seconds, 4),
+        "throughput_rps": round(len(inputs) / seconds, 3) if seconds else 0.0,
+        "latency_s": {key: round(value, 5) for key, value in stats.items() if key != "count"},
+    }
+
+
+def bench_store(work_dir, concurrency_levels, requests):
+    from gopi_resume_processor import store_in_chromadb
+    persist_directory = os.path.join(work_dir, "resumes")
+    results, offset = [], 0
+    for concurrency in concurrency_levels:
+        resumes = [make_resume(offset + i) for i in range(requests)]
+        offset += requests
+        results.append(run_load(lambda docs: store_in_chromadb(docs, persist_directory), resumes, concurrency))
+    return results
+
+
+def bench_query(work_dir, concurrency_levels, requests):
+    from gopi_resume_processor import store_in_chromadb, run_self_query
+    persist_directory = os.path.join(work_dir, "resumes")
+    if not os.path.exists(persist_directory):
+        for i in range(50):
+            store_in_chromadb(make_resume(i), persist_directory)
+    queries = [f"{SKILLS[i % len(SKILLS)]} developer in {CITIES[i % 5].split(',')[0]}" for i in range(requests)]
+    return [run_load(lambda query: run_self_query(query, persist_directory, k=5), queries, concurrency)
+            for concurrency in concurrency_levels]
+
+
+# Cold ingest of a fresh collection, then a warm re-sync of the unchanged documents
+def bench_index(work_dir, requests):
+    from global_util.gopi_util import create_or_load_chroma_db
+    docs = make_policy_docs(requests * 25)
+    db_name = os.path.join(work_dir, "policies") # Absolute, so it is not created next to the repo
+    cold = run_load(lambda batch: create_or_load_chroma_db(batch, db_name=db_name, collection_name="bench_policies"),
+                    [docs], 1)
+    warm = run_load(lambda batch: create_or_load_chroma_db(batch, db_name=db_name, collection_name="bench_policies"),
+                    [docs], 1)
+    cold["chunks"] = warm["chunks"] = len(docs)
+    return [dict(cold, phase="cold"), dict(warm, phase="warm")]
+
+
+def bench_finance(concurrency_levels, requests):
+    try:
+        import finance_langgraph_app
+    except ImportError as e:
+        return {"skipped": f"finance bot unavailable: {e}"}
+    inputs = [FINANCE_INPUTS[i % len(FINANCE_INPUTS)] + f" #{i}" for i in range(requests)]
+
+    def chat(text):
+        return finance_langgraph_app.graph.invoke({"user_input": text, "expenses": [], "hitl_flag": False}).get("data")
+
+    return [run_load(chat, inputs, concurrency) for concurrency in concurrency_levels]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of global_util consumers")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per scenario and concurrency level")
+    parser.add_argument("--scenarios", default="store,query,index,finance")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    scenarios = args.scenarios.split(",")
+
+    work_dir = tempfile.mkdtemp(prefix="gopi_bench_")
+    port = free_port()
+    server = start_fake_server(port, args.latency_ms, args.tokens_per_second, args.error_rate)
+    configure_environment(port, work_dir)
+    try:
+        results = {}
+        if "store" in scenarios:
+            results["store_in_chromadb"] = bench_store(work_dir, concurrency_levels, args.requests)
+        if "query" in scenarios:
+            results["run_self_query"] = bench_query(work_dir, concurrency_levels, args.requests)
+        if "index" in scenarios:
+            results["create_or_load_chroma_db"] = bench_index(work_dir, args.requests)
+        if "finance" in scenarios:
+            results["finance_bot"] = bench_finance(concurrency_levels, args.requests)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        "config": {
+            "latency_ms": args.latency_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "error_rate": args.error_rate,
+            "requests": args.requests,
+            "concurrency": concurrency_levels,
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
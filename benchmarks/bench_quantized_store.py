@@ -0,0 +1,155 @@
+'''
+Recall-vs-latency benchmark of the int8 quantized vector store against Chroma
+
+Builds the same synthetic, clustered collection (unit vectors around random
+centres, like embeddings of related chunks) in Chroma and in
+global_util/quantized_store.py, then answers the same queries with:
+
+    chroma            - Chroma's HNSW index (the current path)
+    quantized_rN      - int8 coarse scan, exact re-rank of N * k candidates
+    quantized_exact   - exact cosine over every stored vector
+
+Recall@k is measured against brute-force float32 cosine search. Also reports
+on-disk vector bytes of the quantized files. Results are printed as JSON and
+optionally written to --output.
+
+Usage:
+    python benchmarks/bench_quantized_store.py [--vectors 20000] [--dimensions 256] [--queries 200]
+                                               [--k 10] [--rerank-factors 1,2,4,8] [--output results.json]
+'''
+import os, sys, json, time, shutil, tempfile, argparse
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+# Unit vectors scattered around the given centres
+def make_vectors(count, centres, rng):
+    dimensions = centres.shape[1]
+    vectors = centres[rng.integers(0, len(centres), count)] + rng.normal(scale=0.7, size=(count, dimensions))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def latency_stats(seconds):
+    return {
+        "p50": round(float(np.percentile(seconds, 50)), 6),
+        "p95": round(float(np.percentile(seconds, 95)), 6),
+        "mean": round(float(np.mean(seconds)), 6),
+    }
+
+
+# Runs search(query) -> [row] for every query and returns recall@k and latency
+def measure(search, queries, truth, k):
+    seconds, found = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        rows = search(query)
+        seconds.append(time.perf_counter() - started)
+        found += len(set(rows[:k]) & expected)
+    return {"recall_at_k": round(found / (k * len(queries)), 4), "latency_s": latency_stats(seconds)}
+
+
+def build_chroma(work_dir, vectors, batch_size):
+    import chromadb
+    client = chromadb.PersistentClient(path=os.path.join(work_dir, "chroma"))
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    for start in range(0, len(vectors), batch_size):
+        end = min(start + batch_size, len(vectors))
+        collection.add(ids=[str(row) for row in range(start, end)], embeddings=vectors[start:end].tolist())
+    return collection
+
+
+def build_quantized(work_dir, vectors, batch_size):
+    from global_util.quantized_store import QuantizedCollection
+    collection = QuantizedCollection(os.path.join(work_dir, "quantized"), "bench")
+    for start in range(0, len(vectors), batch_size):
+        end = min(start + batch_size, len(vectors))
+        collection.upsert([str(row) for row in range(start, end)], vectors[start:end])
+    return collection
+
+
+# Bytes of the files under path (only those named in names, if given)
+def directory_bytes(path, names=None):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path)
+               for name in files if names is None or name in names)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Quantized vector store vs Chroma: recall and latency")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factors", default="1,2,4,8")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-chroma", action="store_true", help="Only benchmark the quantized store")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    centres = rng.normal(size=(args.clusters, args.dimensions))
+    vectors = make_vectors(args.vectors, centres, rng)
+    queries = make_vectors(args.queries, centres, rng)
+    truth = [set(np.argsort(-(vectors @ query), kind="stable")[:args.k].tolist()) for query in queries]
+
+    work_dir = tempfile.mkdtemp(prefix="gopi_quantized_bench_")
+    results = {}
+    try:
+        started = time.perf_counter()
+        quantized = build_quantized(work_dir, vectors, args.batch_size)
+        build_seconds = time.perf_counter() - started
+        quantized_dir = os.path.join(work_dir, "quantized")
+        results["quantized_build"] = {
+            "seconds": round(build_seconds, 3),
+            "int8_scan_bytes": directory_bytes(quantized_dir, {"vectors.i8", "scales.f32"}),
+            "float32_rerank_bytes": directory_bytes(quantized_dir, {"full.f32"}),
+            "total_bytes": directory_bytes(quantized_dir),
+        }
+        quantized.search(queries[0], k=args.k) # Map the files before timing
+        for factor in [int(value) for value in args.rerank_factors.split(",")]:
+            results[f"quantized_r{factor}"] = measure(
+                lambda query: [row for row, _ in quantized.search(query, k=args.k, rerank_factor=factor)],
+                queries, truth, args.k)
+        results["quantized_exact"] = measure(
+            lambda query: [row for row, _ in quantized.search(query, k=args.k, exact=True)], queries, truth, args.k)
+
+        if not args.skip_chroma:
+            started = time.perf_counter()
+            chroma = build_chroma(work_dir, vectors, args.batch_size)
+            results["chroma_build"] = {"seconds": round(time.perf_counter() - started, 3),
+                                       "total_bytes": directory_bytes(os.path.join(work_dir, "chroma"))}
+            results["chroma"] = measure(
+                lambda query: [int(row) for row in chroma.query(query_embeddings=[query.tolist()],
+                                                                n_results=args.k)["ids"][0]],
+                queries, truth, args.k)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "config": {
+            "vectors": args.vectors,
+            "dimensions": args.dimensions,
+            "queries": args.queries,
+            "k": args.k,
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+'''
+Local OpenAI-compatible stand-in server for offline benchmarks
+
+Implements the two endpoints global_util uses:
+    POST /v1/chat/completions   (plain JSON and SSE streaming)
+    POST /v1/embeddings         (float and base64 encodings)
+
+Responses are deterministic. Embeddings are hashed bag-of-words vectors, so
+texts that share words are close and retrieval results stay meaningful.
+Latency, streaming token rate and error injection are configurable.
+
+Usage:
+    python benchmarks/fake_openai_server.py [--port 8765] [--latency-ms 50] [--tokens-per-second 200]
+                                            [--error-rate 0.0] [--completion-tokens 64] [--dimensions 256]
+'''
+import re, json, time, random, base64, hashlib, argparse
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+ANSWER_WORDS = ("Based on the provided context the policy allows this request subject to manager "
+                "approval and the standard notice period described in the handbook").split()
+
+
+# Hashed bag-of-words vector (unit length) for a text or a list of token IDs
+def fake_embedding(item, dimensions):
+    words = [str(token) for token in item] if isinstance(item, list) else _WORD.findall(item.lower())
+    vector = [0.0] * dimensions
+    for word in words or ["empty"]:
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = sum(value * value for value in vector) ** 0.5 or 1.0
+    return [value / norm for value in vector]
+
+
+def make_handler(options):
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _delay(self):
+            latency = options.latency_ms + random.uniform(-options.jitter_ms, options.jitter_ms)
+            time.sleep(max(0.0, latency) / 1000.0)
+
+        # Returns True (after sending an error response) when an error is injected
+        def _inject_error(self):
+            if random.random() >= options.error_rate:
+                return False
+            if random.random() < 0.5:
+                self._send_json(429, {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit"}},
+                                {"Retry-After": "0.1"})
+            else:
+                self._send_json(500, {"error": {"message": "Server error (injected)", "type": "server_error"}})
+            return True
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/health"):
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            self._delay()
+            if self._inject_error():
+                return
+            if self.path.endswith("/embeddings"):
+                self._embeddings(request)
+            elif self.path.endswith("/chat/completions"):
+                self._chat(request)
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+
+        def _embeddings(self, request):
+            inputs = request.get("input", [])
+            if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+                inputs = [inputs]
+            data = []
+            for index, item in enumerate(inputs):
+                vector = fake_embedding(item, options.dimensions)
+                if request.get("encoding_format") == "base64":
+                    vector = base64.b64encode(array("f", vector).tobytes()).decode("ascii")
+                data.append({"object": "embedding", "index": index, "embedding": vector})
+            tokens = sum(len(item) if isinstance(item, list) else len(item.split()) for item in inputs)
+            self._send_json(200, {
+                "object": "list",
+                "data": data,
+                "model": request.get("model", "fake-embedding"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            })
+
+        def _chat(self, request):
+            words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(options.completion_tokens)]
+            prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in request.get("messages", []))
+            created = int(time.time())
+            model = request.get("model", "fake-chat")
+            if not request.get("stream"):
+                time.sleep(len(words) / options.tokens_per_second)
+                self._send_json(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                              "total_tokens": prompt_tokens + len(words)},
+                })
+                return
+
+            # Server-sent events, one token per chunk at tokens_per_second
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            def send(delta, finish_reason=None):
+                chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            send({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                time.sleep(1.0 / options.tokens_per_second)
+                send({"content": word if i == 0 else " " + word})
+            send({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return FakeOpenAIHandler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Delay before every response")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Uniform +/- jitter on the delay")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Chat completion token rate")
+    parser.add_argument("--completion-tokens", type=int, default=64, help="Tokens per chat completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 429/500")
+    parser.add_argument("--dimensions", type=int, default=256, help="Embedding vector size")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    server = ThreadingHTTPServer((options.host, options.port), make_handler(options))
+    server.daemon_threads = True
+    print(f"Fake OpenAI server listening on http://{options.host}:{options.port}/v1", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
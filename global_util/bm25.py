@@ -0,0 +1,91 @@
+# BM25 keyword scoring and rank fusion helpers (pure Python, no network calls)
+import re
+import math
+from collections import Counter, defaultdict
+
+# Keeps skill acronyms (c++, c#, .net), emails and clause numbers (4.2.1) as single tokens
+_TOKEN = re.compile(r"[a-z0-9#+@_.-]*[a-z0-9#+]")
+
+
+# Lowercases and splits text into BM25 terms
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    In-memory BM25 (Okapi) index over documents identified by string IDs.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)   # term -> {doc_id: term frequency}
+        self.doc_lengths = {}               # doc_id -> number of terms
+        self.doc_terms = {}                 # doc_id -> distinct terms (for removal)
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_lengths
+
+    # Adds (or replaces) a document
+    def add(self, doc_id, text):
+        self.add_counts(doc_id, Counter(tokenize(text)))
+
+    # Adds (or replaces) a document given as {term: frequency}
+    def add_counts(self, doc_id, terms):
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+        for term, frequency in terms.items():
+            self.postings[term][doc_id] = frequency
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.doc_terms[doc_id] = tuple(terms)
+        self.total_length += length
+
+    def remove(self, doc_id):
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id, ()):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def _idf(self, document_frequency):
+        count = len(self.doc_lengths)
+        return math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    # Returns [(doc_id, score)] best first; candidate_ids restricts scoring to a subset
+    def search(self, query, k=10, candidate_ids=None):
+        if not self.doc_lengths:
+            return []
+        average_length = self.total_length / len(self.doc_lengths)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(len(postings))
+            for doc_id, frequency in postings.items():
+                if candidate_ids is not None and doc_id not in candidate_ids:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / average_length
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+# Fuses several ranked lists of IDs (best first) with reciprocal rank fusion
+def reciprocal_rank_fusion(rankings, k=60, weights=None):
+    weights = weights or [1.0] * len(rankings)
+    fused = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += weight / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,138 @@
+# Retrieval post-processing: drop near-duplicate chunks, re-rank locally and fit a token budget
+import os
+import math
+import threading
+from collections import Counter
+
+from global_util.bm25 import BM25Index, tokenize, reciprocal_rank_fusion
+from global_util.tokens import count_tokens
+
+# Maximum context tokens put into the prompt (override with GOPI_CONTEXT_TOKEN_BUDGET)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("GOPI_CONTEXT_TOKEN_BUDGET", "1200"))
+# Candidates fetched from the vector store and chunks kept after selection
+CONTEXT_FETCH_K = int(os.getenv("GOPI_CONTEXT_FETCH_K", "8"))
+CONTEXT_TOP_N = int(os.getenv("GOPI_CONTEXT_TOP_N", "4"))
+# Chunks at least this similar (term cosine) to a more relevant chunk are dropped as duplicates
+DUPLICATE_THRESHOLD = 0.9
+
+
+class SelectedContext:
+    """Chunks chosen for the prompt, with token counts of the retrieved and selected chunks"""
+
+    __slots__ = ('docs', 'tokens_before', 'tokens_after', 'chunks_total', 'duplicates_removed')
+
+    def __init__(self, docs, tokens_before, tokens_after, chunks_total, duplicates_removed):
+        self.docs = docs
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        self.chunks_total = chunks_total
+        self.duplicates_removed = duplicates_removed
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_before - self.tokens_after
+
+    def __repr__(self):
+        return (f"SelectedContext(tokens_before={self.tokens_before}, tokens_after={self.tokens_after}, "
+                f"chunks_kept={len(self.docs)}/{self.chunks_total}, duplicates_removed={self.duplicates_removed})")
+
+
+# Unit-length term-frequency vector of a text, as {term: weight}
+def _term_vector(text):
+    counts = Counter(tokenize(text))
+    norm = math.sqrt(sum(count * count for count in counts.values())) or 1.0
+    return {term: count / norm for term, count in counts.items()}
+
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+
+class ContextSelector:
+    """
+    Chooses which retrieved chunks go into a RAG prompt.
+
+    Candidates are re-ranked by fusing the retriever's order with BM25 over
+    the candidates themselves. Near-identical chunks (e.g. repeated
+    boilerplate) are dropped and the rest picked with maximal marginal
+    relevance (lambda_mult trades relevance against novelty).
+    Picked chunks are added best first while they fit max_tokens; the best
+    chunk is always kept. Everything runs locally, no API calls.
+    """
+
+    def __init__(self, max_tokens=CONTEXT_TOKEN_BUDGET, top_n=CONTEXT_TOP_N, lambda_mult=0.7,
+                 duplicate_threshold=DUPLICATE_THRESHOLD, model="gpt-3.5-turbo"):
+        self.max_tokens = max_tokens
+        self.top_n = top_n
+        self.lambda_mult = lambda_mult
+        self.duplicate_threshold = duplicate_threshold
+        self.model = model
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "chunks_retrieved": 0, "chunks_kept": 0, "duplicates_removed": 0,
+                       "tokens_before": 0, "tokens_after": 0}
+
+    # Relevance in [0, 1] per candidate: reciprocal rank fusion of retriever order and local BM25
+    def _relevance(self, query, docs):
+        index = BM25Index()
+        for i, doc in enumerate(docs):
+            index.add(str(i), doc.page_content)
+        keyword_ranking = [doc_id for doc_id, _ in index.search(query, k=len(docs))]
+        fused = dict(reciprocal_rank_fusion([[str(i) for i in range(len(docs))], keyword_ranking]))
+        low, high = min(fused.values()), max(fused.values())
+        return [(fused[str(i)] - low) / (high - low) if high > low else 1.0 for i in range(len(docs))]
+
+    def select(self, query, docs):
+        docs = list(docs)
+        token_counts = [count_tokens(doc.page_content, self.model) for doc in docs]
+        tokens_before = sum(token_counts)
+        if not docs:
+            return self._record(SelectedContext([], 0, 0, 0, 0))
+
+        relevance = self._relevance(query, docs)
+        vectors = [_term_vector(doc.page_content) for doc in docs]
+
+        # Drop near-duplicates of more relevant chunks
+        remaining = []
+        for i in sorted(range(len(docs)), key=lambda i: -relevance[i]):
+            if all(_cosine(vectors[i], vectors[j]) < self.duplicate_threshold for j in remaining):
+                remaining.append(i)
+        duplicates = len(docs) - len(remaining)
+
+        # Maximal marginal relevance over the rest
+        def marginal_relevance(i):
+            redundancy = max((_cosine(vectors[i], vectors[j]) for j in picked), default=0.0)
+            return self.lambda_mult * relevance[i] - (1 - self.lambda_mult) * redundancy
+
+        picked = []
+        while remaining and len(picked) < self.top_n:
+            best = max(remaining, key=marginal_relevance)
+            remaining.remove(best)
+            picked.append(best)
+
+        # Fit the token budget, best first
+        selected, used = [], 0
+        for i in picked:
+            if not selected or used + token_counts[i] <= self.max_tokens:
+                selected.append(i)
+                used += token_counts[i]
+        return self._record(SelectedContext([docs[i] for i in selected], tokens_before, used, len(docs), duplicates))
+
+    def _record(self, context):
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["chunks_retrieved"] += context.chunks_total
+            self._stats["chunks_kept"] += len(context.docs)
+            self._stats["duplicates_removed"] += context.duplicates_removed
+            self._stats["tokens_before"] += context.tokens_before
+            self._stats["tokens_after"] += context.tokens_after
+        return context
+
+    # Totals over all queries, plus tokens saved in total and per query
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+        stats["tokens_saved_per_query"] = stats["tokens_saved"] / stats["queries"] if stats["queries"] else 0.0
+        return stats
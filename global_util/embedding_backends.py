@@ -0,0 +1,126 @@
+# Embedding backends (OpenAI or a local sentence-transformers model) and embedder bookkeeping
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+
+# Which backend get_embedding() builds: "openai" or "local" (override with GOPI_EMBEDDING_BACKEND)
+DEFAULT_BACKEND = os.getenv("GOPI_EMBEDDING_BACKEND", "openai").lower()
+LOCAL_MODEL_NAME = os.getenv("GOPI_LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# sentence-transformers runtime: "torch" or "onnx"
+LOCAL_RUNTIME = os.getenv("GOPI_LOCAL_EMBEDDING_RUNTIME", "torch").lower()
+LOCAL_BATCH_SIZE = int(os.getenv("GOPI_LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+LOCAL_THREADS = int(os.getenv("GOPI_LOCAL_EMBEDDING_THREADS", str(min(4, os.cpu_count() or 1))))
+
+# Collection metadata key that records which embedder built the collection
+EMBEDDER_METADATA_KEY = "embedder"
+# Collections created before the key existed were always built with OpenAI embeddings
+LEGACY_EMBEDDER = "openai:text-embedding-3-small"
+
+_models = {}
+_executors = {}
+_models_lock = threading.Lock()
+
+
+class EmbedderMismatchError(ValueError):
+    """Raised when a collection is opened with a different embedder than the one that built it"""
+
+
+# Loads a sentence-transformers model once per process
+def load_local_model(model_name=LOCAL_MODEL_NAME, runtime=LOCAL_RUNTIME):
+    key = (model_name, runtime)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError(
+                    "The local embedding backend needs sentence-transformers: pip install \"sentence-transformers>=3.2\""
+                    + (" onnxruntime optimum" if runtime == "onnx" else "")
+                )
+            kwargs = {"device": "cpu"}
+            if runtime != "torch":
+                kwargs["backend"] = runtime
+            model = SentenceTransformer(model_name, **kwargs)
+            _models[key] = model
+        return model
+
+
+# Returns the process-wide encoding thread pool with max_workers threads, created once
+def _get_executor(max_workers):
+    with _models_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="local-embeddings")
+            _executors[max_workers] = executor
+        return executor
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Embeddings computed on the CPU by a sentence-transformers model.
+
+    The model is loaded once per process on first use; documents are
+    encoded in batches of batch_size spread over a thread pool shared by
+    all instances (the model's native code releases the GIL), so no
+    network call is made.
+    """
+
+    def __init__(self, model_name=LOCAL_MODEL_NAME, runtime=LOCAL_RUNTIME, batch_size=LOCAL_BATCH_SIZE,
+                 max_workers=LOCAL_THREADS):
+        self.model_name = model_name
+        self.runtime = runtime
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+
+    def _encode(self, texts):
+        model = load_local_model(self.model_name, self.runtime)
+        return model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                            convert_to_numpy=True, show_progress_bar=False).tolist()
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if self.max_workers <= 1 or len(batches) <= 1:
+            results = [self._encode(batch) for batch in batches]
+        else:
+            results = list(_get_executor(self.max_workers).map(self._encode, batches))
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text):
+        return self._encode([text])[0]
+
+
+# Stable name of the model behind an embedding object, e.g. "openai:text-embedding-3-small"
+def describe_embedder(embedding):
+    inner = getattr(embedding, "embedding", None)
+    if isinstance(inner, Embeddings):
+        return describe_embedder(inner)  # CachedEmbeddings and similar wrappers
+    if isinstance(embedding, LocalEmbeddings):
+        return f"local:{embedding.model_name}"
+    model = getattr(embedding, "model", None) or getattr(embedding, "model_name", None)
+    if type(embedding).__name__ == "OpenAIEmbeddings":
+        return f"openai:{model}"
+    return f"{type(embedding).__name__}:{model}" if model else type(embedding).__name__
+
+
+# Records the embedder on a new (or empty) Chroma collection and raises if a populated
+# collection was built by a different one, so mixed vectors are never queried together
+def ensure_collection_embedder(vector_store, embedding):
+    embedder = describe_embedder(embedding)
+    collection = vector_store._collection
+    metadata = dict(collection.metadata or {})
+    recorded = metadata.get(EMBEDDER_METADATA_KEY)
+    if recorded == embedder:
+        return embedder
+    # An empty collection (new, or everything deleted) takes the current embedder;
+    # a populated one without the key was built before it existed, always with OpenAI
+    if collection.count() == 0 or (recorded is None and embedder == LEGACY_EMBEDDER):
+        metadata[EMBEDDER_METADATA_KEY] = embedder
+        collection.modify(metadata=metadata)
+        return embedder
+    raise EmbedderMismatchError(
+        f"Collection '{collection.name}' was built with {recorded or LEGACY_EMBEDDER} but is being opened "
+        f"with {embedder}; re-index it or switch GOPI_EMBEDDING_BACKEND back"
+    )
@@ -0,0 +1,359 @@
+# Persistent, content-addressed cache for document and query embeddings
+import os
+import re
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from langchain_core.embeddings import Embeddings
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.getenv("GOPI_EMBEDDING_CACHE_DIR", os.path.join(project_root, ".cache"))
+DEFAULT_CACHE_MAX_MB = float(os.getenv("GOPI_EMBEDDING_CACHE_MAX_MB", "512"))
+QUERY_CACHE_SIZE = int(os.getenv("GOPI_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("GOPI_QUERY_CACHE_TTL", "86400"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+# Cache key for a text under a given embedding model
+def embedding_cache_key(model, text):
+    return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+# Queries that differ only in surrounding or repeated whitespace share a cache entry
+def normalize_query(text):
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class SQLiteEmbeddingStore:
+    """
+    On-disk store of float32 vectors keyed by (model, sha256(text)).
+
+    Entries carry a last-access timestamp; once the stored vectors exceed
+    max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "embeddings.sqlite")
+        self.max_bytes = int(max_bytes if max_bytes is not None else DEFAULT_CACHE_MAX_MB * 1024 * 1024)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings(last_access)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        self._size = row[0]
+
+    # Returns {key: vector} for the keys found in the store
+    def get_many(self, keys):
+        found = {}
+        if not keys:
+            return found
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    # Stores vectors and evicts least recently used entries above the size cap
+    def put_many(self, items):
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                existing = self._conn.execute(
+                    f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE key IN ({placeholders})",
+                    [row[0] for row in batch]
+                ).fetchone()[0]
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", batch)
+                self._size += sum(len(row[1]) for row in batch) - existing
+            self._evict()
+            self._conn.commit()
+
+    # Deletes oldest entries until the store fits in max_bytes (caller holds the lock)
+    def _evict(self):
+        while self._size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                break
+            evicted = []
+            for key, length in rows:
+                if self._size <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                self._size -= length
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+
+    def size_bytes(self):
+        return self._size
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._size = 0
+
+
+class QueryEmbeddingCache:
+    """In-memory LRU of query vectors; entries expire after ttl seconds"""
+
+    def __init__(self, max_entries=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (vector, created_at)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, vector):
+        with self._lock:
+            self._entries[key] = (vector, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class QueryLog:
+    """
+    How often each query was asked, kept in SQLite so the most frequent
+    queries can be pre-embedded at the next startup. Counts are buffered in
+    memory and written every flush_every queries and at exit.
+    """
+
+    def __init__(self, path=None, flush_every=50):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "query_log.sqlite")
+        self.flush_every = flush_every
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_log ("
+            "query TEXT PRIMARY KEY, count INTEGER NOT NULL, last_seen REAL NOT NULL)"
+        )
+        self._conn.commit()
+        atexit.register(self.flush)
+
+    def record(self, query):
+        with self._lock:
+            self._pending[normalize_query(query)] += 1
+            if sum(self._pending.values()) < self.flush_every:
+                return
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            now = time.time()
+            self._conn.executemany(
+                "INSERT INTO query_log VALUES (?, ?, ?) ON CONFLICT(query) DO UPDATE SET "
+                "count = count + excluded.count, last_seen = excluded.last_seen",
+                [(query, count, now) for query, count in self._pending.items()]
+            )
+            self._conn.commit()
+            self._pending.clear()
+
+    # The n most frequently asked queries, most frequent first
+    def most_frequent(self, n):
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT query FROM query_log ORDER BY count DESC, last_seen DESC LIMIT ?", (n,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends texts missing from the cache to the
+    underlying model. Re-embedding unchanged chunks makes no API calls.
+
+    Query vectors are looked up in an in-memory LRU+TTL cache, then in the
+    on-disk store, before the model is called, so repeated questions skip
+    the embedding round trip. warm_up() pre-embeds known frequent queries.
+    """
+
+    def __init__(self, embedding, model_name, store=None, query_cache=None, query_log=None):
+        self.embedding = embedding
+        self.model_name = model_name
+        self.store = store if store is not None else get_embedding_store()
+        self.query_cache = query_cache if query_cache is not None else QueryEmbeddingCache()
+        self.query_log = query_log
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+        self.query_hits = 0
+        self.query_misses = 0
+
+    def embed_documents(self, texts):
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        cached = self.store.get_many(list(set(keys)))
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embedding.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self.store.put_many(new_items)
+            cached.update(new_items)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+            if missing:
+                self.api_calls += 1
+
+        return [cached[key] for key in keys]
+
+    # Texts of a batch that embed_documents would send to the model (each once)
+    def uncached_texts(self, texts):
+        keys = {embedding_cache_key(self.model_name, text): text for text in texts}
+        cached = self.store.get_many(list(keys))
+        return [text for key, text in keys.items() if key not in cached]
+
+    def _query_key(self, text):
+        return embedding_cache_key(f"{self.model_name}:query", normalize_query(text))
+
+    def embed_query(self, text):
+        if self.query_log is not None:
+            self.query_log.record(text)
+        key = self._query_key(text)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = self.store.get_many([key]).get(key)
+            if vector is None:
+                vector = self.embedding.embed_query(text)
+                self.store.put_many({key: vector})
+                with self._lock:
+                    self.query_misses += 1
+                    self.api_calls += 1
+                self.query_cache.set(key, vector)
+                return vector
+            self.query_cache.set(key, vector)
+        with self._lock:
+            self.query_hits += 1
+        return vector
+
+    # Loads query vectors into memory, embedding the ones not on disk in one batch.
+    # The batch goes through embed_documents, which for OpenAI models gives the same
+    # vectors as embed_query. Returns how many queries had to be embedded.
+    def warm_up(self, queries):
+        keys = {self._query_key(query): query for query in queries}
+        found = self.store.get_many(list(keys))
+        missing = {key: query for key, query in keys.items() if key not in found}
+        if missing:
+            vectors = self.embedding.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self.store.put_many(new_items)
+            found.update(new_items)
+            with self._lock:
+                self.api_calls += 1
+        for key, vector in found.items():
+            self.query_cache.set(key, vector)
+        return len(missing)
+
+    # Pre-embeds the top_n most frequent queries from the query log
+    def warm_up_from_log(self, top_n=100):
+        if self.query_log is None:
+            return 0
+        return self.warm_up(self.query_log.most_frequent(top_n))
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            query_total = self.query_hits + self.query_misses
+            return {
+                "model": self.model_name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "query_hits": self.query_hits,
+                "query_misses": self.query_misses,
+                "query_hit_rate": (self.query_hits / query_total) if query_total else 0.0,
+                "query_cache_entries": len(self.query_cache),
+                "api_calls": self.api_calls,
+                "store_bytes": self.store.size_bytes(),
+            }
+
+
+_store = None
+_query_log = None
+_store_lock = threading.Lock()
+
+
+# Returns the process-wide on-disk embedding store
+def get_embedding_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SQLiteEmbeddingStore()
+    return _store
+
+
+# Returns the process-wide query log
+def get_query_log():
+    global _query_log
+    if _query_log is None:
+        with _store_lock:
+            if _query_log is None:
+                _query_log = QueryLog()
+    return _query_log
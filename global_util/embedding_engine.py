@@ -0,0 +1,170 @@
+# Batched, concurrent embedding pipeline with rate-limit-aware scheduling
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from global_util.tokens import count_tokens
+
+# Provider limits and pipeline sizing (override with env vars or constructor args)
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("GOPI_EMBED_CONCURRENCY", "4"))
+DEFAULT_BATCH_TOKENS = int(os.getenv("GOPI_EMBED_BATCH_TOKENS", "8000"))
+DEFAULT_BATCH_SIZE = int(os.getenv("GOPI_EMBED_BATCH_SIZE", "256"))
+DEFAULT_RPM = int(os.getenv("GOPI_EMBED_RPM", "3000"))
+DEFAULT_TPM = int(os.getenv("GOPI_EMBED_TPM", "1000000"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute.
+    acquire() blocks until the requested amount is available.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        # A single request larger than the bucket can never fit; clamp it
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait_seconds = (amount - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+# Writes precomputed embeddings into a vector store (upsert by id)
+def upsert_embeddings(vector_store, ids, texts, embeddings, metadatas=None):
+    metadatas = metadatas or [None] * len(ids)
+    # Chroma rejects empty metadata dicts, None is accepted
+    metadatas = [metadata or None for metadata in metadatas]
+    vector_store._collection.upsert(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+
+
+class EmbeddingEngine:
+    """
+    Splits texts into token-budgeted batches, embeds them on a bounded
+    thread pool under requests/tokens-per-minute limits, and streams each
+    finished batch to the caller (or straight into a vector store).
+    """
+
+    def __init__(self, embedding, max_concurrency=DEFAULT_MAX_CONCURRENCY, max_batch_tokens=DEFAULT_BATCH_TOKENS,
+                 max_batch_size=DEFAULT_BATCH_SIZE, requests_per_minute=DEFAULT_RPM, tokens_per_minute=DEFAULT_TPM):
+        self.embedding = embedding
+        self.max_concurrency = max_concurrency
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._stats = {"chunks": 0, "batches": 0, "tokens": 0, "seconds": 0.0}
+
+    # Groups text indexes into batches under the token and size budgets
+    def make_batches(self, texts):
+        batches = []
+        current, current_tokens = [], 0
+        for index, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_size):
+                batches.append((current, current_tokens))
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            batches.append((current, current_tokens))
+        return batches
+
+    # Only texts that reach the API count against the limits; with a cached embedding
+    # a batch served entirely from the cache costs nothing
+    def _embed_batch(self, texts, tokens):
+        uncached_texts = getattr(self.embedding, "uncached_texts", None)
+        if uncached_texts is not None:
+            sent = uncached_texts(texts)
+            if len(sent) < len(texts):
+                tokens = sum(count_tokens(text) for text in sent)
+        else:
+            sent = texts
+        if sent:
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(tokens)
+        return self.embedding.embed_documents(texts)
+
+    # Yields (indexes, vectors) for each batch as soon as it finishes
+    def embed_stream(self, texts):
+        texts = list(texts)
+        batches = self.make_batches(texts)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending = {}
+            batch_iter = iter(batches)
+
+            # Keep at most max_concurrency batches in flight
+            def submit_next():
+                batch = next(batch_iter, None)
+                if batch is None:
+                    return False
+                indexes, tokens = batch
+                future = executor.submit(self._embed_batch, [texts[i] for i in indexes], tokens)
+                pending[future] = (indexes, tokens)
+                return True
+
+            for _ in range(self.max_concurrency):
+                if not submit_next():
+                    break
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    indexes, tokens = pending.pop(future)
+                    vectors = future.result()
+                    with self._lock:
+                        self._stats["chunks"] += len(indexes)
+                        self._stats["batches"] += 1
+                        self._stats["tokens"] += tokens
+                    submit_next()
+                    yield indexes, vectors
+
+        with self._lock:
+            self._stats["seconds"] += time.perf_counter() - started
+
+    # Embeds all texts and returns vectors in input order
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = [None] * len(texts)
+        for indexes, batch_vectors in self.embed_stream(texts):
+            for index, vector in zip(indexes, batch_vectors):
+                vectors[index] = vector
+        return vectors
+
+    # Embeds documents and upserts each batch into the vector store as it completes
+    def ingest(self, vector_store, documents, ids=None):
+        documents = list(documents)
+        texts = [doc.page_content for doc in documents]
+        ids = ids or [str(uuid.uuid4()) for _ in documents]
+        for indexes, vectors in self.embed_stream(texts):
+            upsert_embeddings(
+                vector_store,
+                ids=[ids[i] for i in indexes],
+                texts=[texts[i] for i in indexes],
+                embeddings=vectors,
+                metadatas=[documents[i].metadata for i in indexes],
+            )
+        return ids
+
+    # Throughput counters across all runs of this engine
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["chunks_per_second"] = (stats["chunks"] / stats["seconds"]) if stats["seconds"] else 0.0
+        stats["max_concurrency"] = self.max_concurrency
+        return stats
@@ -1,8 +1,18 @@
 import os, re, json, dotenv
-from langchain_openai import ChatOpenAI
 from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
 import time
+from global_util.llm_pool import get_llm_pool
+from global_util.embedding_cache import CachedEmbeddings, get_query_log
+from global_util.embedding_engine import EmbeddingEngine
+from global_util.embedding_backends import DEFAULT_BACKEND, LocalEmbeddings, describe_embedder, ensure_collection_embedder
+from global_util.retry import RetryPolicy, CircuitBreaker
+from global_util.response_cache import ResponseCache, SQLiteCacheBackend
+from global_util.incremental_index import IncrementalIndexer, IndexManifest, file_sha256
+from global_util.keyword_index import get_keyword_index, keyword_index_dir
+from global_util.pdf_pipeline import iter_pdf_chunks
+from global_util.vector_store_registry import open_vector_store
+import logging
+import threading
 
 # Load Keys from .env file in global_util directory
 env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -11,7 +21,10 @@ dotenv.load_dotenv(env_path)
 
 api_key = os.getenv("OPENAI_API_KEY")
 #print(f"API Key loaded: {api_key[:10] if api_key else 'None'}")
+# OpenAI-compatible endpoint for LLM and embedding calls (e.g. a proxy or the local benchmark server)
+base_url = os.getenv("OPENAI_BASE_URL") or None
 model_name = "gpt-3.5-turbo"
+embedding_model_name = "text-embedding-3-small"
 
 # Get OpenAI API key
 def get_openai_api_key():
@@ -27,67 +40,219 @@ def get_huggingface_api_key():
 
 
 
-# Creates an LLM object and returns it
-def get_llm():
-    llm = ChatOpenAI(temperature=0.3, model_name=model_name, openai_api_key=api_key)
+# Returns a pooled LLM object (one shared client per model/temperature/key)
+def get_llm(temperature=0.3, model=None):
+    llm = get_llm_pool().get(model or model_name, temperature, api_key, base_url)
     return llm
 
+# Returns pool hit/reuse counters for the shared LLM clients
+def get_llm_pool_stats():
+    return get_llm_pool().stats()
+
 # Creates an embedding object and returns it
-def get_embedding():
-    embedding = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key=api_key)
+# backend is "openai" or "local" (CPU sentence-transformers model); defaults to GOPI_EMBEDDING_BACKEND
+# cached=True wraps it with the on-disk cache so unchanged text is never re-embedded,
+# and repeated queries are answered from the query cache without an API call
+def get_embedding(cached=False, backend=None):
+    backend = (backend or DEFAULT_BACKEND).lower()
+    if backend == "local":
+        embedding = LocalEmbeddings()
+        if cached:
+            embedding = CachedEmbeddings(embedding, describe_embedder(embedding), query_log=get_query_log())
+        return embedding
+    if backend != "openai":
+        raise ValueError(f"Unknown embedding backend: {backend} (expected 'openai' or 'local')")
+
+    if base_url:
+        # Custom endpoints get plain strings; token-level chunking needs OpenAI's tokenizer files
+        embedding = OpenAIEmbeddings(model=embedding_model_name, openai_api_key=api_key,
+                                     base_url=base_url, check_embedding_ctx_length=False)
+    else:
+        embedding = OpenAIEmbeddings(model=embedding_model_name, openai_api_key=api_key)
+    if cached:
+        embedding = CachedEmbeddings(embedding, embedding_model_name, query_log=get_query_log())
     return embedding
 
+# Pre-embeds the most frequent logged queries into a cached embedding's query cache.
+# top_n defaults to GOPI_QUERY_WARMUP (0 disables); runs in a daemon thread unless background=False
+def warm_up_query_cache(embedding, top_n=None, background=True):
+    top_n = int(os.getenv("GOPI_QUERY_WARMUP", "100")) if top_n is None else top_n
+    if top_n <= 0 or not isinstance(embedding, CachedEmbeddings):
+        return
+
+    def warm_up():
+        try:
+            embedded = embedding.warm_up_from_log(top_n)
+            logging.info(f"Query cache warmed up ({embedded} queries embedded)")
+        except Exception as e:
+            logging.warning(f"Query cache warm-up failed: {e}")
+
+    if background:
+        threading.Thread(target=warm_up, daemon=True).start()
+    else:
+        warm_up()
+
+# Creates a batched, rate-limited embedding engine (defaults to the cached embedding)
+def get_embedding_engine(embedding=None, **kwargs):
+    return EmbeddingEngine(embedding or get_embedding(cached=True), **kwargs)
+
 # Creates a response from the LLM and returns it
 def get_llm_response(prompt):
     messages = [{"role": "user", "content": prompt}]
     response = get_llm().invoke(messages)
     return response.content
 
+# Streams the response from the LLM, yielding text chunks as they arrive
+def stream_llm_response(prompt):
+    messages = [{"role": "user", "content": prompt}]
+    for chunk in get_llm().stream(messages):
+        if chunk.content:
+            yield chunk.content
+
+# Async version of stream_llm_response for async callers (async iterator of text chunks)
+async def astream_llm_response(prompt):
+    messages = [{"role": "user", "content": prompt}]
+    async for chunk in get_llm().astream(messages):
+        if chunk.content:
+            yield chunk.content
+
+# Shared response cache for get_cached_llm_response (exact match only until configured otherwise)
+response_cache = ResponseCache(ttl=3600, max_entries=1000)
+
+# Replaces the shared response cache
+# persist=True keeps entries in SQLite across runs, semantic=True also matches similar prompts
+def configure_response_cache(ttl=3600, max_entries=1000, persist=False, semantic=False, similarity_threshold=0.95):
+    global response_cache
+    response_cache = ResponseCache(
+        ttl=ttl,
+        max_entries=max_entries,
+        backend=SQLiteCacheBackend() if persist else None,
+        embedding=get_embedding() if semantic else None,
+        similarity_threshold=similarity_threshold
+    )
+    return response_cache
+
+# Creates a response from the LLM, served from the response cache when possible
+def get_cached_llm_response(prompt):
+    return response_cache.get_or_compute(prompt, get_llm_response)
+
+# Returns hit rate and latency saved by the response cache
+def get_response_cache_stats():
+    return response_cache.stats()
+
+# Shared retry policy for LLM calls: backoff with jitter, 60s deadline, breaker after 5 failures
+llm_retry_policy = RetryPolicy(max_retries=3, base_delay=0.5, max_delay=20.0, deadline=60.0,
+                               breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30.0))
+
 # Creates a response from the LLM and returns it with retry
-def get_llm_response_with_retry(prompt, max_retries=3):
-    for i in range(max_retries):
-        try:
-            return get_llm_response(prompt)
-        except Exception as e:
-            print(f"Error: {e}")
-            time.sleep(1)
-    return None
+# max_retries is the total number of attempts, as before the retry policy existed
+# Returns None if the call fails (fatal error, retries exhausted, deadline hit or circuit open)
+def get_llm_response_with_retry(prompt, max_retries=3, deadline=None):
+    # The retry policy owns retries, so use a client with the SDK's own retries disabled
+    llm = get_llm_pool().get(model_name, 0.3, api_key, base_url, max_retries=0)
+    messages = [{"role": "user", "content": prompt}]
+    try:
+        # Each attempt's request timeout is the time left before the deadline
+        response = llm_retry_policy.call(llm.invoke, messages, max_retries=max(max_retries - 1, 0),
+                                         deadline=deadline, timeout_arg="timeout")
+    except Exception as e:
+        logging.error(f"LLM call failed: {e}")
+        return None
+    return response.content
+
+# Invokes a pooled LLM under the shared retry policy and returns the message
+# Unlike get_llm_response_with_retry, failures are raised to the caller
+def invoke_llm_with_retry(prompt, temperature=0.3, model=None, deadline=None):
+    # The retry policy owns retries, so use a client with the SDK's own retries disabled
+    llm = get_llm_pool().get(model or model_name, temperature, api_key, base_url, max_retries=0)
+    return llm_retry_policy.call(llm.invoke, prompt, deadline=deadline, timeout_arg="timeout")
+
+# Returns retry counters, latency percentiles and circuit breaker state for LLM calls
+def get_llm_retry_metrics():
+    return llm_retry_policy.metrics()
 
 # Creates or loads Chroma DB for documents
-def create_or_load_chroma_db(docs, db_name="chroma_db", collection_name="default_collection"):
+def create_or_load_chroma_db(docs, db_name="chroma_db", collection_name="default_collection", backend=None):
     """
-    Creates a new Chroma DB or loads existing one from EdurekaExercises folder
+    Creates a new Chroma DB or loads existing one from EdurekaExercises folder.
+    The collection is synced incrementally with docs: only added or changed
+    chunks are embedded, chunks from changed or removed sources are deleted.
+    A BM25 keyword index of the collection is kept up to date alongside it
+    (see get_chroma_keyword_index).
     
     Args:
-        docs: List of documents to store (for new DB creation)
+        docs: List of documents to store (None or empty just loads the DB)
         db_name: Name of the database directory
         collection_name: Name of the collection within the database
+        backend: "chroma" or "quantized" (int8, memory-mapped); defaults to GOPI_VECTOR_BACKEND
     
     Returns:
-        Chroma vector store object
+        Chroma (or QuantizedVectorStore) vector store object
     """
     # Create Chroma DB in Edureka Exercises folder
-    persist_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), db_name)
+    persist_dir = get_chroma_persist_dir(db_name)
     
-    # Check if Chroma DB already exists
     if os.path.exists(persist_dir):
         print(f"Loading existing Chroma DB from: {persist_dir}")
-        vector_store = Chroma(
-            persist_directory=persist_dir,
-            embedding_function=get_embedding(),
-            collection_name=collection_name
-        )
     else:
         print(f"Creating new Chroma DB at: {persist_dir}")
-        vector_store = Chroma.from_documents(
-            docs, 
-            embedding=get_embedding(), 
-            collection_name=collection_name,
-            persist_directory=persist_dir
-        )
+
+    embedding = get_embedding(cached=True)
+    vector_store = open_vector_store(persist_dir, embedding, collection_name, backend)
+    ensure_collection_embedder(vector_store, embedding) # Raises if the collection was built by another embedder
+
+    keyword_index = get_keyword_index(keyword_index_dir(persist_dir, collection_name))
+    if docs:
+        # Embed only the diff against the manifest, in concurrent batches
+        indexer = IncrementalIndexer(vector_store, persist_dir, collection_name,
+                                     get_embedding_engine(embedding), keyword_index=keyword_index)
+        stats = indexer.sync(docs)
+        print(f"Index sync: {stats['added']} added, {stats['deleted']} deleted, "
+              f"{stats['unchanged']} unchanged in {stats['seconds']:.1f}s")
+    elif not len(keyword_index):
+        # Collection built before keyword indexing existed: backfill from the stored chunks
+        keyword_index.sync_with(vector_store)
     
     return vector_store
 
+# Opens the collection built from one PDF. When the PDF changed (or was never indexed) its pages
+# are extracted in parallel worker processes, split as they arrive and embedded/upserted in
+# batches, so memory stays bounded by the batch size rather than the manual size
+def create_or_load_chroma_db_from_pdf(pdf_path, db_name="chroma_db", collection_name="default_collection",
+                                      chunk_size=1000, chunk_overlap=200, max_workers=None, backend=None):
+    persist_dir = get_chroma_persist_dir(db_name)
+    if IndexManifest(persist_dir).is_current(collection_name, pdf_path):
+        print(f"Index is up to date with {pdf_path}, skipping parse")
+        return create_or_load_chroma_db(None, db_name=db_name, collection_name=collection_name, backend=backend)
+
+    vector_store = create_or_load_chroma_db(None, db_name=db_name, collection_name=collection_name, backend=backend)
+    embedding = vector_store.embeddings
+    keyword_index = get_keyword_index(keyword_index_dir(persist_dir, collection_name))
+    indexer = IncrementalIndexer(vector_store, persist_dir, collection_name,
+                                 get_embedding_engine(embedding), keyword_index=keyword_index)
+
+    started = time.perf_counter()
+    file_hash = file_sha256(pdf_path) # Hashed before reading so a concurrent edit is re-indexed next time
+    chunks = iter_pdf_chunks(pdf_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap, max_workers=max_workers)
+    stats = indexer.sync_source(pdf_path, chunks, file_hash=file_hash)
+    for source in list(indexer.manifest.sources(collection_name)):
+        if source != pdf_path:
+            indexer.remove_missing_source(source, stats)
+    indexer.finish(stats)
+    print(f"Index sync: {stats['added']} added, {stats['deleted']} deleted, "
+          f"{stats['unchanged']} unchanged in {time.perf_counter() - started:.1f}s")
+    return vector_store
+
+# BM25 keyword index kept next to a collection by create_or_load_chroma_db.
+# search(query, k) returns [(chunk_id, score)] locally, without an embedding call;
+# keyword_index.documents_by_id(vector_store, ids) turns the IDs back into Documents
+def get_chroma_keyword_index(db_name="chroma_db", collection_name="default_collection"):
+    return get_keyword_index(keyword_index_dir(get_chroma_persist_dir(db_name), collection_name))
+
+# Directory where a Chroma DB with the given name is persisted
+def get_chroma_persist_dir(db_name="chroma_db"):
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), db_name)
+
 from price_parser import Price
 import re
 # Extracts a numerical amount from a string using the price-parser library.
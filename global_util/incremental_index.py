@@ -0,0 +1,202 @@
+# Incremental, manifest-based indexing of documents into a vector store
+import os
+import json
+import time
+import hashlib
+import threading
+
+MANIFEST_NAME = "index_manifest.json"
+UPSERT_BATCH_SIZE = 256
+
+
+# sha256 of a file's bytes, or None if the file does not exist
+def file_sha256(path):
+    if not path or not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Deterministic ID for a chunk: hash of source, text and metadata, plus an
+# occurrence counter for identical chunks within the same source
+def chunk_id(source, doc, occurrence=0):
+    metadata = json.dumps(doc.metadata, sort_keys=True, default=str)
+    digest = hashlib.sha256(f"{source}\0{doc.page_content}\0{metadata}".encode("utf-8")).hexdigest()
+    return digest if occurrence == 0 else f"{digest}-{occurrence}"
+
+
+class IndexManifest:
+    """
+    JSON manifest kept next to the vector store. For every collection it
+    records each source's file hash and the IDs of the chunks indexed from it.
+    """
+
+    def __init__(self, persist_dir):
+        self.path = os.path.join(persist_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.data = {"collections": {}}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def has_collection(self, collection_name):
+        return collection_name in self.data["collections"]
+
+    def sources(self, collection_name):
+        return self.data["collections"].setdefault(collection_name, {"sources": {}})["sources"]
+
+    def get_source(self, collection_name, source):
+        return self.data["collections"].get(collection_name, {"sources": {}})["sources"].get(source)
+
+    def set_source(self, collection_name, source, file_hash, chunk_ids):
+        with self._lock:
+            self.sources(collection_name)[source] = {
+                "file_hash": file_hash,
+                "chunk_ids": chunk_ids,
+                "indexed_at": time.time(),
+            }
+
+    # True if source was indexed into the collection and its file is unchanged since
+    def is_current(self, collection_name, source):
+        entry = self.get_source(collection_name, source)
+        return entry is not None and entry["file_hash"] is not None and entry["file_hash"] == file_sha256(source)
+
+    def remove_source(self, collection_name, source):
+        with self._lock:
+            self.sources(collection_name).pop(source, None)
+
+    # Writes the manifest atomically so a crash never leaves a half-written file
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+
+
+class IncrementalIndexer:
+    """
+    Keeps a vector store collection in sync with a set of source documents.
+
+    Only chunks whose content (or metadata) changed are embedded and
+    upserted; chunks that disappeared from a source, and sources that
+    disappeared altogether, are deleted from the store. When a keyword
+    index is given it receives the same additions and deletions.
+    """
+
+    def __init__(self, vector_store, persist_dir, collection_name, engine, keyword_index=None):
+        self.vector_store = vector_store
+        self.collection_name = collection_name
+        self.engine = engine
+        self.keyword_index = keyword_index
+        self.manifest = IndexManifest(persist_dir)
+        self._legacy_ids = None
+        # Collections built before the manifest existed have random IDs; they
+        # are replaced by deterministic ones on the first sync
+        if not self.manifest.has_collection(collection_name):
+            existing = vector_store.get(include=[])["ids"]
+            self._legacy_ids = set(existing)
+
+    # True if the source file is unchanged since it was last indexed
+    def is_source_current(self, source):
+        return self.manifest.is_current(self.collection_name, source)
+
+    def _known_ids(self):
+        ids = set()
+        for entry in self.manifest.sources(self.collection_name).values():
+            ids.update(entry["chunk_ids"])
+        return ids
+
+    def _delete(self, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+            self.vector_store.delete(ids=ids[start:start + UPSERT_BATCH_SIZE])
+        if self.keyword_index is not None and ids:
+            self.keyword_index.remove(ids)
+
+    def _flush(self, batch, known_ids, stats):
+        new_docs = [doc for doc_id, doc in batch if doc_id not in known_ids]
+        new_ids = [doc_id for doc_id, doc in batch if doc_id not in known_ids]
+        if new_docs:
+            self.engine.ingest(self.vector_store, new_docs, ids=new_ids)
+        if self.keyword_index is not None:
+            # Unchanged chunks are added too when the keyword index is new or was lost
+            missing = [(doc_id, doc) for doc_id, doc in batch if doc_id not in self.keyword_index]
+            if missing:
+                self.keyword_index.add_many([doc_id for doc_id, _ in missing],
+                                            [doc.page_content for _, doc in missing])
+        stats["added"] += len(new_docs)
+        stats["unchanged"] += len(batch) - len(new_docs)
+
+    # Syncs one source from an iterable of its chunks (consumed in batches)
+    def sync_source(self, source, docs, file_hash=None, stats=None):
+        stats = stats if stats is not None else {"added": 0, "deleted": 0, "unchanged": 0}
+        entry = self.manifest.get_source(self.collection_name, source)
+        old_ids = set(entry["chunk_ids"]) if entry else set()
+        known_ids = self._known_ids() | (self._legacy_ids or set())
+
+        chunk_ids, occurrences, batch = [], {}, []
+        for doc in docs:
+            base_id = chunk_id(source, doc)
+            occurrence = occurrences.get(base_id, 0)
+            occurrences[base_id] = occurrence + 1
+            doc_id = chunk_id(source, doc, occurrence)
+            chunk_ids.append(doc_id)
+            batch.append((doc_id, doc))
+            if len(batch) >= UPSERT_BATCH_SIZE:
+                self._flush(batch, known_ids, stats)
+                batch = []
+        if batch:
+            self._flush(batch, known_ids, stats)
+
+        stale_ids = old_ids - set(chunk_ids)
+        self._delete(stale_ids)
+        stats["deleted"] += len(stale_ids)
+
+        file_hash = file_hash if file_hash is not None else file_sha256(source)
+        self.manifest.set_source(self.collection_name, source, file_hash, chunk_ids)
+        return stats
+
+    # Syncs the collection with docs, grouped by their "source" metadata
+    def sync(self, docs, remove_missing=True):
+        started = time.perf_counter()
+        stats = {"added": 0, "deleted": 0, "unchanged": 0}
+
+        by_source = {}
+        for doc in docs:
+            by_source.setdefault(doc.metadata.get("source", "unknown"), []).append(doc)
+
+        for source, source_docs in by_source.items():
+            self.sync_source(source, source_docs, stats=stats)
+
+        if remove_missing:
+            for source in list(self.manifest.sources(self.collection_name)):
+                if source not in by_source:
+                    self.remove_missing_source(source, stats)
+
+        self.finish(stats)
+        stats["seconds"] = time.perf_counter() - started
+        return stats
+
+    # Deletes every chunk of a source that is no longer part of the corpus
+    def remove_missing_source(self, source, stats):
+        entry = self.manifest.get_source(self.collection_name, source)
+        if entry:
+            self._delete(entry["chunk_ids"])
+            stats["deleted"] += len(entry["chunk_ids"])
+        self.manifest.remove_source(self.collection_name, source)
+
+    # Drops leftover legacy chunks and persists the manifest (and keyword index)
+    def finish(self, stats):
+        if self._legacy_ids:
+            stale_ids = self._legacy_ids - self._known_ids()
+            self._delete(stale_ids)
+            stats["deleted"] += len(stale_ids)
+            self._legacy_ids = None
+        self.manifest.save()
+        if self.keyword_index is not None:
+            self.keyword_index.save()
@@ -0,0 +1,452 @@
+# Persistent BM25 keyword index kept next to a vector store collection
+import os
+import json
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+from langchain_core.documents import Document
+
+from global_util.bm25 import BM25Index, tokenize
+
+# Sub-directory of a vector store's persist directory that holds the keyword indexes
+KEYWORD_INDEX_DIR = "bm25"
+META_NAME = "meta.json"
+LOCK_NAME = ".lock"
+# The delta log is merged into a new generation once it holds this share of the indexed documents
+COMPACT_RATIO = 0.25
+COMPACT_MIN_OPS = 1000
+_ARRAYS = ("offsets", "postings_docs", "postings_tf", "doc_lengths")
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+# Exclusive lock on a file, shared by threads and processes (fcntl on POSIX, msvcrt on Windows)
+@contextmanager
+def _file_lock(path):
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# Directory of the keyword index that belongs to a collection
+def keyword_index_dir(persist_dir, collection_name=None):
+    return os.path.join(persist_dir, KEYWORD_INDEX_DIR, collection_name or "langchain")
+
+
+class KeywordIndex:
+    """
+    BM25 index persisted as numpy arrays in a directory.
+
+    On load the postings are opened as read-only memory maps, so a large
+    index opens instantly and only the pages a query touches are read.
+    Updates since the saved generation live in a small overlay (an
+    in-memory BM25Index of added documents plus a mask of retired base
+    documents) that searches combine with the mapped postings; the base is
+    never loaded into memory. save() appends updates to a delta log, so a
+    save costs the size of the update, not of the index. Once the log holds
+    more than COMPACT_RATIO of the indexed documents (and at least
+    COMPACT_MIN_OPS operations) it is merged into a new generation of arrays.
+
+    Saves hold a lock file and first replay what other processes appended,
+    so several writers (the Streamlit app and batch screening) never lose
+    each other's updates; readers replay new log entries on their next search.
+    """
+
+    def __init__(self, directory, k1=1.5, b=0.75):
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._mapped = None     # memory-mapped arrays of the last saved generation
+        self._doc_index = None
+        self._overlay = BM25Index(k1, b)  # documents added on top of the saved generation
+        self._base_alive = None # bool per base document once some were removed or replaced
+        self._dead_count = 0
+        self._dead_length = 0
+        self._meta_mtime = None
+        self._delta_offset = 0  # bytes of the generation's delta log already applied
+        self._delta_ops = 0     # operations in the generation's delta log
+        self._pending = []      # operations not saved yet
+        self._load()
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.directory, META_NAME)
+
+    def _array_path(self, name, generation):
+        return os.path.join(self.directory, f"{name}-{generation}.npy")
+
+    def _delta_path(self, generation):
+        return os.path.join(self.directory, f"delta-{generation}.jsonl")
+
+    @property
+    def _generation(self):
+        return self._mapped["generation"] if self._mapped else 0
+
+    # Opens the saved generation (if any) as memory maps, then replays its delta log and pending updates
+    def _load(self):
+        self._mapped = None
+        self._doc_index = None
+        self._overlay = BM25Index(self.k1, self.b)
+        self._base_alive = None
+        self._dead_count = 0
+        self._dead_length = 0
+        self._delta_offset = 0
+        self._delta_ops = 0
+        try:
+            self._meta_mtime = os.path.getmtime(self._meta_path)
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except OSError:
+            self._meta_mtime = None
+        else:
+            generation = meta["generation"]
+            arrays = {name: np.load(self._array_path(name, generation), mmap_mode="r") for name in _ARRAYS}
+            self._mapped = {
+                "generation": generation,
+                "doc_ids": meta["doc_ids"],
+                "terms": {term: i for i, term in enumerate(meta["terms"])},
+                "total_length": meta["total_length"],
+                **arrays,
+            }
+        self._read_delta()
+        if self._pending:
+            self._apply(self._pending)
+
+    # Applies delta log entries appended since the last read
+    def _read_delta(self):
+        try:
+            with open(self._delta_path(self._generation), "rb") as f:
+                f.seek(self._delta_offset)
+                data = f.read()
+        except OSError:
+            return
+        complete = data[:data.rfind(b"\n") + 1] # A line still being written is read next time
+        if not complete:
+            return
+        ops = [json.loads(line) for line in complete.decode("utf-8").splitlines() if line]
+        self._delta_offset += len(complete)
+        self._delta_ops += sum(len(op["remove"]) if "remove" in op else 1 for op in ops)
+        self._apply(ops)
+        if self._pending:
+            self._apply(self._pending) # Local updates stay on top of other processes' ones
+
+    def _apply(self, ops):
+        for op in ops:
+            if "add" in op:
+                self._retire_base(op["add"])
+                self._overlay.add_counts(op["add"], op["terms"])
+            elif "remove" in op:
+                for doc_id in op["remove"]:
+                    self._retire_base(doc_id)
+                    self._overlay.remove(doc_id)
+            elif op.get("clear"):
+                self._overlay = BM25Index(self.k1, self.b)
+                if self._mapped is not None:
+                    self._base_alive = np.zeros(len(self._mapped["doc_ids"]), dtype=bool)
+                    self._dead_count = len(self._mapped["doc_ids"])
+                    self._dead_length = self._mapped["total_length"]
+
+    # Hides a document of the saved generation (removed, or replaced by a newer version)
+    def _retire_base(self, doc_id):
+        if self._mapped is None:
+            return
+        i = self._mapped_doc_index().get(doc_id)
+        if i is None or (self._base_alive is not None and not self._base_alive[i]):
+            return
+        if self._base_alive is None:
+            self._base_alive = np.ones(len(self._mapped["doc_ids"]), dtype=bool)
+        self._base_alive[i] = False
+        self._dead_count += 1
+        self._dead_length += int(self._mapped["doc_lengths"][i])
+
+    # Picks up a new generation or delta log entries saved by another process
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self._meta_path)
+        except OSError:
+            mtime = None
+        if mtime != self._meta_mtime:
+            self._load()
+        else:
+            self._read_delta()
+
+    def _base_count(self):
+        return len(self._mapped["doc_ids"]) - self._dead_count if self._mapped else 0
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return self._base_count() + len(self._overlay)
+
+    def __contains__(self, doc_id):
+        with self._lock:
+            if doc_id in self._overlay:
+                return True
+            if self._mapped is None:
+                return False
+            i = self._mapped_doc_index().get(doc_id)
+            return i is not None and (self._base_alive is None or bool(self._base_alive[i]))
+
+    def _mapped_doc_index(self):
+        if self._doc_index is None:
+            self._doc_index = {doc_id: i for i, doc_id in enumerate(self._mapped["doc_ids"])}
+        return self._doc_index
+
+    # IDs of every indexed document (caller holds the lock)
+    def _doc_ids(self):
+        doc_ids = []
+        if self._mapped is not None:
+            doc_ids = self._mapped["doc_ids"]
+            if self._base_alive is not None:
+                doc_ids = [doc_id for doc_id, alive in zip(doc_ids, self._base_alive.tolist()) if alive]
+        return list(doc_ids) + list(self._overlay.doc_lengths)
+
+    def _update(self, ops):
+        self._apply(ops)
+        self._pending.extend(ops)
+
+    def add(self, doc_id, text):
+        self.add_many([doc_id], [text])
+
+    def add_many(self, ids, texts):
+        ops = [{"add": doc_id, "terms": dict(Counter(tokenize(text)))} for doc_id, text in zip(ids, texts)]
+        with self._lock:
+            self._update(ops)
+
+    def remove(self, ids):
+        with self._lock:
+            self._update([{"remove": list(ids)}])
+
+    def clear(self):
+        with self._lock:
+            self._update([{"clear": True}])
+
+    # Persists pending updates: appended to the delta log, merged into a new generation when it is large
+    def save(self):
+        with self._lock:
+            if not self._pending:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with _file_lock(os.path.join(self.directory, LOCK_NAME)):
+                self._refresh() # Other writers' updates first, ours stay on top
+                pending, self._pending = self._pending, []
+                if self._mapped is None:
+                    self._write_generation()
+                    return
+                with open(self._delta_path(self._generation), "ab") as f:
+                    f.write("".join(json.dumps(op) + "\n" for op in pending).encode("utf-8"))
+                    self._delta_offset = f.tell()
+                self._delta_ops += sum(len(op["remove"]) if "remove" in op else 1 for op in pending)
+                if self._delta_ops >= max(COMPACT_MIN_OPS, COMPACT_RATIO * len(self._mapped["doc_ids"])):
+                    self._write_generation()
+
+    # Merges the live base documents and the overlay into a new generation and removes the
+    # previous one (file lock held). Base postings are copied array slice by array slice
+    def _write_generation(self):
+        mapped, overlay = self._mapped, self._overlay
+        base_count = len(mapped["doc_ids"]) if mapped else 0
+        alive = self._base_alive if self._base_alive is not None else np.ones(base_count, dtype=bool)
+        # Old base position -> new position (-1 for retired documents); overlay documents follow
+        remap = np.full(base_count, -1, dtype=np.int64)
+        remap[alive] = np.arange(int(alive.sum()))
+        overlay_ids = list(overlay.doc_lengths)
+        doc_ids = [doc_id for doc_id, keep in zip(mapped["doc_ids"], alive.tolist()) if keep] if mapped else []
+        overlay_index = {doc_id: len(doc_ids) + i for i, doc_id in enumerate(overlay_ids)}
+        doc_ids += overlay_ids
+
+        terms = sorted(set(mapped["terms"] if mapped else ()) | set(overlay.postings))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        docs_parts, tf_parts = [], []
+        for i, term in enumerate(terms):
+            docs, frequencies = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            j = mapped["terms"].get(term) if mapped else None
+            if j is not None:
+                start, end = int(mapped["offsets"][j]), int(mapped["offsets"][j + 1])
+                docs = remap[np.asarray(mapped["postings_docs"][start:end])]
+                frequencies = np.asarray(mapped["postings_tf"][start:end])
+                keep = docs >= 0
+                docs, frequencies = docs[keep], frequencies[keep]
+            postings = overlay.postings.get(term)
+            if postings:
+                docs = np.concatenate([docs, [overlay_index[doc_id] for doc_id in postings]])
+                frequencies = np.concatenate([frequencies, list(postings.values())])
+            docs_parts.append(docs)
+            tf_parts.append(frequencies)
+            offsets[i + 1] = offsets[i] + len(docs)
+        # Terms whose documents were all removed keep an empty posting list until they are gone from
+        # the vocabulary; drop them here
+        used = np.diff(offsets) > 0
+        terms = [term for term, keep in zip(terms, used.tolist()) if keep]
+        offsets = np.concatenate([[0], np.cumsum(np.diff(offsets)[used])]).astype(np.int64)
+
+        base_lengths = np.asarray(mapped["doc_lengths"])[alive] if mapped else np.empty(0, dtype=np.int32)
+        arrays = {
+            "offsets": offsets,
+            "postings_docs": np.concatenate(docs_parts).astype(np.int32) if docs_parts else np.empty(0, dtype=np.int32),
+            "postings_tf": np.concatenate(tf_parts).astype(np.float32) if tf_parts else np.empty(0, dtype=np.float32),
+            "doc_lengths": np.concatenate([base_lengths, [overlay.doc_lengths[doc_id] for doc_id in overlay_ids]])
+                           .astype(np.int32),
+        }
+
+        previous = self._generation if mapped else None
+        generation = (previous or 0) + 1
+        for name, array in arrays.items():
+            np.save(self._array_path(name, generation), array)
+        meta = {
+            "generation": generation,
+            "k1": self.k1,
+            "b": self.b,
+            "total_length": int(arrays["doc_lengths"].sum()),
+            "doc_ids": doc_ids,
+            "terms": terms,
+        }
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+        # Open maps of the old generation stay valid after unlink
+        if previous is not None:
+            for path in [self._array_path(name, previous) for name in _ARRAYS] + [self._delta_path(previous)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._load()
+
+    # Returns [(doc_id, score)] best first; candidate_ids restricts scoring to a subset
+    def search(self, query, k=10, candidate_ids=None):
+        with self._lock:
+            self._refresh()
+            if self._mapped is None:
+                return self._overlay.search(query, k=k, candidate_ids=candidate_ids)
+            count = self._base_count() + len(self._overlay)
+            if not count:
+                return []
+            total_length = self._mapped["total_length"] - self._dead_length + self._overlay.total_length
+            return self._search_mapped(count, total_length, query, k, candidate_ids)
+
+    # BM25 over the mapped postings (minus retired documents) and the overlay, with collection
+    # statistics of the combined index (lock held)
+    def _search_mapped(self, count, total_length, query, k, candidate_ids):
+        mapped, alive, overlay = self._mapped, self._base_alive, self._overlay
+        doc_lengths = mapped["doc_lengths"]
+        average_length = total_length / count
+
+        def term_scores(frequencies, lengths, document_frequency):
+            idf = np.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+            length_norm = 1 - self.b + self.b * lengths / average_length
+            return idf * frequencies * (self.k1 + 1) / (frequencies + self.k1 * length_norm)
+
+        docs_parts, score_parts, overlay_scores = [], [], {}
+        for term in set(tokenize(query)):
+            i = mapped["terms"].get(term)
+            docs = np.empty(0, dtype=np.int32)
+            frequencies = np.empty(0, dtype=np.float32)
+            if i is not None:
+                start, end = int(mapped["offsets"][i]), int(mapped["offsets"][i + 1])
+                docs = np.asarray(mapped["postings_docs"][start:end])
+                frequencies = np.asarray(mapped["postings_tf"][start:end])
+                if alive is not None:
+                    keep = alive[docs]
+                    docs, frequencies = docs[keep], frequencies[keep]
+            postings = overlay.postings.get(term) or {}
+            document_frequency = len(docs) + len(postings)
+            if not document_frequency:
+                continue
+            if len(docs):
+                docs_parts.append(docs)
+                score_parts.append(term_scores(frequencies, doc_lengths[docs], document_frequency))
+            if postings:
+                overlay_ids = list(postings)
+                scores = term_scores(np.asarray(list(postings.values()), dtype=np.float64),
+                                     np.asarray([overlay.doc_lengths[doc_id] for doc_id in overlay_ids]),
+                                     document_frequency)
+                for doc_id, score in zip(overlay_ids, scores.tolist()):
+                    overlay_scores[doc_id] = overlay_scores.get(doc_id, 0.0) + score
+
+        results = []
+        if docs_parts:
+            docs = np.concatenate(docs_parts)
+            scores = np.concatenate(score_parts)
+            if candidate_ids is not None:
+                doc_index = self._mapped_doc_index()
+                allowed = np.asarray([doc_index[doc_id] for doc_id in candidate_ids if doc_id in doc_index],
+                                     dtype=np.int32)
+                keep = np.isin(docs, allowed)
+                docs, scores = docs[keep], scores[keep]
+            if len(docs):
+                unique_docs, inverse = np.unique(docs, return_inverse=True)
+                totals = np.bincount(inverse, weights=scores)
+                if len(totals) > k:
+                    top = np.argpartition(-totals, k - 1)[:k]
+                else:
+                    top = np.arange(len(totals))
+                top = top[np.lexsort((unique_docs[top], -totals[top]))]  # ties in index order
+                results = [(mapped["doc_ids"][int(unique_docs[i])], float(totals[i])) for i in top]
+        if overlay_scores:
+            if candidate_ids is not None:
+                overlay_scores = {doc_id: score for doc_id, score in overlay_scores.items() if doc_id in candidate_ids}
+            # sorted() is stable, so base documents win ties in index order, then overlay documents
+            results = sorted(results + list(overlay_scores.items()), key=lambda item: -item[1])
+        return results[:k]
+
+    # Brings the index in line with the documents currently in a vector store
+    def sync_with(self, vector_store, page_size=1000):
+        stored_ids = set()
+        offset = 0
+        while True:
+            page = vector_store.get(include=["documents"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            missing = [(doc_id, text) for doc_id, text in zip(page["ids"], page["documents"]) if doc_id not in self]
+            if missing:
+                self.add_many([doc_id for doc_id, _ in missing], [text or "" for _, text in missing])
+            stored_ids.update(page["ids"])
+            offset += len(page["ids"])
+        with self._lock:
+            indexed = self._doc_ids()
+        extra = [doc_id for doc_id in indexed if doc_id not in stored_ids]
+        if extra:
+            self.remove(extra)
+        self.save()
+
+
+# Returns the process-wide keyword index for a directory, loading it once
+def get_keyword_index(directory):
+    key = os.path.abspath(directory)
+    with _lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = KeywordIndex(key)
+            _indexes[key] = index
+        return index
+
+
+# Fetches stored chunks by ID from a vector store (local read, no embedding call)
+def documents_by_id(vector_store, ids, where=None):
+    if not ids:
+        return []
+    result = vector_store.get(ids=list(ids), where=where, include=["documents", "metadatas"])
+    return [
+        Document(page_content=text or "", metadata=metadata or {}, id=doc_id)
+        for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+    ]
@@ -0,0 +1,176 @@
+# Process-wide pool of LLM clients shared by all global_util consumers
+import os
+import asyncio
+import weakref
+import threading
+import httpx
+from langchain_openai import ChatOpenAI
+
+# Default connection pool sizing (override with env vars or configure_llm_pool)
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("GOPI_LLM_MAX_CONNECTIONS", "20"))
+DEFAULT_MAX_KEEPALIVE = int(os.getenv("GOPI_LLM_MAX_KEEPALIVE", "10"))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.getenv("GOPI_LLM_KEEPALIVE_EXPIRY", "60"))
+DEFAULT_TIMEOUT = float(os.getenv("GOPI_LLM_TIMEOUT", "60"))
+
+
+class LoopLocalAsyncClient(httpx.AsyncClient):
+    """
+    Async HTTP client that sends each request through a connection pool owned
+    by the running event loop. Connections of an httpx.AsyncClient belong to
+    the loop that opened them, so one shared pool breaks as soon as a second
+    loop (e.g. another asyncio.run()) uses it.
+    """
+
+    def __init__(self, limits, timeout):
+        super().__init__(limits=limits, timeout=timeout)
+        self._pool_limits = limits
+        self._pool_timeout = timeout
+        self._loop_clients = weakref.WeakKeyDictionary() # event loop -> httpx.AsyncClient
+        self._loop_clients_lock = threading.Lock()
+
+    def _loop_client(self):
+        loop = asyncio.get_running_loop()
+        with self._loop_clients_lock:
+            client = self._loop_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(limits=self._pool_limits, timeout=self._pool_timeout)
+                self._loop_clients[loop] = client
+            return client
+
+    async def send(self, request, **kwargs):
+        return await self._loop_client().send(request, **kwargs)
+
+    # Closes the running loop's connections; pools of other loops go away with their loop
+    async def aclose(self):
+        with self._loop_clients_lock:
+            client = self._loop_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+        await super().aclose()
+
+
+class LLMClientPool:
+    """
+    Thread-safe, lazily built registry of ChatOpenAI clients.
+
+    Clients are keyed by (model, temperature, api key, base url) and all of them
+    share one keep-alive HTTP connection pool, so repeated calls reuse open
+    TLS connections instead of building a new client per prompt. Async calls
+    share one connection pool per event loop.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive=DEFAULT_MAX_KEEPALIVE,
+                 keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY, timeout=DEFAULT_TIMEOUT):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._http_client = None
+        self._http_async_client = None
+        self._hits = 0
+        self._misses = 0
+        self._reuse = {}
+
+    def _limits(self):
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    # Shared sync/async HTTP clients, built on first use (caller holds the lock)
+    def _get_http_clients(self):
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self._limits(), timeout=self.timeout)
+            self._http_async_client = LoopLocalAsyncClient(self._limits(), self.timeout)
+        return self._http_client, self._http_async_client
+
+    # Returns the pooled client for the given settings, creating it on first use
+    def get(self, model, temperature, api_key, base_url=None, **kwargs):
+        key = (model, temperature, api_key, base_url, tuple(sorted(kwargs.items())))
+        client = self._clients.get(key)
+        if client is not None:
+            with self._lock:
+                self._hits += 1
+                self._reuse[key] = self._reuse.get(key, 0) + 1
+            return client
+
+        with self._lock:
+            # Another thread may have built it while we waited for the lock
+            client = self._clients.get(key)
+            if client is not None:
+                self._hits += 1
+                self._reuse[key] = self._reuse.get(key, 0) + 1
+                return client
+
+            http_client, http_async_client = self._get_http_clients()
+            client = ChatOpenAI(
+                temperature=temperature,
+                model_name=model,
+                openai_api_key=api_key,
+                openai_api_base=base_url,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                **kwargs
+            )
+            self._clients[key] = client
+            self._misses += 1
+            self._reuse[key] = 0
+            return client
+
+    # Counters showing how often pooled clients were reused
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            # Clients differing only in api key, base url or extra kwargs add up under one model@temperature
+            reuse_by_model = {}
+            for key, count in self._reuse.items():
+                label = f"{key[0]}@{key[1]}"
+                reuse_by_model[label] = reuse_by_model.get(label, 0) + count
+            return {
+                "clients": len(self._clients),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": (self._hits / total) if total else 0.0,
+                "reuse_by_model": reuse_by_model,
+                "max_connections": self.max_connections,
+                "max_keepalive": self.max_keepalive,
+            }
+
+    # Drops all clients and closes the shared connection pool
+    def close(self):
+        with self._lock:
+            self._clients.clear()
+            self._reuse.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+            # The async client is closed by the event loop that used it; just drop it here
+            self._http_client = None
+            self._http_async_client = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Returns the process-wide LLM client pool
+def get_llm_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = LLMClientPool()
+    return _pool
+
+
+# Replaces the process-wide pool with one using the given connection settings.
+# Clients already handed out by the old pool keep working on its connections, which are left
+# open; call this before the first get_llm() so every client uses the new settings
+def configure_llm_pool(max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive=DEFAULT_MAX_KEEPALIVE,
+                       keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY, timeout=DEFAULT_TIMEOUT):
+    global _pool
+    with _pool_lock:
+        _pool = LLMClientPool(max_connections, max_keepalive, keepalive_expiry, timeout)
+    return _pool
@@ -0,0 +1,69 @@
+# Page-parallel PDF extraction that streams chunks into incremental indexing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Pages extracted per worker task (override with GOPI_PDF_PAGES_PER_TASK)
+PAGES_PER_TASK = int(os.getenv("GOPI_PDF_PAGES_PER_TASK", "16"))
+# Worker processes for extraction; 0 uses one per CPU (override with GOPI_PDF_WORKERS)
+PDF_WORKERS = int(os.getenv("GOPI_PDF_WORKERS", "0"))
+
+
+def pdf_page_count(pdf_path):
+    from pypdf import PdfReader
+    return len(PdfReader(pdf_path).pages)
+
+
+# Extracts [(page_number, page_label, text)] for pages start..end-1 (runs in a worker process)
+def extract_page_range(pdf_path, start, end):
+    from pypdf import PdfReader
+    reader = PdfReader(pdf_path)
+    labels = reader.page_labels
+    return [
+        (number, labels[number], reader.pages[number].extract_text(extraction_mode="plain").strip())
+        for number in range(start, min(end, len(reader.pages)))
+    ]
+
+
+# Yields one Document per page, in page order, while later page ranges are still being extracted.
+# At most 2 * max_workers ranges are in flight, so memory stays bounded for any page count.
+def iter_pdf_pages(pdf_path, max_workers=None, pages_per_task=PAGES_PER_TASK):
+    total_pages = pdf_page_count(pdf_path)
+    ranges = [(start, start + pages_per_task) for start in range(0, total_pages, pages_per_task)]
+
+    def to_documents(pages):
+        for number, label, text in pages:
+            yield Document(
+                page_content=text,
+                metadata={"source": pdf_path, "total_pages": total_pages, "page": number, "page_label": label},
+            )
+
+    # With a single range or a single worker, extracting in this process is cheapest
+    max_workers = max_workers or PDF_WORKERS or os.cpu_count() or 1
+    if len(ranges) <= 1 or max_workers == 1:
+        for start, end in ranges:
+            yield from to_documents(extract_page_range(pdf_path, start, end))
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        range_iter = iter(ranges)
+        pending = []
+        for start, end in range_iter:
+            pending.append(executor.submit(extract_page_range, pdf_path, start, end))
+            if len(pending) >= 2 * max_workers:
+                break
+        while pending:
+            pages = pending.pop(0).result()
+            next_range = next(range_iter, None)
+            if next_range is not None:
+                pending.append(executor.submit(extract_page_range, pdf_path, *next_range))
+            yield from to_documents(pages)
+
+
+# Yields chunks of the PDF as pages arrive; same chunks as splitting the fully loaded document
+def iter_pdf_chunks(pdf_path, chunk_size=1000, chunk_overlap=200, max_workers=None):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    for page in iter_pdf_pages(pdf_path, max_workers=max_workers):
+        yield from splitter.split_documents([page])
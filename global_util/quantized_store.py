@@ -0,0 +1,402 @@
+# Int8-quantized, memory-mapped vector store (alternative backend to Chroma)
+import os
+import json
+import sqlite3
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+# Sub-directory of a persist directory that holds the quantized collections
+QUANTIZED_DIR = "quantized"
+# Candidates re-ranked exactly per requested result (override with GOPI_QUANTIZED_RERANK_FACTOR)
+RERANK_FACTOR = int(os.getenv("GOPI_QUANTIZED_RERANK_FACTOR", "8"))
+# Collections (or filtered subsets) up to this many rows are always searched exactly
+EXACT_THRESHOLD = int(os.getenv("GOPI_QUANTIZED_EXACT_THRESHOLD", "2048"))
+# Rows converted to float32 at a time during the coarse scan
+SCAN_BLOCK_ROWS = 16384
+# Files are compacted once this share of the rows are retired (override with GOPI_QUANTIZED_COMPACT_RATIO)
+COMPACT_RATIO = float(os.getenv("GOPI_QUANTIZED_COMPACT_RATIO", "0.2"))
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+# SQL condition (and parameters) for a Chroma-style metadata where clause
+def where_to_sql(where):
+    if not where:
+        return "1", []
+    if len(where) != 1:
+        # {"a": 1, "b": 2} means both conditions, as in Chroma
+        return where_to_sql({"$and": [{key: value} for key, value in where.items()]})
+    key, condition = next(iter(where.items()))
+    if key in ("$and", "$or"):
+        parts = [where_to_sql(clause) for clause in condition]
+        joiner = " AND " if key == "$and" else " OR "
+        return "(" + joiner.join(sql for sql, _ in parts) + ")", [param for _, params in parts for param in params]
+
+    path = '$."' + key.replace('"', '\\"') + '"'
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    operator, value = next(iter(condition.items()))
+    if operator in ("$in", "$nin"):
+        placeholders = ",".join("?" * len(value))
+        negate = "NOT " if operator == "$nin" else ""
+        return f"json_extract(metadata, ?) {negate}IN ({placeholders})", [path] + list(value)
+    if operator not in _OPERATORS:
+        raise ValueError(f"Unsupported where operator: {operator}")
+    return f"json_extract(metadata, ?) {_OPERATORS[operator]} ?", [path, value]
+
+
+class QuantizedCollection:
+    """
+    Vectors of one collection stored on disk and memory-mapped.
+
+    Every vector is L2-normalized and kept twice: int8 with a per-vector
+    scale (a quarter of the float32 size) for the coarse scan, and float32
+    for exact re-ranking, where only the candidate rows are read. IDs,
+    documents and metadata live in SQLite. Updates append rows and retire
+    the old ones; once compact_ratio of the rows are retired, compact()
+    rewrites the files without them, so re-uploads do not grow the files.
+    Only one process should write to a collection.
+
+    The method names follow chromadb's Collection (upsert, get, delete,
+    count, modify), so code written against Chroma works unchanged.
+    """
+
+    def __init__(self, directory, name, compact_ratio=COMPACT_RATIO):
+        self.directory = directory
+        self.name = name
+        self.compact_ratio = compact_ratio
+        self.compactions = 0 # Row numbers change on compaction; readers re-check this counter
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "store.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL, document TEXT, metadata TEXT, alive INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_rows_id ON rows(id, alive)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        self.dimensions = json.loads(meta["dimensions"]) if "dimensions" in meta else None
+        self._metadata = json.loads(meta["metadata"]) if "metadata" in meta else None
+        self._rows = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+        self._alive = np.zeros(self._rows, dtype=bool)
+        alive_rows = [row for (row,) in self._conn.execute("SELECT row FROM rows WHERE alive = 1")]
+        self._alive[alive_rows] = True
+        self._truncate_files()
+        self._maps = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # Drops bytes past the last committed row (left by a write interrupted before commit)
+    def _truncate_files(self):
+        if self.dimensions is None:
+            return
+        for name, row_bytes in (("vectors.i8", self.dimensions), ("scales.f32", 4), ("full.f32", 4 * self.dimensions)):
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > self._rows * row_bytes:
+                with open(path, "r+b") as f:
+                    f.truncate(self._rows * row_bytes)
+
+    # Read-only memory maps of the row files, rebuilt after rows were appended
+    def _get_maps(self):
+        maps = self._maps
+        if maps is not None and maps[0] == self._rows:
+            return maps
+        if self._rows == 0:
+            maps = (0, None, None, None)
+        else:
+            shape = (self._rows, self.dimensions)
+            maps = (
+                self._rows,
+                np.memmap(self._path("vectors.i8"), dtype=np.int8, mode="r", shape=shape),
+                np.memmap(self._path("scales.f32"), dtype=np.float32, mode="r", shape=(self._rows,)),
+                np.memmap(self._path("full.f32"), dtype=np.float32, mode="r", shape=shape),
+            )
+        self._maps = maps
+        return maps
+
+    def _save_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    @property
+    def metadata(self):
+        return self._metadata
+
+    def modify(self, name=None, metadata=None):
+        with self._lock:
+            if metadata is not None:
+                self._metadata = dict(metadata)
+                self._save_meta("metadata", self._metadata)
+                self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return int(self._alive.sum())
+
+    def _retire(self, ids):
+        rows = []
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows.extend(row for (row,) in self._conn.execute(
+                f"SELECT row FROM rows WHERE alive = 1 AND id IN ({placeholders})", batch
+            ))
+        if rows:
+            self._conn.executemany("UPDATE rows SET alive = 0 WHERE row = ?", [(row,) for row in rows])
+            self._alive[rows] = False
+        return len(rows)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        if not ids:
+            return
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        # The last occurrence of a repeated ID wins
+        latest = {doc_id: i for i, doc_id in enumerate(ids)}
+        order = sorted(latest.values())
+
+        vectors = np.asarray([embeddings[i] for i in order], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        quantized = np.round(vectors / np.where(scales == 0, 1.0, scales)[:, None]).astype(np.int8)
+
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = int(vectors.shape[1])
+                self._save_meta("dimensions", self.dimensions)
+            elif vectors.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {vectors.shape[1]}")
+
+            self._retire([ids[i] for i in order])
+            for name, array in (("vectors.i8", quantized), ("scales.f32", scales.astype(np.float32)),
+                                ("full.f32", vectors)):
+                with open(self._path(name), "ab") as f:
+                    f.write(array.tobytes())
+
+            first_row = self._rows
+            self._conn.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, 1)", [
+                (first_row + j, ids[i], documents[i], json.dumps(metadatas[i]) if metadatas[i] else None)
+                for j, i in enumerate(order)
+            ])
+            self._conn.commit()
+            self._rows += len(order)
+            self._alive = np.concatenate([self._alive, np.ones(len(order), dtype=bool)])
+            self._maybe_compact()
+
+    add = upsert
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if where is not None:
+                sql, params = where_to_sql(where)
+                matched = [doc_id for (doc_id,) in self._conn.execute(
+                    f"SELECT id FROM rows WHERE alive = 1 AND {sql}", params
+                )]
+                ids = [doc_id for doc_id in matched if ids is None or doc_id in set(ids)]
+            self._retire(list(ids or []))
+            self._conn.commit()
+            self._maybe_compact()
+
+    # Compacts when the share of retired rows passed compact_ratio
+    def _maybe_compact(self):
+        dead = self._rows - int(self._alive.sum())
+        if dead and dead >= self.compact_ratio * self._rows:
+            self.compact()
+
+    # Rows (SQL query results) matching ids/where, in insertion order
+    def _select(self, columns, ids=None, where=None, limit=None, offset=None):
+        sql, params = where_to_sql(where)
+        query = f"SELECT {columns} FROM rows WHERE alive = 1 AND {sql}"
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return []
+            query += f" AND id IN ({','.join('?' * len(ids))})"
+            params = params + ids
+        query += " ORDER BY row"
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params = params + [-1 if limit is None else limit, offset or 0]
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        include = list(include or [])
+        rows = self._select("row, id, document, metadata", ids, where, limit, offset)
+        result = {"ids": [row[1] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [row[2] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(row[3]) if row[3] else None for row in rows]
+        if "embeddings" in include:
+            _, _, _, full = self._get_maps()
+            result["embeddings"] = [full[row[0]].tolist() for row in rows]
+        return result
+
+    # Returns [(row, cosine similarity)] of the k nearest rows, best first
+    def search(self, vector, k=4, where=None, exact=False, rerank_factor=RERANK_FACTOR):
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+
+        with self._lock:
+            rows_count, quantized, scales, full = self._get_maps()
+            valid = self._alive[:rows_count].copy()
+            if where:
+                allowed = np.zeros(rows_count, dtype=bool)
+                allowed[[row for (row,) in self._select("row", where=where)]] = True
+                valid &= allowed
+        candidates = np.flatnonzero(valid)
+        if not len(candidates):
+            return []
+
+        rerank = max(k * rerank_factor, k)
+        if not exact and len(candidates) > max(rerank, EXACT_THRESHOLD):
+            candidates = self._coarse_candidates(query, quantized, scales, valid, rerank)
+
+        # Exact cosine on the candidates (or on every valid row for the exact fallback)
+        scores = np.asarray(full[candidates]) @ query
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    # Approximate scores from the int8 vectors, scanned block by block; returns the best rows
+    def _coarse_candidates(self, query, quantized, scales, valid, count):
+        best_rows, best_scores = [], []
+        for start in range(0, len(valid), SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, len(valid))
+            scores = (np.asarray(quantized[start:end], dtype=np.float32) @ query) * scales[start:end]
+            scores[~valid[start:end]] = -np.inf
+            if end - start > count:
+                keep = np.argpartition(-scores, count - 1)[:count]
+            else:
+                keep = np.arange(end - start)
+            best_rows.append(keep + start)
+            best_scores.append(scores[keep])
+        rows = np.concatenate(best_rows)
+        scores = np.concatenate(best_scores)
+        if len(rows) > count:
+            keep = np.argpartition(-scores, count - 1)[:count]
+            rows, scores = rows[keep], scores[keep]
+        return rows[np.isfinite(scores)]
+
+    # Row details for search results
+    def rows(self, row_numbers):
+        if not row_numbers:
+            return {}
+        placeholders = ",".join("?" * len(row_numbers))
+        with self._lock:
+            found = self._conn.execute(
+                f"SELECT row, id, document, metadata FROM rows WHERE row IN ({placeholders})", list(row_numbers)
+            ).fetchall()
+        return {row: (doc_id, document, json.loads(metadata) if metadata else {}) for row, doc_id, document, metadata in found}
+
+    # Rewrites the row files and table without retired rows; returns how many were dropped
+    def compact(self):
+        with self._lock:
+            rows_count, quantized, scales, full = self._get_maps()
+            keep = np.flatnonzero(self._alive[:rows_count])
+            dropped = rows_count - len(keep)
+            if dropped == 0:
+                return 0
+            for name, array in (("vectors.i8", quantized), ("scales.f32", scales), ("full.f32", full)):
+                tmp_path = self._path(name + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    for start in range(0, len(keep), SCAN_BLOCK_ROWS):
+                        f.write(np.asarray(array[keep[start:start + SCAN_BLOCK_ROWS]]).tobytes())
+            self._maps = None
+            quantized = scales = full = None
+            for name in ("vectors.i8", "scales.f32", "full.f32"):
+                os.replace(self._path(name + ".tmp"), self._path(name))
+
+            self._conn.execute("DELETE FROM rows WHERE alive = 0")
+            self._conn.executemany("UPDATE rows SET row = ? WHERE row = ?",
+                                   [(new, int(old)) for new, old in enumerate(keep)])
+            self._conn.commit()
+            self._rows = len(keep)
+            self._alive = np.ones(self._rows, dtype=bool)
+            self.compactions += 1
+            return dropped
+
+
+class QuantizedVectorStore(VectorStore):
+    """
+    LangChain vector store over a QuantizedCollection.
+
+    Searches scan the int8 vectors for rerank_factor * k candidates and
+    re-rank them with exact cosine similarity; small collections, small
+    filtered subsets and exact=True use exact cosine over every row.
+    Scores are cosine distances (lower is closer), like Chroma's.
+    """
+
+    def __init__(self, persist_directory, embedding_function, collection_name="langchain", rerank_factor=RERANK_FACTOR):
+        self._embedding_function = embedding_function
+        self.rerank_factor = rerank_factor
+        self._collection = QuantizedCollection(
+            os.path.join(persist_directory, QUANTIZED_DIR, collection_name), collection_name
+        )
+
+    @property
+    def embeddings(self):
+        return self._embedding_function
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        vectors = self._embedding_function.embed_documents(texts)
+        self._collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        self._collection.delete(ids=ids, where=kwargs.get("where"))
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        return self._collection.get(ids=ids, where=where, limit=limit, offset=offset, include=include)
+
+    def get_by_ids(self, ids):
+        result = self.get(ids=ids)
+        return [Document(page_content=text or "", metadata=metadata or {}, id=doc_id)
+                for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])]
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None, exact=False, **kwargs):
+        while True:
+            compactions = self._collection.compactions
+            hits = self._collection.search(embedding, k=k, where=filter, exact=exact,
+                                           rerank_factor=self.rerank_factor)
+            details = self._collection.rows([row for row, _ in hits])
+            if compactions == self._collection.compactions: # Else rows were renumbered mid-search
+                break
+        results = []
+        for row, similarity in hits:
+            doc_id, text, metadata = details[row]
+            results.append((Document(page_content=text or "", metadata=metadata, id=doc_id), 1.0 - similarity))
+        return results
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_by_vector_with_score(
+            self._embedding_function.embed_query(query), k, filter, **kwargs
+        )
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, persist_directory="quantized_db",
+                   collection_name="langchain", **kwargs):
+        store = cls(persist_directory, embedding, collection_name=collection_name, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
@@ -0,0 +1,272 @@
+# Exact + semantic response cache for LLM prompts
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.getenv("GOPI_RESPONSE_CACHE_DIR", os.path.join(project_root, ".cache"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+# Collapses whitespace and case so trivially different prompts share one entry
+def normalize_prompt(prompt):
+    return _WHITESPACE.sub(" ", prompt).strip().casefold()
+
+
+# Stable hash of a normalized prompt
+def prompt_hash(prompt):
+    return hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+# Stable hash of the chunks given to the LLM, in order: chunk IDs (content-derived when indexed
+# incrementally), or the chunk text for documents without an ID
+def context_fingerprint(docs):
+    digest = hashlib.sha256()
+    for doc in docs:
+        chunk_id = getattr(doc, "id", None) or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+        digest.update(chunk_id.encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+class SQLiteCacheBackend:
+    """
+    Key/value table in SQLite with a creation timestamp per entry.
+    Values are strings; extra is any JSON-serializable metadata and vector
+    an optional float32 vector (e.g. the prompt embedding), stored as a blob.
+    """
+
+    def __init__(self, path=None, table="responses"):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "responses.sqlite")
+        self.table = table
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, extra TEXT, vector BLOB)"
+        )
+        # Tables created before the vector column existed
+        columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+        if "vector" not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN vector BLOB")
+        self._conn.commit()
+
+    # Returns (value, created_at, extra) or None
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at, extra FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2]) if row[2] else {}
+
+    def set(self, key, value, created_at=None, extra=None, vector=None):
+        blob = np.asarray(vector, dtype=np.float32).tobytes() if vector is not None else None
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, extra, vector) VALUES (?, ?, ?, ?, ?)",
+                (key, value, created_at or time.time(), json.dumps(extra or {}), blob)
+            )
+            self._conn.commit()
+
+    # Newest entries that have a vector: [(key, value, created_at, extra, vector)]
+    def entries_with_vectors(self, limit):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value, created_at, extra, vector FROM {self.table} "
+                "WHERE vector IS NOT NULL ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(key, value, created_at, json.loads(extra) if extra else {}, np.frombuffer(vector, dtype=np.float32))
+                for key, value, created_at, extra, vector in rows]
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    # Removes every entry whose key starts with prefix and returns how many were removed
+    def delete_prefix(self, prefix):
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    # Removes entries older than ttl seconds and returns how many were removed
+    def purge_expired(self, ttl):
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - ttl,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+
+class ResponseCache:
+    """
+    Cache of LLM responses keyed by normalized prompt.
+
+    Lookups try an exact hash match first (memory, then the optional SQLite
+    backend) and, when an embedding is configured, fall back to the most
+    similar cached prompt above similarity_threshold. Entries expire after
+    ttl seconds and the in-memory set is bounded by max_entries (LRU).
+    Prompt vectors are persisted with the entries, so semantic matching
+    keeps working after a restart.
+    """
+
+    def __init__(self, ttl=3600, max_entries=1000, backend=None, embedding=None, similarity_threshold=0.95):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self.embedding = embedding
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        # key -> (response, created_at, latency, unit vector or None)
+        self._entries = OrderedDict()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "latency_saved": 0.0}
+        if backend is not None and embedding is not None:
+            self._load_vectors()
+
+    # Brings the newest persisted entries (with their prompt vectors) into memory for semantic lookups
+    def _load_vectors(self):
+        for key, response, created_at, extra, vector in reversed(self.backend.entries_with_vectors(self.max_entries)):
+            if not self._expired(created_at):
+                self._remember(key, response, created_at, extra.get("latency", 0.0), vector)
+
+    def _expired(self, created_at):
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _embed(self, prompt):
+        vector = np.asarray(self.embedding.embed_query(normalize_prompt(prompt)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remember(self, key, response, created_at, latency, vector):
+        self._entries[key] = (response, created_at, latency, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _hit(self, kind, latency):
+        self._stats[kind] += 1
+        self._stats["latency_saved"] += latency or 0.0
+
+    # Returns the cached response for a prompt, or None
+    def get(self, prompt):
+        return self._lookup(prompt)[0]
+
+    # Returns (cached response or None, prompt vector if one was computed)
+    def _lookup(self, prompt):
+        key = prompt_hash(prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._entries.move_to_end(key)
+                    self._hit("exact_hits", entry[2])
+                    return entry[0], None
+                del self._entries[key]
+
+        if self.backend is not None:
+            row = self.backend.get(key)
+            if row is not None:
+                response, created_at, extra = row
+                if not self._expired(created_at):
+                    with self._lock:
+                        self._remember(key, response, created_at, extra.get("latency", 0.0), None)
+                        self._hit("exact_hits", extra.get("latency", 0.0))
+                    return response, None
+                self.backend.delete(key)
+
+        vector = None
+        if self.embedding is not None:
+            vector = self._embed(prompt)
+            match = self._semantic_lookup(vector)
+            if match is not None:
+                return match, vector
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None, vector
+
+    # Best cached response whose prompt vector is above the similarity threshold
+    def _semantic_lookup(self, vector):
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry[3] is not None and not self._expired(entry[1])
+            ]
+            if not candidates:
+                return None
+            matrix = np.stack([entry[3] for _, entry in candidates])
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            self._hit("semantic_hits", entry[2])
+            return entry[0]
+
+    # Stores a response along with how long it took to produce
+    # vector is the prompt embedding when the caller already has it (saves an embedding call)
+    def set(self, prompt, response, latency=0.0, vector=None):
+        key = prompt_hash(prompt)
+        created_at = time.time()
+        if vector is None and self.embedding is not None:
+            vector = self._embed(prompt)
+        with self._lock:
+            self._remember(key, response, created_at, latency, vector)
+        if self.backend is not None:
+            self.backend.set(key, response, created_at, {"latency": latency}, vector)
+
+    # Returns the cached response or calls compute(prompt) and caches the result
+    # The prompt is embedded at most once, for the lookup, and the vector reused to store the result
+    def get_or_compute(self, prompt, compute):
+        response, vector = self._lookup(prompt)
+        if response is not None:
+            return response
+        started = time.perf_counter()
+        response = compute(prompt)
+        if response is not None:
+            self.set(prompt, response, time.perf_counter() - started, vector)
+        return response
+
+    def invalidate(self, prompt):
+        key = prompt_hash(prompt)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    # Hit rate and total latency saved by cache hits
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        total = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = (hits / total) if total else 0.0
+        return stats
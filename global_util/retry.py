@@ -0,0 +1,263 @@
+# Retry policy with error classification, backoff, deadlines and a circuit breaker
+import time
+import random
+import logging
+import threading
+from collections import defaultdict
+
+from global_util.metrics import LatencyRecorder
+
+# Error categories
+RATE_LIMIT = "rate_limit"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the circuit breaker is open and calls fail fast."""
+
+
+class RetryDeadlineExceeded(TimeoutError):
+    """Raised when the overall per-request deadline runs out before a success."""
+
+
+# Status code of an API error, if the exception carries one
+def _status_code(exc):
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+# Classifies an exception as rate_limit, transient or fatal
+def classify_error(exc):
+    status = _status_code(exc)
+    if status is not None:
+        if status == 429:
+            return RATE_LIMIT
+        if status in (408, 409) or status >= 500:
+            return TRANSIENT
+        return FATAL
+
+    name = type(exc).__name__
+    if "RateLimit" in name:
+        return RATE_LIMIT
+    if isinstance(exc, (TimeoutError, ConnectionError)) or "Timeout" in name or "Connection" in name:
+        return TRANSIENT
+    return FATAL
+
+
+# True for timeouts (TimeoutError, openai.APITimeoutError, httpx.ReadTimeout, ...)
+def _is_timeout(exc):
+    return isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__
+
+
+# Seconds the provider asked us to wait (Retry-After headers), or None
+def get_retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive retryable failures and rejects
+    calls for reset_timeout seconds. It then lets one trial call through
+    (half-open); success closes the circuit again, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    # Raises CircuitOpenError when calls are currently not allowed
+    def before_call(self):
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("Circuit breaker is open; provider marked unhealthy")
+                self._state = self.HALF_OPEN
+            elif self._state == self.HALF_OPEN:
+                # Only one trial call at a time while half-open
+                raise CircuitOpenError("Circuit breaker is half-open; trial call in progress")
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    # A fatal error still proves the provider answered; release a half-open trial
+    def record_neutral(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._failures = 0
+
+    # The trial call ended without telling anything about the provider (interrupted, or cut
+    # short by the caller's deadline); the next call may try again
+    def release_trial(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.OPEN
+
+
+class RetryPolicy:
+    """
+    Calls a function with capped exponential backoff and full jitter.
+
+    max_retries is the number of retries, so a call makes up to max_retries + 1
+    attempts. Fatal errors are raised immediately, rate-limit errors honor
+    Retry-After, and no retry is scheduled past the overall deadline. With
+    timeout_arg, each attempt gets the remaining time as that keyword argument
+    (e.g. the request timeout of an API client), so a stuck call cannot outlive
+    the deadline; an attempt that still ends past it raises
+    RetryDeadlineExceeded. A timeout caused by the deadline running out is the
+    caller's budget, not a provider failure, so it does not count towards the
+    circuit breaker. Retry counts and call latencies are recorded and exposed
+    through metrics().
+    """
+
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=20.0, deadline=60.0, breaker=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breaker = breaker
+        self.latency = LatencyRecorder()
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    # Delay before the given retry attempt (1-based)
+    def backoff(self, attempt, exc=None):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        retry_after = get_retry_after(exc) if exc is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def _deadline_exceeded(self, deadline, attempt, exc=None):
+        self._count("deadline_exceeded")
+        self._count("failures")
+        error = RetryDeadlineExceeded(f"Deadline of {deadline}s exceeded after {attempt} attempt(s)")
+        if exc is not None:
+            raise error from exc
+        raise error
+
+    def call(self, fn, *args, max_retries=None, deadline=None, timeout_arg=None, **kwargs):
+        max_retries = self.max_retries if max_retries is None else max_retries
+        deadline = self.deadline if deadline is None else deadline
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            remaining = None if deadline is None else deadline - (time.monotonic() - started)
+            if remaining is not None and remaining <= 0:
+                self._deadline_exceeded(deadline, attempt)
+            if timeout_arg is not None and remaining is not None:
+                kwargs[timeout_arg] = remaining
+
+            if self.breaker is not None:
+                try:
+                    self.breaker.before_call()
+                except CircuitOpenError:
+                    self._count("circuit_rejected")
+                    raise
+
+            attempt += 1
+            self._count("attempts")
+            call_started = time.perf_counter()
+            recorded = False # Whether the breaker learned the outcome of this attempt
+            try:
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as exc:
+                    self.latency.record("failed_call", time.perf_counter() - call_started)
+                    category = classify_error(exc)
+                    self._count(f"errors_{category}")
+                    out_of_time = deadline is not None and time.monotonic() - started >= deadline
+
+                    if category == FATAL:
+                        if self.breaker is not None:
+                            self.breaker.record_neutral()
+                            recorded = True
+                        self._count("failures")
+                        raise
+                    if self.breaker is not None and not (timeout_arg is not None and out_of_time and _is_timeout(exc)):
+                        self.breaker.record_failure()
+                        recorded = True
+
+                    if out_of_time:
+                        self._deadline_exceeded(deadline, attempt, exc)
+                    if attempt > max_retries:
+                        self._count("failures")
+                        raise
+
+                    delay = self.backoff(attempt, exc)
+                    if deadline is not None and delay >= deadline - (time.monotonic() - started):
+                        self._deadline_exceeded(deadline, attempt, exc)
+
+                    logging.warning(f"Retrying after {category} error (attempt {attempt} of {max_retries + 1}, "
+                                    f"sleeping {delay:.2f}s): {exc}")
+                    self._count("retries")
+                    time.sleep(delay)
+                    continue
+
+                self.latency.record("call", time.perf_counter() - call_started)
+                self.latency.record("request", time.monotonic() - started)
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                    recorded = True
+            finally:
+                # Never leave a half-open trial behind (interrupts, deadline-cut timeouts)
+                if self.breaker is not None and not recorded:
+                    self.breaker.release_trial()
+
+            if deadline is not None and time.monotonic() - started > deadline:
+                # The result arrived too late to be useful to a caller with a deadline
+                self._deadline_exceeded(deadline, attempt)
+            self._count("successes")
+            return result
+
+    # Retry counters, latency percentiles and breaker state
+    def metrics(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "counters": counters,
+            "latency": self.latency.snapshot(),
+            "circuit_state": self.breaker.state if self.breaker is not None else None,
+        }
@@ -0,0 +1,78 @@
+"""
+Unit Tests for retrieved context selection
+Tests duplicate removal, relevance re-ranking, the chunk limit and the token budget
+"""
+
+import sys
+import os
+import unittest
+
+from langchain_core.documents import Document
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util.context_selection import ContextSelector
+from global_util.tokens import count_tokens
+
+LEAVE = "Employees get 25 days of paid annual leave per calendar year."
+LEAVE_COPY = "Employees get 25 days of paid annual leave per calendar year!"
+SICK = "Sick leave requires a doctor's note after three consecutive days."
+TRAVEL = "Travel expenses are reimbursed within 30 days of submitting receipts."
+BOILERPLATE = "Company confidential. Do not distribute."
+
+
+def docs(*texts):
+    return [Document(page_content=text) for text in texts]
+
+
+class TestContextSelector(unittest.TestCase):
+    """Test which chunks are put into the prompt"""
+
+    def test_near_duplicates_are_dropped(self):
+        """Test that a chunk repeating a more relevant one is removed"""
+        context = ContextSelector(top_n=4).select("annual leave days", docs(LEAVE, LEAVE_COPY, SICK))
+        texts = [doc.page_content for doc in context.docs]
+        self.assertEqual(context.duplicates_removed, 1)
+        self.assertEqual(len(texts), 2)
+        self.assertIn(SICK, texts)
+        self.assertEqual(len({LEAVE, LEAVE_COPY} & set(texts)), 1)
+
+    def test_keyword_match_is_ranked_first(self):
+        """Test that a chunk matching the query terms moves ahead of the retriever's first result"""
+        context = ContextSelector(top_n=1).select("travel expenses receipts", docs(BOILERPLATE, LEAVE, TRAVEL))
+        self.assertEqual([doc.page_content for doc in context.docs], [TRAVEL])
+
+    def test_top_n_and_token_budget(self):
+        """Test that at most top_n chunks are kept and their tokens fit max_tokens"""
+        candidates = docs(LEAVE, SICK, TRAVEL, BOILERPLATE)
+        self.assertEqual(len(ContextSelector(top_n=2, max_tokens=10000).select("leave", candidates).docs), 2)
+
+        budget = count_tokens(LEAVE) + count_tokens(SICK)
+        context = ContextSelector(top_n=4, max_tokens=budget).select("leave days", candidates)
+        self.assertLessEqual(context.tokens_after, budget)
+        self.assertEqual(context.tokens_after, sum(count_tokens(doc.page_content) for doc in context.docs))
+        self.assertEqual(context.tokens_before, sum(count_tokens(doc.page_content) for doc in candidates))
+
+    def test_best_chunk_always_kept(self):
+        """Test that the best chunk is kept even when it alone exceeds the budget"""
+        context = ContextSelector(max_tokens=1).select("leave", docs(LEAVE, SICK))
+        self.assertEqual(len(context.docs), 1)
+        self.assertGreater(context.tokens_saved, 0)
+
+    def test_empty_and_stats(self):
+        """Test selection without candidates and the accumulated statistics"""
+        selector = ContextSelector(top_n=2)
+        self.assertEqual(selector.select("leave", []).docs, [])
+        context = selector.select("leave", docs(LEAVE, LEAVE_COPY, SICK, TRAVEL))
+        stats = selector.stats()
+        self.assertEqual(stats["queries"], 2)
+        self.assertEqual(stats["chunks_retrieved"], 4)
+        self.assertEqual(stats["chunks_kept"], len(context.docs))
+        self.assertEqual(stats["duplicates_removed"], 1)
+        self.assertEqual(stats["tokens_saved"], context.tokens_saved)
+        self.assertEqual(stats["tokens_saved_per_query"], context.tokens_saved / 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,154 @@
+"""
+Unit Tests for the embedding backends and the vector store registry
+Tests embedder names, per-collection embedder tags, local batch encoding and shared store handles
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util import embedding_backends
+from global_util.embedding_backends import (LocalEmbeddings, EmbedderMismatchError, describe_embedder,
+                                            ensure_collection_embedder, EMBEDDER_METADATA_KEY, LEGACY_EMBEDDER)
+from global_util.embedding_cache import CachedEmbeddings, SQLiteEmbeddingStore
+from global_util.vector_store_registry import get_vector_store
+
+
+class FakeEmbeddings(Embeddings):
+    """Small deterministic embedding model named by model"""
+
+    def __init__(self, model="fake-model"):
+        self.model = model
+
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class OpenAIEmbeddings(FakeEmbeddings):
+    """Stand-in recognised by its class name, as langchain_openai's OpenAIEmbeddings is"""
+
+
+class FakeCollection:
+    """The part of chromadb's Collection used for embedder tags"""
+
+    def __init__(self, metadata=None, count=0):
+        self.name = "resumes"
+        self.metadata = metadata
+        self._count = count
+
+    def count(self):
+        return self._count
+
+    def modify(self, metadata=None):
+        self.metadata = metadata
+
+
+class FakeStore:
+    def __init__(self, collection):
+        self._collection = collection
+
+
+class FakeSentenceTransformer:
+    """Records the batch sizes it encodes"""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size, normalize_embeddings, convert_to_numpy, show_progress_bar):
+        self.batches.append(len(texts))
+        return np.array([[float(len(text)), 0.0] for text in texts])
+
+
+class TestEmbedderTags(unittest.TestCase):
+    """Test naming embedders and recording them on collections"""
+
+    def test_describe_embedder(self):
+        """Test names of OpenAI, local, wrapped and other embedders"""
+        self.assertEqual(describe_embedder(OpenAIEmbeddings("text-embedding-3-small")), LEGACY_EMBEDDER)
+        self.assertEqual(describe_embedder(LocalEmbeddings("all-MiniLM-L6-v2")), "local:all-MiniLM-L6-v2")
+        self.assertEqual(describe_embedder(FakeEmbeddings("m")), "FakeEmbeddings:m")
+        directory = tempfile.mkdtemp(prefix="embedding_backends_test_")
+        try:
+            cached = CachedEmbeddings(LocalEmbeddings("all-MiniLM-L6-v2"), "local",
+                                      store=SQLiteEmbeddingStore(os.path.join(directory, "e.sqlite")))
+            self.assertEqual(describe_embedder(cached), "local:all-MiniLM-L6-v2")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def test_new_collection_takes_embedder(self):
+        """Test that an empty collection records the embedder that opens it"""
+        collection = FakeCollection()
+        ensure_collection_embedder(FakeStore(collection), LocalEmbeddings("mini"))
+        self.assertEqual(collection.metadata[EMBEDDER_METADATA_KEY], "local:mini")
+
+    def test_populated_collection_rejects_other_embedder(self):
+        """Test that a collection built with one embedder cannot be opened with another"""
+        collection = FakeCollection({EMBEDDER_METADATA_KEY: "local:mini"}, count=10)
+        self.assertEqual(ensure_collection_embedder(FakeStore(collection), LocalEmbeddings("mini")), "local:mini")
+        with self.assertRaises(EmbedderMismatchError):
+            ensure_collection_embedder(FakeStore(collection), OpenAIEmbeddings("text-embedding-3-small"))
+
+    def test_legacy_collection_is_openai(self):
+        """Test that an untagged populated collection is taken as built by the legacy OpenAI model"""
+        legacy = FakeCollection(count=10)
+        ensure_collection_embedder(FakeStore(legacy), OpenAIEmbeddings("text-embedding-3-small"))
+        self.assertEqual(legacy.metadata[EMBEDDER_METADATA_KEY], LEGACY_EMBEDDER)
+        with self.assertRaises(EmbedderMismatchError):
+            ensure_collection_embedder(FakeStore(FakeCollection(count=10)), LocalEmbeddings("mini"))
+
+
+class TestLocalEmbeddings(unittest.TestCase):
+    """Test batch encoding with a stand-in sentence-transformers model"""
+
+    def setUp(self):
+        self.model = FakeSentenceTransformer()
+        embedding_backends._models[("fake-local", "torch")] = self.model
+
+    def tearDown(self):
+        embedding_backends._models.pop(("fake-local", "torch"), None)
+
+    def test_batches_keep_order(self):
+        """Test that documents are encoded in batch_size batches on the pool and returned in order"""
+        embedding = LocalEmbeddings("fake-local", runtime="torch", batch_size=3, max_workers=2)
+        texts = ["x" * n for n in range(1, 9)]
+        self.assertEqual(embedding.embed_documents(texts), [[float(n), 0.0] for n in range(1, 9)])
+        self.assertEqual(sorted(self.model.batches), [2, 3, 3])
+        self.assertEqual(embedding.embed_query("abcd"), [4.0, 0.0])
+
+
+class TestVectorStoreRegistry(unittest.TestCase):
+    """Test that store handles are shared and checked per embedder"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="vector_store_registry_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_same_embedder_shares_handle(self):
+        """Test that the same collection and embedder return one handle"""
+        first = get_vector_store(self.directory, FakeEmbeddings(), "resumes", backend="quantized")
+        self.assertIs(get_vector_store(self.directory, FakeEmbeddings(), "resumes", backend="quantized"), first)
+        self.assertIsNot(get_vector_store(self.directory, FakeEmbeddings(), "other", backend="quantized"), first)
+
+    def test_other_embedder_is_checked_on_open_collection(self):
+        """Test that an already open, populated collection rejects a different embedder"""
+        store = get_vector_store(self.directory, FakeEmbeddings("model-a"), "resumes", backend="quantized")
+        store.add_texts(["Jane Doe, Python developer"], ids=["1"])
+        with self.assertRaises(EmbedderMismatchError):
+            get_vector_store(self.directory, FakeEmbeddings("model-b"), "resumes", backend="quantized")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,205 @@
+"""
+Unit Tests for the persistent embedding cache
+Tests the SQLite vector store, its size cap, the cached document and query embeddings and the query log
+"""
+
+import sys
+import os
+import shutil
+import time
+import tempfile
+import unittest
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util.embedding_cache import (SQLiteEmbeddingStore, CachedEmbeddings, QueryEmbeddingCache, QueryLog,
+                                         embedding_cache_key, normalize_query)
+
+
+class FakeEmbeddings:
+    """Deterministic embedding model that records the texts it was asked to embed"""
+
+    def __init__(self):
+        self.calls = []
+
+    @staticmethod
+    def vector(text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return self.vector(text)
+
+
+class TestSQLiteEmbeddingStore(unittest.TestCase):
+    """Test storage, lookup and LRU eviction of vectors"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="embedding_cache_test_")
+        self.path = os.path.join(self.directory, "embeddings.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_round_trip(self):
+        """Test that stored vectors are returned as float32 values and survive reopening"""
+        store = SQLiteEmbeddingStore(self.path)
+        store.put_many({"a": [0.5, 1.25], "b": [2.0, -1.0]})
+        self.assertEqual(store.get_many(["a", "b", "missing"]), {"a": [0.5, 1.25], "b": [2.0, -1.0]})
+        self.assertEqual(store.size_bytes(), 16)
+
+        reopened = SQLiteEmbeddingStore(self.path)
+        self.assertEqual(len(reopened), 2)
+        self.assertEqual(reopened.size_bytes(), 16)
+
+    def test_replacing_keeps_size(self):
+        """Test that rewriting a key does not count its bytes twice"""
+        store = SQLiteEmbeddingStore(self.path)
+        store.put_many({"a": [1.0, 2.0]})
+        store.put_many({"a": [3.0, 4.0]})
+        self.assertEqual(store.size_bytes(), 8)
+        self.assertEqual(store.get_many(["a"]), {"a": [3.0, 4.0]})
+
+    def test_least_recently_used_are_evicted(self):
+        """Test that entries not read recently are evicted first once the cap is exceeded"""
+        store = SQLiteEmbeddingStore(self.path, max_bytes=24) # Room for three 2-float vectors
+        store.put_many({"a": [1.0, 1.0]})
+        store.put_many({"b": [2.0, 2.0]})
+        store.put_many({"c": [3.0, 3.0]})
+        store.get_many(["a"]) # "b" is now the least recently used
+        store.put_many({"d": [4.0, 4.0]})
+        self.assertEqual(set(store.get_many(["a", "b", "c", "d"])), {"a", "c", "d"})
+        self.assertLessEqual(store.size_bytes(), 24)
+
+    def test_clear(self):
+        """Test that clearing empties the store and resets its size"""
+        store = SQLiteEmbeddingStore(self.path)
+        store.put_many({"a": [1.0]})
+        store.clear()
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.size_bytes(), 0)
+
+
+class TestCachedEmbeddings(unittest.TestCase):
+    """Test that only texts missing from the cache reach the model"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="embedding_cache_test_")
+        self.store = SQLiteEmbeddingStore(os.path.join(self.directory, "embeddings.sqlite"))
+        self.model = FakeEmbeddings()
+        self.embeddings = CachedEmbeddings(self.model, "fake-model", store=self.store)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_unchanged_texts_are_not_re_embedded(self):
+        """Test that a second pass over the same chunks makes no model calls"""
+        texts = ["first chunk", "second chunk"]
+        first = self.embeddings.embed_documents(texts)
+        self.assertEqual(first, self.model.embed_documents(texts))
+        self.model.calls.clear()
+
+        self.assertEqual(self.embeddings.embed_documents(texts), first)
+        self.assertEqual(self.model.calls, [])
+        stats = self.embeddings.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["api_calls"]), (2, 2, 1))
+
+    def test_only_missing_texts_are_sent(self):
+        """Test that a batch mixing cached and new texts embeds only the new ones, each once"""
+        self.embeddings.embed_documents(["cached"])
+        self.model.calls.clear()
+        vectors = self.embeddings.embed_documents(["new", "cached", "new"])
+        self.assertEqual(self.model.calls, [["new"]])
+        self.assertEqual(vectors[0], vectors[2])
+
+    def test_key_depends_on_model(self):
+        """Test that the same text under another model is a different entry"""
+        self.assertNotEqual(embedding_cache_key("model-a", "text"), embedding_cache_key("model-b", "text"))
+        self.embeddings.embed_documents(["text"])
+        other = CachedEmbeddings(self.model, "other-model", store=self.store)
+        self.model.calls.clear()
+        other.embed_documents(["text"])
+        self.assertEqual(self.model.calls, [["text"]])
+
+
+class TestQueryEmbeddings(unittest.TestCase):
+    """Test the query vector cache, the query log and warm-up"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="embedding_cache_test_")
+        self.store = SQLiteEmbeddingStore(os.path.join(self.directory, "embeddings.sqlite"))
+        self.query_log = QueryLog(os.path.join(self.directory, "query_log.sqlite"), flush_every=1000)
+        self.model = FakeEmbeddings()
+        self.embeddings = CachedEmbeddings(self.model, "fake-model", store=self.store,
+                                           query_cache=QueryEmbeddingCache(), query_log=self.query_log)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_repeated_query_skips_the_model(self):
+        """Test that a query differing only in whitespace is served from the cache"""
+        vector = self.embeddings.embed_query("remote work policy")
+        self.assertEqual(self.embeddings.embed_query("  remote   work policy "), vector)
+        self.assertEqual(self.model.calls, ["remote work policy"])
+        stats = self.embeddings.stats()
+        self.assertEqual((stats["query_hits"], stats["query_misses"]), (1, 1))
+
+    def test_query_vectors_persist(self):
+        """Test that a new process (empty memory cache) finds query vectors on disk"""
+        self.embeddings.embed_query("parental leave")
+        restarted = CachedEmbeddings(self.model, "fake-model", store=self.store, query_cache=QueryEmbeddingCache())
+        self.model.calls.clear()
+        restarted.embed_query("parental leave")
+        self.assertEqual(self.model.calls, [])
+
+    def test_queries_and_documents_do_not_share_entries(self):
+        """Test that a query is cached apart from a document with the same text"""
+        self.embeddings.embed_documents(["sick days"])
+        self.model.calls.clear()
+        self.embeddings.embed_query("sick days")
+        self.assertEqual(self.model.calls, ["sick days"])
+
+    def test_warm_up_from_log(self):
+        """Test that the most frequent logged queries are pre-embedded in one batch"""
+        for query in ["vacation days"] * 3 + ["dress code"] * 2 + ["parking"]:
+            self.query_log.record(query)
+        self.assertEqual(self.query_log.most_frequent(2), ["vacation days", "dress code"])
+
+        self.assertEqual(self.embeddings.warm_up_from_log(top_n=2), 2)
+        self.assertEqual(self.model.calls, [["vacation days", "dress code"]])
+
+        # After a restart the vectors come from disk
+        restarted = CachedEmbeddings(self.model, "fake-model", store=self.store,
+                                     query_cache=QueryEmbeddingCache(), query_log=self.query_log)
+        self.assertEqual(restarted.warm_up_from_log(top_n=2), 0)
+        self.assertEqual(len(restarted.query_cache), 2)
+        restarted.embed_query("vacation days")
+        self.assertEqual(len(self.model.calls), 1)
+
+    def test_query_cache_lru_and_ttl(self):
+        """Test that the in-memory query cache drops the least recently used and expired entries"""
+        cache = QueryEmbeddingCache(max_entries=2, ttl=None)
+        cache.set("a", [1.0])
+        cache.set("b", [2.0])
+        cache.get("a")
+        cache.set("c", [3.0])
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), [1.0])
+
+        expiring = QueryEmbeddingCache(ttl=0.01)
+        expiring.set("a", [1.0])
+        time.sleep(0.02)
+        self.assertIsNone(expiring.get("a"))
+
+    def test_normalize_query(self):
+        """Test that surrounding and repeated whitespace is collapsed"""
+        self.assertEqual(normalize_query("  leave\n\tpolicy  "), "leave policy")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
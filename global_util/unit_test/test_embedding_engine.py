@@ -0,0 +1,174 @@
+"""
+Unit Tests for the batched embedding engine
+Tests the token bucket, token-budgeted batching, concurrent embedding and rate-limit charging
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from langchain_core.documents import Document
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util.embedding_engine import TokenBucket, EmbeddingEngine
+from global_util.embedding_cache import SQLiteEmbeddingStore, CachedEmbeddings
+from global_util.tokens import count_tokens
+
+
+class FakeEmbeddings:
+    """Embedding model that records its batches and how many run at once"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return [[float(len(text))] for text in texts]
+
+
+class RecordingBucket:
+    """Token bucket stand-in that records what was charged"""
+
+    def __init__(self):
+        self.charged = []
+
+    def acquire(self, amount=1):
+        self.charged.append(amount)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.upserts = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts.append((ids, embeddings, documents, metadatas))
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self._collection = FakeCollection()
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test the token bucket's capacity, refill and clamping"""
+
+    def test_capacity_is_available_at_once(self):
+        """Test that a full bucket hands out its capacity without waiting"""
+        bucket = TokenBucket(rate_per_minute=600)
+        started = time.monotonic()
+        bucket.acquire(600)
+        self.assertLess(time.monotonic() - started, 0.05)
+
+    def test_empty_bucket_waits_for_refill(self):
+        """Test that acquiring from an empty bucket blocks for the refill time"""
+        bucket = TokenBucket(rate_per_minute=6000, capacity=10) # 100 tokens per second
+        bucket.acquire(10)
+        started = time.monotonic()
+        bucket.acquire(5)
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+    def test_oversized_request_is_clamped(self):
+        """Test that a request larger than the bucket waits for a full bucket instead of forever"""
+        bucket = TokenBucket(rate_per_minute=6000, capacity=10)
+        started = time.monotonic()
+        bucket.acquire(1000)
+        self.assertLess(time.monotonic() - started, 0.05)
+
+
+class TestEmbeddingEngine(unittest.TestCase):
+    """Test batching, ordering, concurrency and ingestion"""
+
+    def test_batches_respect_token_and_size_budgets(self):
+        """Test that no batch exceeds max_batch_tokens (unless a single text does) or max_batch_size"""
+        texts = ["word " * 30, "word " * 30, "word " * 30, "short", "short", "short", "word " * 200]
+        engine = EmbeddingEngine(FakeEmbeddings(), max_batch_tokens=70, max_batch_size=2)
+        batches = engine.make_batches(texts)
+        self.assertEqual(sorted(i for indexes, _ in batches for i in indexes), list(range(len(texts))))
+        for indexes, tokens in batches:
+            self.assertLessEqual(len(indexes), 2)
+            self.assertEqual(tokens, sum(count_tokens(texts[i]) for i in indexes))
+            if len(indexes) > 1:
+                self.assertLessEqual(tokens, 70)
+
+    def test_vectors_in_input_order_with_bounded_concurrency(self):
+        """Test that vectors come back in input order while at most max_concurrency batches run"""
+        model = FakeEmbeddings(delay=0.02)
+        engine = EmbeddingEngine(model, max_concurrency=3, max_batch_size=2)
+        texts = ["x" * n for n in range(1, 21)]
+        self.assertEqual(engine.embed_documents(texts), [[float(n)] for n in range(1, 21)])
+        self.assertEqual(len(model.batches), 10)
+        self.assertLessEqual(model.max_running, 3)
+        self.assertGreater(model.max_running, 1)
+        stats = engine.stats()
+        self.assertEqual((stats["chunks"], stats["batches"]), (20, 10))
+
+    def test_ingest_upserts_each_batch(self):
+        """Test that ingest writes ids, texts, vectors and metadata of every batch"""
+        engine = EmbeddingEngine(FakeEmbeddings(), max_batch_size=2)
+        documents = [Document(page_content=f"chunk {i}", metadata={"page": i} if i else {}) for i in range(5)]
+        store = FakeVectorStore()
+        ids = engine.ingest(store, documents, ids=[f"id{i}" for i in range(5)])
+        self.assertEqual(ids, [f"id{i}" for i in range(5)])
+        upserts = store._collection.upserts
+        self.assertEqual(len(upserts), 3)
+        written = {doc_id: (text, metadata) for batch_ids, _, texts, metadatas in upserts
+                   for doc_id, text, metadata in zip(batch_ids, texts, metadatas)}
+        self.assertEqual(written["id0"], ("chunk 0", None)) # Chroma rejects empty metadata
+        self.assertEqual(written["id3"], ("chunk 3", {"page": 3}))
+
+
+class TestRateLimitCharging(unittest.TestCase):
+    """Test that only texts sent to the API are charged to the rate limits"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="embedding_engine_test_")
+        self.model = FakeEmbeddings()
+        self.embedding = CachedEmbeddings(self.model, "fake-model",
+                                          store=SQLiteEmbeddingStore(os.path.join(self.directory, "e.sqlite")))
+        self.engine = EmbeddingEngine(self.embedding, max_batch_size=2)
+        self.engine.request_bucket = RecordingBucket()
+        self.engine.token_bucket = RecordingBucket()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_cached_batches_are_free(self):
+        """Test that re-embedding cached texts charges neither requests nor tokens"""
+        texts = ["alpha beta", "gamma delta", "epsilon"]
+        self.engine.embed_documents(texts)
+        self.assertEqual(len(self.engine.request_bucket.charged), 2)
+        self.assertEqual(sum(self.engine.token_bucket.charged), sum(count_tokens(text) for text in texts))
+
+        self.engine.request_bucket.charged.clear()
+        self.engine.token_bucket.charged.clear()
+        self.engine.embed_documents(texts)
+        self.assertEqual(self.engine.request_bucket.charged, [])
+        self.assertEqual(self.engine.token_bucket.charged, [])
+
+    def test_partly_cached_batch_charges_missing_texts(self):
+        """Test that a batch with some cached texts is charged for the uncached ones only"""
+        self.engine.embed_documents(["alpha beta gamma delta"])
+        self.engine.token_bucket.charged.clear()
+        self.engine.embed_documents(["alpha beta gamma delta", "epsilon"])
+        self.assertEqual(self.engine.token_bucket.charged, [count_tokens("epsilon")])
+        self.assertEqual(self.model.batches[-1], ["epsilon"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
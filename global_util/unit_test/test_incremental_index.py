@@ -0,0 +1,131 @@
+"""
+Unit Tests for manifest-based incremental indexing
+Tests that only added/changed chunks are embedded and removed ones are deleted, using a stub vector store
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+from langchain_core.documents import Document
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util.incremental_index import IncrementalIndexer, IndexManifest, chunk_id
+from global_util.keyword_index import KeywordIndex
+
+
+class StubVectorStore:
+    """Keeps chunks in a dict and supports the calls IncrementalIndexer makes"""
+
+    def __init__(self, ids=()):
+        self.chunks = {doc_id: "legacy" for doc_id in ids}
+        self.deleted = []
+
+    def get(self, include=None):
+        return {"ids": list(self.chunks)}
+
+    def delete(self, ids=None):
+        self.deleted.extend(ids)
+        for doc_id in ids:
+            self.chunks.pop(doc_id, None)
+
+
+class StubEngine:
+    """Records which chunks would have been embedded"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def ingest(self, vector_store, documents, ids=None):
+        self.embedded.extend(ids)
+        for doc_id, doc in zip(ids, documents):
+            vector_store.chunks[doc_id] = doc.page_content
+
+
+def doc(text, source):
+    return Document(page_content=text, metadata={"source": source})
+
+
+class TestIncrementalIndexer(unittest.TestCase):
+    """Test add/change/remove diffing against the manifest"""
+
+    def setUp(self):
+        """Set up an empty store, two sources and a keyword index"""
+        self.persist_dir = tempfile.mkdtemp(prefix="incremental_index_test_")
+        self.store = StubVectorStore()
+        self.docs = [doc("leave policy: 20 days", "a.pdf"), doc("sick leave: 10 days", "a.pdf"),
+                     doc("travel policy", "b.pdf")]
+
+    def tearDown(self):
+        shutil.rmtree(self.persist_dir, ignore_errors=True)
+
+    def sync(self, docs, keyword_index=None):
+        self.engine = StubEngine()
+        indexer = IncrementalIndexer(self.store, self.persist_dir, "hr", self.engine, keyword_index=keyword_index)
+        return indexer.sync(docs)
+
+    def test_first_sync_adds_everything(self):
+        """Test that a new collection embeds every chunk and records them in the manifest"""
+        stats = self.sync(self.docs)
+        self.assertEqual((stats["added"], stats["deleted"], stats["unchanged"]), (3, 0, 0))
+        self.assertEqual(len(self.store.chunks), 3)
+        manifest = IndexManifest(self.persist_dir)
+        self.assertEqual(set(manifest.sources("hr")), {"a.pdf", "b.pdf"})
+        self.assertEqual(len(manifest.get_source("hr", "a.pdf")["chunk_ids"]), 2)
+
+    def test_unchanged_sync_embeds_nothing(self):
+        """Test that syncing the same chunks again makes no embedding calls"""
+        self.sync(self.docs)
+        stats = self.sync(self.docs)
+        self.assertEqual((stats["added"], stats["deleted"], stats["unchanged"]), (0, 0, 3))
+        self.assertEqual(self.engine.embedded, [])
+
+    def test_changed_chunk(self):
+        """Test that only a changed chunk is embedded and its old version deleted"""
+        self.sync(self.docs)
+        old_id = chunk_id("a.pdf", self.docs[1])
+        changed = self.docs[:1] + [doc("sick leave: 12 days", "a.pdf")] + self.docs[2:]
+        stats = self.sync(changed)
+        self.assertEqual((stats["added"], stats["deleted"], stats["unchanged"]), (1, 1, 2))
+        self.assertEqual(self.engine.embedded, [chunk_id("a.pdf", changed[1])])
+        self.assertNotIn(old_id, self.store.chunks)
+        self.assertIn("sick leave: 12 days", self.store.chunks.values())
+
+    def test_removed_source(self):
+        """Test that chunks of a source missing from the corpus are deleted"""
+        self.sync(self.docs)
+        stats = self.sync(self.docs[:2])
+        self.assertEqual((stats["added"], stats["deleted"], stats["unchanged"]), (0, 1, 2))
+        self.assertNotIn("travel policy", self.store.chunks.values())
+        self.assertNotIn("b.pdf", IndexManifest(self.persist_dir).sources("hr"))
+
+    def test_duplicate_chunks_get_distinct_ids(self):
+        """Test that identical chunks within one source are all kept"""
+        stats = self.sync([doc("footer", "a.pdf"), doc("footer", "a.pdf")])
+        self.assertEqual(stats["added"], 2)
+        self.assertEqual(len(self.store.chunks), 2)
+
+    def test_legacy_ids_are_replaced(self):
+        """Test that chunks indexed before the manifest existed are replaced by deterministic ids"""
+        self.store = StubVectorStore(ids=["random-1", "random-2"])
+        stats = self.sync(self.docs)
+        self.assertEqual((stats["added"], stats["deleted"]), (3, 2))
+        self.assertEqual(set(self.store.chunks), {chunk_id(d.metadata["source"], d) for d in self.docs})
+
+    def test_keyword_index_follows_the_store(self):
+        """Test that the keyword index receives the same additions and deletions"""
+        keyword_index = KeywordIndex(os.path.join(self.persist_dir, "bm25"))
+        self.sync(self.docs, keyword_index)
+        self.sync(self.docs[:2], keyword_index)
+        loaded = KeywordIndex(os.path.join(self.persist_dir, "bm25"))
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(loaded.search("travel"), [])
+        self.assertEqual(loaded.search("sick")[0][0], chunk_id("a.pdf", self.docs[1]))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
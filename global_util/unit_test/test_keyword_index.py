@@ -0,0 +1,166 @@
+"""
+Unit Tests for the persisted BM25 keyword index
+Tests save/load round trips, memory-mapped search, the delta log, compaction and several writers
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util import keyword_index
+from global_util.keyword_index import KeywordIndex
+from global_util.bm25 import BM25Index
+
+DOCS = {
+    "a": "Senior Python developer with Django and PostgreSQL experience",
+    "b": "Java engineer, Spring Boot microservices on Kubernetes",
+    "c": "Data scientist: Python, pandas, scikit-learn and SQL",
+    "d": "Frontend developer skilled in React, TypeScript and CSS",
+    "e": "DevOps engineer running Kubernetes, Terraform and AWS",
+}
+QUERIES = ["python developer", "kubernetes", "react typescript", "sql", "engineer aws terraform", "cobol"]
+
+
+class TestKeywordIndex(unittest.TestCase):
+    """Test the keyword index against the in-memory BM25 index"""
+
+    def setUp(self):
+        """Set up an empty index directory"""
+        self.directory = tempfile.mkdtemp(prefix="keyword_index_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def build(self, docs=DOCS):
+        index = KeywordIndex(self.directory)
+        index.add_many(list(docs), list(docs.values()))
+        index.save()
+        return index
+
+    def assert_same_results(self, index, docs):
+        """Rankings and scores must match an in-memory BM25 index over the same documents"""
+        reference = BM25Index()
+        for doc_id, text in docs.items():
+            reference.add(doc_id, text)
+        for query in QUERIES:
+            expected = reference.search(query, k=3)
+            found = index.search(query, k=3)
+            self.assertEqual([doc_id for doc_id, _ in found], [doc_id for doc_id, _ in expected], query)
+            for (_, score), (_, expected_score) in zip(found, expected):
+                self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_save_and_load_round_trip(self):
+        """Test that a reloaded index opens the saved arrays as memory maps and ranks like BM25Index"""
+        self.build()
+        loaded = KeywordIndex(self.directory)
+        self.assertEqual(len(loaded), len(DOCS))
+        self.assertIn("c", loaded)
+        self.assertEqual(len(loaded._overlay), 0) # Searches run on the mapped arrays
+        self.assertIsInstance(loaded._mapped["postings_docs"], np.memmap)
+        self.assert_same_results(loaded, DOCS)
+
+    def test_candidate_ids(self):
+        """Test that candidate_ids restricts the scored documents"""
+        self.build()
+        loaded = KeywordIndex(self.directory)
+        self.assertEqual([doc_id for doc_id, _ in loaded.search("python", candidate_ids={"c"})], ["c"])
+
+    def test_updates_go_to_delta_log(self):
+        """Test that saves after the first append to the delta log and survive a reload"""
+        index = self.build()
+        index.add("f", "Python and Go backend developer")
+        index.remove(["b"])
+        index.add("a", "Rust systems programmer") # Replaces the earlier text of "a"
+        index.save()
+        generation = index._generation
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f"delta-{generation}.jsonl")))
+
+        docs = dict(DOCS, f="Python and Go backend developer", a="Rust systems programmer")
+        del docs["b"]
+        loaded = KeywordIndex(self.directory)
+        self.assertEqual(loaded._generation, generation)
+        # The delta is an overlay on the mapped base, not a copy of the whole index
+        self.assertIsInstance(loaded._mapped["postings_docs"], np.memmap)
+        self.assertEqual(sorted(loaded._overlay.doc_lengths), ["a", "f"])
+        self.assertEqual(loaded._dead_count, 2)
+        self.assertEqual(len(loaded), len(docs))
+        self.assertNotIn("b", loaded)
+        self.assert_same_results(loaded, docs)
+
+    def test_delta_overlay_candidate_ids(self):
+        """Test candidate_ids across mapped and overlay documents, and removal of an overlay document"""
+        index = self.build()
+        index.add("f", "Python backend developer")
+        index.add("g", "Python data engineer")
+        index.remove(["g"])
+        index.save()
+        loaded = KeywordIndex(self.directory)
+        self.assertEqual(sorted(doc_id for doc_id, _ in loaded.search("python", candidate_ids={"a", "f", "g"})),
+                         ["a", "f"])
+        self.assert_same_results(loaded, dict(DOCS, f="Python backend developer"))
+
+    def test_compaction_drops_removed_terms(self):
+        """Test that terms whose documents were all removed leave the vocabulary on compaction"""
+        index = self.build()
+        with patch.object(keyword_index, "COMPACT_MIN_OPS", 1), patch.object(keyword_index, "COMPACT_RATIO", 0.1):
+            index.remove(["d"])
+            index.save()
+        loaded = KeywordIndex(self.directory)
+        self.assertNotIn("react", loaded._mapped["terms"])
+        self.assertEqual(loaded._mapped["total_length"], int(np.sum(loaded._mapped["doc_lengths"])))
+        docs = dict(DOCS)
+        del docs["d"]
+        self.assert_same_results(loaded, docs)
+
+    def test_clear(self):
+        """Test that a cleared index stays empty after a reload"""
+        index = self.build()
+        index.clear()
+        index.save()
+        loaded = KeywordIndex(self.directory)
+        self.assertEqual(len(loaded), 0)
+        self.assertEqual(loaded.search("python"), [])
+
+    def test_compaction_writes_new_generation(self):
+        """Test that a long delta log is merged into a new generation and the old files are removed"""
+        index = self.build()
+        first_generation = index._generation
+        with patch.object(keyword_index, "COMPACT_MIN_OPS", 2):
+            index.add("f", "Go developer")
+            index.add("g", "Scala developer")
+            index.save()
+        self.assertGreater(index._generation, first_generation)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, f"delta-{first_generation}.jsonl")))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, f"offsets-{first_generation}.npy")))
+
+        loaded = KeywordIndex(self.directory)
+        self.assertEqual(len(loaded._overlay), 0)
+        self.assert_same_results(loaded, dict(DOCS, f="Go developer", g="Scala developer"))
+
+    def test_writers_see_each_other(self):
+        """Test that two handles on one directory keep each other's updates"""
+        self.build()
+        first = KeywordIndex(self.directory)
+        second = KeywordIndex(self.directory)
+        first.add("f", "Haskell functional programmer")
+        first.save()
+        second.add("g", "Elixir programmer")
+        second.save()
+
+        self.assertEqual(first.search("elixir")[0][0], "g") # Readers replay the new log entries
+        loaded = KeywordIndex(self.directory)
+        self.assertIn("f", loaded)
+        self.assertIn("g", loaded)
+        self.assertEqual(len(loaded), len(DOCS) + 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,89 @@
+"""
+Unit Tests for the pooled LLM clients
+Tests client reuse, reuse statistics, pool reconfiguration and per-event-loop async connections
+"""
+
+import sys
+import os
+import asyncio
+import unittest
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util import llm_pool
+from global_util.llm_pool import LLMClientPool, LoopLocalAsyncClient, configure_llm_pool, get_llm_pool
+
+
+class TestLLMClientPool(unittest.TestCase):
+    """Test client reuse and statistics (no requests are sent)"""
+
+    def setUp(self):
+        self.pool = LLMClientPool(max_connections=4, max_keepalive=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_same_settings_reuse_client(self):
+        """Test that equal settings return the same client and share one connection pool"""
+        first = self.pool.get("gpt-3.5-turbo", 0, "sk-test")
+        self.assertIs(self.pool.get("gpt-3.5-turbo", 0, "sk-test"), first)
+        other = self.pool.get("gpt-3.5-turbo", 0.7, "sk-test")
+        self.assertIsNot(other, first)
+        self.assertIs(other.http_client, first.http_client)
+        self.assertIs(other.http_async_client, first.http_async_client)
+        self.assertIsInstance(first.http_async_client, LoopLocalAsyncClient)
+
+    def test_stats_sum_reuse_per_model(self):
+        """Test that clients differing only in api key add up under one model@temperature"""
+        for api_key in ("sk-a", "sk-b"):
+            for _ in range(3):
+                self.pool.get("gpt-3.5-turbo", 0, api_key)
+        stats = self.pool.stats()
+        self.assertEqual(stats["clients"], 2)
+        self.assertEqual((stats["hits"], stats["misses"]), (4, 2))
+        self.assertEqual(stats["reuse_by_model"], {"gpt-3.5-turbo@0": 4})
+        self.assertAlmostEqual(stats["hit_rate"], 4 / 6)
+
+    def test_configure_keeps_old_clients_usable(self):
+        """Test that reconfiguring the pool leaves the old clients' connections open"""
+        old_pool = get_llm_pool()
+        client = old_pool.get("gpt-3.5-turbo", 0, "sk-test")
+        try:
+            new_pool = configure_llm_pool(max_connections=2)
+            self.assertIsNot(new_pool, old_pool)
+            self.assertFalse(client.http_client.is_closed)
+            self.assertEqual(new_pool.max_connections, 2)
+        finally:
+            llm_pool._pool = None
+
+
+class TestLoopLocalAsyncClient(unittest.TestCase):
+    """Test that async connections are pooled per event loop"""
+
+    def test_one_pool_per_event_loop(self):
+        """Test that each asyncio.run gets its own connection pool, reused within the loop"""
+        client = LoopLocalAsyncClient(llm_pool.httpx.Limits(max_connections=4), 5.0)
+
+        async def loop_clients():
+            return client._loop_client(), client._loop_client()
+
+        first, same = asyncio.run(loop_clients())
+        second, _ = asyncio.run(loop_clients())
+        self.assertIs(first, same)
+        self.assertIsNot(first, second)
+
+    def test_aclose_closes_running_loop_pool(self):
+        """Test that aclose closes the connections of the running loop"""
+        client = LoopLocalAsyncClient(llm_pool.httpx.Limits(max_connections=4), 5.0)
+
+        async def open_and_close():
+            inner = client._loop_client()
+            await client.aclose()
+            return inner
+
+        self.assertTrue(asyncio.run(open_and_close()).is_closed)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
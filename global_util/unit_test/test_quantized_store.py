@@ -0,0 +1,143 @@
+"""
+Unit Tests for the int8 quantized vector store
+Tests upsert, get, delete, search (coarse and exact), compaction and reopening a collection
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util import quantized_store
+from global_util.quantized_store import QuantizedCollection
+
+
+# Unit vectors scattered around a few centres, like embeddings of related chunks
+def make_vectors(count, dimensions=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(8, dimensions))
+    vectors = centres[rng.integers(0, 8, count)] + rng.normal(scale=0.5, size=(count, dimensions))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+class TestQuantizedCollection(unittest.TestCase):
+    """Test the quantized collection against brute-force cosine search"""
+
+    def setUp(self):
+        """Set up a collection with 200 vectors (auto-compaction off)"""
+        self.directory = tempfile.mkdtemp(prefix="quantized_store_test_")
+        self.vectors = make_vectors(200)
+        self.ids = [f"doc-{i}" for i in range(len(self.vectors))]
+        self.collection = self.open(compact_ratio=1.0)
+        self.collection.upsert(self.ids, self.vectors, documents=[f"text {i}" for i in range(len(self.ids))],
+                               metadatas=[{"group": i % 4, "source": f"file-{i % 10}"} for i in range(len(self.ids))])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def open(self, compact_ratio=1.0):
+        return QuantizedCollection(self.directory, "test", compact_ratio=compact_ratio)
+
+    def search_ids(self, vector, k=5, **kwargs):
+        rows = self.collection.search(vector, k=k, **kwargs)
+        details = self.collection.rows([row for row, _ in rows])
+        return [details[row][0] for row, _ in rows]
+
+    def expected_ids(self, vector, k=5, alive=None):
+        alive = alive if alive is not None else range(len(self.ids))
+        alive = list(alive)
+        scores = self.vectors[alive] @ vector
+        return [self.ids[alive[i]] for i in np.argsort(-scores, kind="stable")[:k]]
+
+    def test_upsert_and_get(self):
+        """Test that documents and metadata come back by id"""
+        self.assertEqual(self.collection.count(), 200)
+        result = self.collection.get(ids=["doc-3"], include=["documents", "metadatas", "embeddings"])
+        self.assertEqual(result["ids"], ["doc-3"])
+        self.assertEqual(result["documents"], ["text 3"])
+        self.assertEqual(result["metadatas"], [{"group": 3, "source": "file-3"}])
+        np.testing.assert_allclose(result["embeddings"][0], self.vectors[3], atol=1e-6)
+
+    def test_upsert_replaces_existing_id(self):
+        """Test that re-upserting an id replaces its vector and document without growing the count"""
+        self.collection.upsert(["doc-3"], [self.vectors[7]], documents=["new text"])
+        self.assertEqual(self.collection.count(), 200)
+        self.assertEqual(self.collection.get(ids=["doc-3"])["documents"], ["new text"])
+        self.assertIn("doc-3", self.search_ids(self.vectors[7], k=2))
+
+    def test_dimension_mismatch(self):
+        """Test that vectors of another size are rejected"""
+        with self.assertRaises(ValueError):
+            self.collection.upsert(["bad"], [np.ones(8, dtype=np.float32)])
+
+    def test_search_matches_brute_force(self):
+        """Test exact search and the int8 coarse scan with re-ranking against brute force"""
+        queries = make_vectors(20, seed=1)
+        with patch.object(quantized_store, "EXACT_THRESHOLD", 0): # Small collections are always scanned exactly
+            for query in queries:
+                expected = self.expected_ids(query)
+                self.assertEqual(self.search_ids(query, exact=True), expected)
+                self.assertEqual(self.search_ids(query, rerank_factor=8), expected)
+
+    def test_search_with_where(self):
+        """Test that metadata filters restrict the searched rows"""
+        query = self.vectors[10]
+        found = self.search_ids(query, k=5, where={"group": 2})
+        self.assertEqual(found, self.expected_ids(query, alive=range(2, 200, 4)))
+        found = self.search_ids(query, k=5, where={"group": {"$in": [1, 3]}})
+        self.assertEqual(found, self.expected_ids(query, alive=[i for i in range(200) if i % 2]))
+
+    def test_delete_by_id_and_where(self):
+        """Test that deleted rows are no longer returned"""
+        self.collection.delete(ids=["doc-10"])
+        self.assertNotIn("doc-10", self.search_ids(self.vectors[10], k=5))
+        self.collection.delete(where={"source": "file-1"})
+        self.assertEqual(self.collection.count(), 200 - 1 - 20)
+        self.assertEqual(self.collection.get(where={"source": "file-1"})["ids"], [])
+
+    def test_compact(self):
+        """Test that compaction drops retired rows and search still finds the right ids"""
+        deleted = set(range(0, 200, 3))
+        self.collection.delete(ids=[self.ids[i] for i in deleted])
+        self.collection.upsert(["doc-1"], [self.vectors[1]]) # Retires one more row
+        self.assertEqual(self.collection.compact(), len(deleted) + 1)
+        self.assertEqual(self.collection.compactions, 1)
+        self.assertEqual(self.collection.compact(), 0)
+
+        alive = [i for i in range(200) if i not in deleted]
+        self.assertEqual(self.collection.count(), len(alive))
+        for query in make_vectors(10, seed=2):
+            self.assertEqual(self.search_ids(query, exact=True), self.expected_ids(query, alive=alive))
+        self.assertEqual(os.path.getsize(os.path.join(self.directory, "full.f32")), len(alive) * 32 * 4)
+
+    def test_auto_compaction(self):
+        """Test that deletes past compact_ratio compact the files automatically"""
+        collection = self.open(compact_ratio=0.2)
+        self.collection = collection
+        collection.delete(ids=self.ids[:30])
+        self.assertEqual(collection.compactions, 0) # 15% retired
+        collection.delete(ids=self.ids[30:50])
+        self.assertEqual(collection.compactions, 1) # 25% retired
+        self.assertEqual(collection.count(), 150)
+        self.assertEqual(self.search_ids(self.vectors[100], k=1), ["doc-100"])
+
+    def test_reopen(self):
+        """Test that a reopened collection keeps its rows, deletions and metadata"""
+        self.collection.delete(ids=["doc-0"])
+        self.collection.modify(metadata={"embedder": "test"})
+        reopened = self.open()
+        self.assertEqual(reopened.count(), 199)
+        self.assertEqual(reopened.metadata, {"embedder": "test"})
+        self.collection = reopened
+        self.assertEqual(self.search_ids(self.vectors[5], k=1), ["doc-5"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,163 @@
+"""
+Unit Tests for the LLM response cache
+Tests exact and semantic lookups, expiry, the LRU bound, persistence in SQLite and context fingerprints
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from langchain_core.documents import Document
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util.response_cache import (ResponseCache, SQLiteCacheBackend, normalize_prompt, prompt_hash,
+                                        context_fingerprint)
+
+# Prompts about the same topic share a direction, so they count as similar
+TOPICS = ["vacation", "salary", "remote"]
+
+
+class TopicEmbeddings:
+    """Embeds a prompt as a one-hot vector of the first known topic it mentions"""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        vector = [0.0] * (len(TOPICS) + 1)
+        topic = next((i for i, topic in enumerate(TOPICS) if topic in text), len(TOPICS))
+        vector[topic] = 1.0
+        return vector
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test lookups, expiry and eviction of cached responses"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="response_cache_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def backend(self):
+        return SQLiteCacheBackend(os.path.join(self.directory, "responses.sqlite"))
+
+    def test_exact_match_ignores_case_and_whitespace(self):
+        """Test that prompts differing only in case and spacing share an entry"""
+        self.assertEqual(normalize_prompt("  How many\nVacation  days? "), "how many vacation days?")
+        cache = ResponseCache()
+        cache.set("How many vacation days?", "25", latency=2.0)
+        self.assertEqual(cache.get("how many   VACATION days?"), "25")
+        self.assertIsNone(cache.get("How many sick days?"))
+        stats = cache.stats()
+        self.assertEqual((stats["exact_hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["latency_saved"], 2.0)
+
+    def test_entries_expire(self):
+        """Test that entries older than ttl are not served"""
+        cache = ResponseCache(ttl=0.01)
+        cache.set("prompt", "response")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("prompt"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_least_recently_used_are_evicted(self):
+        """Test that the in-memory cache keeps at most max_entries, dropping the least recently used"""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+
+    def test_backend_survives_restart(self):
+        """Test that responses written to SQLite are found by a new cache"""
+        ResponseCache(backend=self.backend()).set("What is the dress code?", "Business casual", latency=1.5)
+        restarted = ResponseCache(backend=self.backend())
+        self.assertEqual(restarted.get("what is the dress code?"), "Business casual")
+        self.assertEqual(restarted.stats()["latency_saved"], 1.5)
+
+        restarted.invalidate("What is the dress code?")
+        self.assertIsNone(ResponseCache(backend=self.backend()).get("What is the dress code?"))
+
+    def test_semantic_match(self):
+        """Test that a similar prompt gets the cached response and a different one does not"""
+        cache = ResponseCache(embedding=TopicEmbeddings(), similarity_threshold=0.9)
+        cache.set("How many vacation days do I get?", "25 days")
+        self.assertEqual(cache.get("vacation allowance for new hires"), "25 days")
+        self.assertIsNone(cache.get("When is salary paid?"))
+        stats = cache.stats()
+        self.assertEqual((stats["semantic_hits"], stats["misses"]), (1, 1))
+
+    def test_get_or_compute_embeds_once(self):
+        """Test that a miss embeds the prompt once and reuses the vector to store the result"""
+        embedding = TopicEmbeddings()
+        cache = ResponseCache(embedding=embedding)
+        computed = []
+
+        def compute(prompt):
+            computed.append(prompt)
+            return "answer"
+
+        self.assertEqual(cache.get_or_compute("remote work rules", compute), "answer")
+        self.assertEqual(len(embedding.calls), 1)
+        self.assertEqual(cache.get_or_compute("remote work rules", compute), "answer")
+        self.assertEqual(computed, ["remote work rules"])
+
+    def test_prompt_vectors_persist(self):
+        """Test that semantic matching works after a restart without re-embedding stored prompts"""
+        ResponseCache(backend=self.backend(), embedding=TopicEmbeddings()).set("vacation policy", "25 days")
+        embedding = TopicEmbeddings()
+        restarted = ResponseCache(backend=self.backend(), embedding=embedding)
+        self.assertEqual(restarted.get("how much vacation"), "25 days")
+        self.assertEqual(embedding.calls, ["how much vacation"])
+
+    def test_backend_purge_expired(self):
+        """Test that purge_expired removes only old rows"""
+        backend = self.backend()
+        backend.set(prompt_hash("old"), "1", created_at=time.time() - 100)
+        backend.set(prompt_hash("new"), "2")
+        self.assertEqual(backend.purge_expired(50), 1)
+        self.assertIsNone(backend.get(prompt_hash("old")))
+        self.assertEqual(backend.get(prompt_hash("new"))[0], "2")
+
+
+class TestContextFingerprint(unittest.TestCase):
+    """Test the fingerprint that ties cached answers to the retrieved context"""
+
+    def test_chunk_ids_and_order(self):
+        """Test that the fingerprint follows the chunk IDs and their order, not the text"""
+        first = Document(page_content="Leave policy", id="chunk-1")
+        second = Document(page_content="Travel policy", id="chunk-2")
+        fingerprint = context_fingerprint([first, second])
+        self.assertEqual(context_fingerprint([Document(page_content="other text", id="chunk-1"), second]),
+                         fingerprint)
+        self.assertNotEqual(context_fingerprint([second, first]), fingerprint)
+        self.assertNotEqual(context_fingerprint([first]), fingerprint)
+
+    def test_documents_without_id(self):
+        """Test that documents without an ID are fingerprinted by their text"""
+        self.assertEqual(context_fingerprint([Document(page_content="Leave policy")]),
+                         context_fingerprint([Document(page_content="Leave policy")]))
+        self.assertNotEqual(context_fingerprint([Document(page_content="Leave policy")]),
+                            context_fingerprint([Document(page_content="Travel policy")]))
+
+    def test_answers_keyed_by_context(self):
+        """Test that the same question over different context is a different cache entry"""
+        cache = ResponseCache()
+        old_context = context_fingerprint([Document(page_content="v1", id="old")])
+        new_context = context_fingerprint([Document(page_content="v2", id="new")])
+        cache.set(f"model\n{old_context}\nHow many vacation days?", "20")
+        self.assertEqual(cache.get(f"model\n{old_context}\nhow many vacation days?"), "20")
+        self.assertIsNone(cache.get(f"model\n{new_context}\nHow many vacation days?"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,235 @@
+"""
+Unit Tests for the retry policy
+Tests error classification, retries, the per-request deadline and the circuit breaker
+"""
+
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+# Add the project root to path so global_util can be imported
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from global_util.retry import (RetryPolicy, CircuitBreaker, CircuitOpenError, RetryDeadlineExceeded,
+                               classify_error, get_retry_after, RATE_LIMIT, TRANSIENT, FATAL)
+
+
+class APIError(Exception):
+    """Stand-in for an API client error carrying a status code"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+class RateLimitError(Exception):
+    """Error recognised by name only"""
+
+
+# Returns a function that raises the given errors in turn, then returns "ok"
+def failing(*errors):
+    calls = []
+
+    def fn(**kwargs):
+        calls.append(kwargs)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+    fn.calls = calls
+    return fn
+
+
+class TestClassifyError(unittest.TestCase):
+    """Test error classification and Retry-After parsing"""
+
+    def test_status_codes(self):
+        """Test categories derived from HTTP status codes"""
+        self.assertEqual(classify_error(APIError(429)), RATE_LIMIT)
+        self.assertEqual(classify_error(APIError(503)), TRANSIENT)
+        self.assertEqual(classify_error(APIError(408)), TRANSIENT)
+        self.assertEqual(classify_error(APIError(400)), FATAL)
+        self.assertEqual(classify_error(APIError(401)), FATAL)
+
+    def test_exception_types(self):
+        """Test categories derived from exception types and names"""
+        self.assertEqual(classify_error(RateLimitError()), RATE_LIMIT)
+        self.assertEqual(classify_error(TimeoutError()), TRANSIENT)
+        self.assertEqual(classify_error(ConnectionError()), TRANSIENT)
+        self.assertEqual(classify_error(ValueError("bad prompt")), FATAL)
+
+    def test_retry_after(self):
+        """Test Retry-After headers in seconds and milliseconds"""
+        self.assertEqual(get_retry_after(APIError(429, {"retry-after": "2"})), 2.0)
+        self.assertEqual(get_retry_after(APIError(429, {"retry-after-ms": "1500"})), 1.5)
+        self.assertIsNone(get_retry_after(APIError(429)))
+        self.assertIsNone(get_retry_after(APIError(429, {"retry-after": "soon"})))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test retries, backoff and deadlines"""
+
+    def setUp(self):
+        """Set up a policy that does not sleep between attempts"""
+        self.policy = RetryPolicy(max_retries=3, base_delay=0.0, deadline=None)
+
+    def test_transient_errors_are_retried(self):
+        """Test that transient errors are retried until the call succeeds"""
+        fn = failing(APIError(503), TimeoutError())
+        self.assertEqual(self.policy.call(fn), "ok")
+        self.assertEqual(len(fn.calls), 3)
+        counters = self.policy.metrics()["counters"]
+        self.assertEqual(counters["retries"], 2)
+        self.assertEqual(counters["successes"], 1)
+
+    def test_fatal_error_is_not_retried(self):
+        """Test that a fatal error is raised after one attempt"""
+        fn = failing(APIError(400))
+        with self.assertRaises(APIError):
+            self.policy.call(fn)
+        self.assertEqual(len(fn.calls), 1)
+
+    def test_retries_exhausted(self):
+        """Test that the last error is raised once max_retries retries (max_retries + 1 attempts) are used up"""
+        fn = failing(*[APIError(500)] * 5)
+        with self.assertRaises(APIError):
+            self.policy.call(fn, max_retries=2)
+        self.assertEqual(len(fn.calls), 3)
+
+    def test_backoff_honors_retry_after(self):
+        """Test that the backoff waits at least the Retry-After time, capped by max_delay"""
+        policy = RetryPolicy(base_delay=0.0, max_delay=5.0)
+        self.assertEqual(policy.backoff(1, APIError(429, {"retry-after": "2"})), 2.0)
+        self.assertEqual(policy.backoff(1, APIError(429, {"retry-after": "60"})), 5.0)
+
+    def test_timeout_arg_gets_remaining_time(self):
+        """Test that each attempt receives the time left before the deadline"""
+        fn = failing(APIError(503))
+        self.policy.call(fn, deadline=10.0, timeout_arg="timeout")
+        self.assertEqual(len(fn.calls), 2)
+        self.assertLessEqual(fn.calls[0]["timeout"], 10.0)
+        self.assertGreater(fn.calls[0]["timeout"], 9.0)
+        self.assertLessEqual(fn.calls[1]["timeout"], fn.calls[0]["timeout"])
+
+    def test_retry_not_scheduled_past_deadline(self):
+        """Test that a backoff longer than the remaining time raises RetryDeadlineExceeded"""
+        fn = failing(APIError(429, {"retry-after": "5"}))
+        with patch("global_util.retry.time.sleep") as sleep:
+            with self.assertRaises(RetryDeadlineExceeded):
+                self.policy.call(fn, deadline=1.0)
+        sleep.assert_not_called()
+        self.assertEqual(len(fn.calls), 1)
+
+    def test_late_success_raises(self):
+        """Test that a result arriving after the deadline raises RetryDeadlineExceeded"""
+        def slow(**kwargs):
+            time.sleep(0.05)
+            return "late"
+        with self.assertRaises(RetryDeadlineExceeded):
+            self.policy.call(slow, deadline=0.01)
+        self.assertEqual(self.policy.metrics()["counters"]["deadline_exceeded"], 1)
+
+    def test_failure_past_deadline_raises(self):
+        """Test that a failed attempt ending past the deadline is not retried"""
+        def slow_failure(**kwargs):
+            time.sleep(0.05)
+            raise TimeoutError("read timed out")
+        with self.assertRaises(RetryDeadlineExceeded) as context:
+            self.policy.call(slow_failure, deadline=0.01)
+        self.assertIsInstance(context.exception.__cause__, TimeoutError)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test the circuit breaker states and its use by the retry policy"""
+
+    def setUp(self):
+        """Set up a breaker that opens after two failures and resets quickly"""
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        self.policy = RetryPolicy(max_retries=5, base_delay=0.0, deadline=None, breaker=self.breaker)
+
+    def test_opens_after_threshold(self):
+        """Test that the breaker opens and rejects calls after consecutive failures"""
+        fn = failing(*[APIError(503)] * 10)
+        with self.assertRaises(CircuitOpenError):
+            self.policy.call(fn)
+        self.assertEqual(len(fn.calls), 2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.policy.call(failing())
+        self.assertEqual(self.policy.metrics()["counters"]["circuit_rejected"], 2)
+
+    def test_half_open_trial_closes_on_success(self):
+        """Test that one trial call is let through after reset_timeout and a success closes the circuit"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        time.sleep(0.06)
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.policy.call(failing()), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_failure_reopens(self):
+        """Test that a failing trial call re-opens the circuit"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        time.sleep(0.06)
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call() # Only one trial at a time
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_fatal_error_releases_trial(self):
+        """Test that a fatal error during the trial call closes the circuit (the provider answered)"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        time.sleep(0.06)
+        with self.assertRaises(APIError):
+            self.policy.call(failing(APIError(400)))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_deadline_timeouts_do_not_open_breaker(self):
+        """Test that timeouts cut short by the caller's own deadline are not provider failures"""
+        def timing_out(timeout=None):
+            time.sleep(timeout)
+            raise TimeoutError("request timed out")
+        for _ in range(5):
+            with self.assertRaises(RetryDeadlineExceeded):
+                self.policy.call(timing_out, deadline=0.005, timeout_arg="timeout")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.policy.call(failing()), "ok")
+
+    def test_provider_timeouts_open_breaker(self):
+        """Test that timeouts within the deadline still count as provider failures"""
+        fn = failing(*[TimeoutError("read timed out")] * 10)
+        with self.assertRaises(CircuitOpenError):
+            self.policy.call(fn, deadline=10.0, timeout_arg="timeout")
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_interrupted_trial_is_released(self):
+        """Test that a trial call ending in a BaseException does not leave the breaker half-open"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        time.sleep(0.06)
+        with self.assertRaises(KeyboardInterrupt):
+            self.policy.call(failing(KeyboardInterrupt()))
+        self.assertEqual(self.policy.call(failing()), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_deadline_cut_trial_is_released(self):
+        """Test that a trial call cut short by the deadline lets the next call try again"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        time.sleep(0.06)
+        def timing_out(timeout=None):
+            time.sleep(timeout)
+            raise TimeoutError("request timed out")
+        with self.assertRaises(RetryDeadlineExceeded):
+            self.policy.call(timing_out, deadline=0.005, timeout_arg="timeout")
+        self.assertEqual(self.policy.call(failing()), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
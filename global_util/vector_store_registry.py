@@ -0,0 +1,61 @@
+# Process-level registry of open vector store handles
+# Writers and searchers share one handle per collection, so writes are visible without reopening
+import os
+import threading
+from langchain_chroma import Chroma
+from global_util.embedding_backends import describe_embedder, ensure_collection_embedder
+from global_util.quantized_store import QuantizedVectorStore
+
+# Collection name langchain_chroma uses when none is given
+DEFAULT_COLLECTION = "langchain"
+# Vector store backend: "chroma" or "quantized" (int8, memory-mapped; override with GOPI_VECTOR_BACKEND)
+VECTOR_BACKEND = os.getenv("GOPI_VECTOR_BACKEND", "chroma").lower()
+
+_lock = threading.Lock()
+_handles = {}
+_stats = {"hits": 0, "opens": 0}
+
+
+# Handles are shared per embedder too, so opening a collection with another embedder is checked again
+def _key(persist_directory, embedding, collection_name=None, backend=None):
+    return (os.path.abspath(persist_directory), collection_name or DEFAULT_COLLECTION, backend or VECTOR_BACKEND,
+            describe_embedder(embedding))
+
+
+# Opens a new vector store handle with the chosen backend (not registered; see get_vector_store).
+# The quantized backend keeps its files under <persist_directory>/quantized/<collection>
+def open_vector_store(persist_directory, embedding, collection_name=None, backend=None):
+    backend = backend or VECTOR_BACKEND
+    collection_name = collection_name or DEFAULT_COLLECTION
+    if backend == "quantized":
+        return QuantizedVectorStore(persist_directory, embedding, collection_name=collection_name)
+    if backend != "chroma":
+        raise ValueError(f"Unknown vector store backend: {backend}")
+    return Chroma(
+        persist_directory=persist_directory,
+        embedding_function=embedding,
+        collection_name=collection_name
+    )
+
+
+# Returns the open handle for (persist_directory, collection, backend, embedder), opening it once per process.
+# Raises EmbedderMismatchError if the collection was built with a different embedder
+def get_vector_store(persist_directory, embedding, collection_name=None, backend=None):
+    key = _key(persist_directory, embedding, collection_name, backend)
+    with _lock:
+        vector_store = _handles.get(key)
+        if vector_store is not None:
+            _stats["hits"] += 1
+            return vector_store
+        vector_store = open_vector_store(persist_directory, embedding, key[1], key[2])
+        ensure_collection_embedder(vector_store, embedding)
+        _handles[key] = vector_store
+        _stats["opens"] += 1
+        return vector_store
+
+
+def get_vector_store_registry_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["open_handles"] = len(_handles)
+    return stats